@@ -0,0 +1,91 @@
+# ---------- ACKNOWLEDGEMENT STORE ----------
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+ACK_DB_PATH = "responses.db"
+LEGACY_XLSX = "responses.xlsx"
+ACK_COLUMNS = ["UserID", "Name"]
+
+
+class AckStore:
+    """Acknowledgements in SQLite: one appended row per acknowledgement, indexed by UserID.
+
+    Acknowledged user ids are also held in memory, so ``has`` is a set lookup;
+    ``PRAGMA data_version`` tells when another process has written and the
+    set must be reloaded. Rows from the old ``responses.xlsx`` are imported
+    once on first open.
+    """
+
+    def __init__(self, path=ACK_DB_PATH, legacy_xlsx=LEGACY_XLSX):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS acks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, name TEXT NOT NULL, at REAL)""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS acks_user ON acks (user_id)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._migrate(legacy_xlsx)
+        self._load()
+
+    def _migrate(self, legacy_xlsx):
+        if not legacy_xlsx or not os.path.exists(legacy_xlsx):
+            return
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_xlsx'").fetchone():
+                return
+            try:
+                old = pd.read_excel(legacy_xlsx)
+            except Exception:
+                return
+            rows = []
+            if set(ACK_COLUMNS).issubset(old.columns):
+                old = old.dropna(subset=["UserID"])
+                rows = [(str(u), "" if pd.isna(n) else str(n), None) for u, n in zip(old["UserID"], old["Name"])]
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany("INSERT INTO acks (user_id, name, at) VALUES (?, ?, ?)", rows)
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_xlsx', ?)", (str(len(rows)),))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _load(self):
+        with self.lock:
+            self.users = {u for (u,) in self.conn.execute("SELECT DISTINCT user_id FROM acks")}
+            self.version = self._data_version()
+
+    def _fresh(self):
+        # data_version only changes for commits made by other connections
+        with self.lock:
+            stale = self._data_version() != self.version
+        if stale:
+            self._load()
+
+    def has(self, user_id):
+        self._fresh()
+        return user_id in self.users
+
+    def append(self, user_id, name):
+        with self.lock:
+            self.conn.execute("INSERT INTO acks (user_id, name, at) VALUES (?, ?, ?)", (user_id, name, time.time()))
+            self.users.add(user_id)
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM acks")
+            self.users = set()
+
+    def frame(self):
+        """All acknowledgements in the order received, as UserID/Name columns."""
+        with self.lock:
+            rows = self.conn.execute("SELECT user_id, name FROM acks ORDER BY id").fetchall()
+        return pd.DataFrame(rows, columns=ACK_COLUMNS)
@@ -0,0 +1,144 @@
+# ---------- ANALYTICS CUBE ----------
+import numpy as np
+import pandas as pd
+
+from dataset import patch_series, concat_frames
+from ingest import derived_columns, map_distinct
+from locations import LOCATIONS
+from indexes import DateIndex
+
+CUBE_KEYS = ["Month", "Head_std", "Location_clean", "Status"]
+
+
+def normalize_status(value):
+    """Analytics buckets: Resolved/Closed count as Resolved, everything else as Pending."""
+    if pd.isna(value) or value in ("", "NA"):
+        return "Pending"
+    return {"PENDING": "Pending", "RESOLVED": "Resolved", "CLOSED": "Resolved"}.get(str(value).strip().upper(), "Pending")
+
+
+def analytics_keys(df):
+    """Per-row cube coordinates: inspection date, its month and the cleaned Head/Location/Status.
+
+    Head_std and Location_clean come from ingest; frames without them get them derived here.
+    """
+    std = df if "Head_std" in df.columns else derived_columns(df)
+    dates = df["Date of Inspection"].reset_index(drop=True)
+    return pd.DataFrame({
+        "Date": dates,
+        "Month": dates.dt.to_period("M").dt.to_timestamp(),
+        "Head_std": pd.Categorical(std["Head_std"]),
+        "Location_clean": pd.Categorical(std["Location_clean"]),
+        "Status": map_distinct(df["Status"], normalize_status),
+    })
+
+
+def count_cube(keys):
+    """Row counts per (Month, Head_std, Location_clean, Status); undated rows are never in range."""
+    keys = keys[keys["Month"].notna()]
+    cube = keys.groupby(CUBE_KEYS, observed=True, sort=False).size()
+    return cube.astype(np.int64)
+
+
+def merge_cube(cube, plus=None, minus=None):
+    parts = [cube] + ([plus] if plus is not None else []) + ([-minus] if minus is not None else [])
+    parts = [p.rename("Count").reset_index() for p in parts if len(p)]
+    if not parts:
+        return cube.iloc[:0]
+    merged = pd.concat(parts, ignore_index=True).astype({k: object for k in CUBE_KEYS[1:]})
+    merged = merged.groupby(CUBE_KEYS, sort=False)["Count"].sum()
+    return merged[merged != 0]
+
+
+class AnalyticsCube:
+    """Deficiency counts by (Month, Head_std, Location_clean, Status) for one data version.
+
+    Months wholly inside a date range are answered from the cube; only the
+    (at most two) partial months at the edges are counted from the rows,
+    found through the dataset's DateIndex. ``updated`` derives the next
+    version's cube from the rows a delta sync changed, without recounting the rest.
+    """
+
+    def __init__(self, keys, cube=None, dates=None):
+        self.keys = keys
+        self.cube = cube if cube is not None else count_cube(keys)
+        self.dates = dates if dates is not None else DateIndex(keys["Date"])
+
+    @classmethod
+    def build(cls, df, dates=None):
+        return cls(analytics_keys(df), dates=dates)
+
+    def updated(self, df, changed, dates=None):
+        """Cube for ``df``, the next version, given the positions whose rows changed or were appended.
+
+        ``dates`` is the next version's DateIndex when the caller already has it.
+        """
+        changed = np.asarray(changed, dtype=np.int64)
+        fresh = analytics_keys(df.iloc[changed])
+        old_n = len(self.keys)
+        existing, appended = changed < old_n, changed >= old_n
+        keys = self.keys
+        if existing.any():
+            pos = changed[existing]
+            keys = keys.copy(deep=False)
+            for col in keys.columns:
+                keys[col] = patch_series(keys[col], pos, fresh[col].to_numpy()[existing])
+        if appended.any():
+            keys = concat_frames(keys, fresh[appended])
+        cube = merge_cube(self.cube, plus=count_cube(fresh),
+                          minus=count_cube(self.keys.iloc[changed[existing]]))
+        return AnalyticsCube(keys, cube, dates if dates is not None else self.dates.updated(keys["Date"], changed))
+
+    def _rows_between(self, lo, hi, inclusive):
+        return self.dates.positions(lo, hi, inclusive=inclusive)
+
+    def counts(self, start, end, exclude=(), extra=None):
+        """Counts for start <= date <= end as a frame with CUBE_KEYS and Count.
+
+        ``exclude`` drops rows (positions) from the answer and ``extra`` adds
+        keys rows; together they swap in a session's own edited rows.
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        first_full = start if start == start.to_period("M").to_timestamp() else (start + pd.offsets.MonthBegin(1)).normalize()
+        last_open = end.to_period("M").to_timestamp()  # months before this one end on or before `end`
+        parts = []
+        if first_full < last_open:
+            months = self.cube.index.get_level_values("Month")
+            parts.append(self.cube[(months >= first_full) & (months < last_open)])
+            edge = np.concatenate([self._rows_between(start, first_full, inclusive=False),
+                                   self._rows_between(last_open, end, inclusive=True)])
+        else:
+            edge = self._rows_between(start, end, inclusive=True)
+        parts.append(count_cube(self.keys.iloc[np.sort(edge)]))
+        exclude = np.asarray(list(exclude), dtype=np.int64)
+        if len(exclude):
+            gone = self.keys.iloc[exclude]
+            parts.append(-count_cube(gone[(gone["Date"] >= start) & (gone["Date"] <= end)]))
+        if extra is not None and len(extra):
+            parts.append(count_cube(extra[(extra["Date"] >= start) & (extra["Date"] <= end)]))
+        total = merge_cube(parts[0], plus=pd.concat(parts[1:]) if len(parts) > 1 else None)
+        return total.rename("Count").reset_index().astype({k: object for k in CUBE_KEYS[1:]})
+
+
+# ---------- CUBE QUERIES ----------
+def monthly_trend(counts):
+    """Total per month with empty months in between filled with 0, like a monthly Grouper."""
+    if counts.empty:
+        return pd.DataFrame(columns=["Date of Inspection", "TotalCount"])
+    per_month = counts.groupby("Month")["Count"].sum()
+    months = pd.date_range(per_month.index.min(), per_month.index.max(), freq="MS")
+    per_month = per_month.reindex(months, fill_value=0)
+    return pd.DataFrame({"Date of Inspection": per_month.index, "TotalCount": per_month.to_numpy()})
+
+
+def locations_in(counts):
+    """Cleaned locations present, plus the subsections of any footplate route present."""
+    return LOCATIONS.expand(set(counts["Location_clean"].unique()))
+
+
+def total_by(counts, key):
+    return counts.groupby(key)["Count"].sum().reset_index(name="TotalCount")
+
+
+def status_by(counts, key):
+    return counts.groupby([key, "Status"])["Count"].sum().unstack(fill_value=0)
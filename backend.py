@@ -0,0 +1,194 @@
+# ---------- SHEET BACKENDS ----------
+import csv
+import os
+import threading
+from abc import ABC, abstractmethod
+
+import gspread
+
+# Set to a CSV path to run against a local file instead of Google Sheets.
+LOCAL_SHEET_ENV = "INSPECTION_SHEET_FILE"
+
+
+class SpreadsheetBackend(ABC):
+    """The spreadsheet calls the app makes; a gspread ``Spreadsheet`` already provides them."""
+
+    @abstractmethod
+    def worksheets(self):
+        """Every worksheet, as ``SheetBackend``s."""
+
+    @abstractmethod
+    def worksheet(self, name):
+        """The worksheet titled ``name``; raises ``gspread.exceptions.WorksheetNotFound``."""
+
+    @abstractmethod
+    def values_batch_update(self, body):
+        """Write the Sheets API body
+        ``{"valueInputOption": ..., "data": [{"range": "A1:B2", "values": [[...]]}]}``.
+
+        Ranges may carry a worksheet prefix (``'Sheet1 2024'!A2:B3``).
+        """
+
+
+class SheetBackend(ABC):
+    """The worksheet calls the app makes; a gspread ``Worksheet`` already provides them."""
+
+    title = ""
+
+    @property
+    @abstractmethod
+    def spreadsheet(self):
+        """The ``SpreadsheetBackend`` holding this worksheet; writes go through it."""
+
+    @abstractmethod
+    def get_all_values(self):
+        """Every row as a list of cell strings, padded to the widest row."""
+
+    @abstractmethod
+    def row_values(self, row):
+        """Cells of 1-based ``row``, trailing empty cells dropped."""
+
+    @abstractmethod
+    def batch_get(self, ranges):
+        """One trimmed grid of cell strings per A1 range."""
+
+
+def _trim(rows):
+    """Drop trailing empty cells and rows, as the Sheets API does."""
+    out = []
+    for row in rows:
+        row = list(row)
+        while row and row[-1] == "":
+            row.pop()
+        out.append(row)
+    while out and not out[-1]:
+        out.pop()
+    return out
+
+
+class LocalSheet(SheetBackend, SpreadsheetBackend):
+    """Worksheet stand-in kept in memory and backed by a CSV file of cell strings.
+
+    Writes are applied in memory and, with ``autosave``, the file is rewritten
+    atomically after every batch update. Outside a ``LocalWorkbook`` it is
+    its own single-worksheet spreadsheet.
+    """
+
+    def __init__(self, path, title="Sheet1", autosave=True, workbook=None):
+        self.path = path
+        self.title = title
+        self.autosave = autosave
+        self.workbook = workbook
+        self.lock = threading.Lock()
+        self.rows = []
+        if os.path.exists(path):
+            with open(path, newline="", encoding="utf-8") as f:
+                self.rows = [list(r) for r in csv.reader(f)]
+
+    @classmethod
+    def create(cls, path, rows, title="Sheet1"):
+        sheet = cls(path, title=title, autosave=True)
+        sheet.rows = [[str(v) for v in r] for r in rows]
+        sheet.save()
+        return sheet
+
+    @property
+    def spreadsheet(self):
+        return self.workbook or self
+
+    def worksheet(self, name):
+        return self
+
+    def worksheets(self):
+        return [self]
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(self.rows)
+        os.replace(tmp, self.path)
+
+    # ----- reads -----
+    def get_all_values(self):
+        with self.lock:
+            width = max((len(r) for r in self.rows), default=0)
+            return [r + [""] * (width - len(r)) for r in self.rows]
+
+    def row_values(self, row):
+        with self.lock:
+            return _trim([self.rows[row - 1]])[0] if 0 < row <= len(self.rows) and self.rows[row - 1] else []
+
+    def _grid(self, a1):
+        grid = gspread.utils.a1_range_to_grid_range(a1.split("!")[-1])
+        r0, r1 = grid.get("startRowIndex", 0), grid.get("endRowIndex", len(self.rows))
+        c0 = grid.get("startColumnIndex", 0)
+        c1 = grid["endColumnIndex"] if "endColumnIndex" in grid else max((len(r) for r in self.rows), default=0)
+        return r0, r1, c0, c1
+
+    def batch_get(self, ranges):
+        with self.lock:
+            out = []
+            for a1 in ranges:
+                r0, r1, c0, c1 = self._grid(a1)
+                out.append(_trim(row[c0:c1] for row in self.rows[r0:r1]))
+            return out
+
+    # ----- writes -----
+    def values_batch_update(self, body):
+        with self.lock:
+            for item in body.get("data", []):
+                r0, _, c0, _ = self._grid(item["range"])
+                for i, values in enumerate(item["values"]):
+                    while len(self.rows) <= r0 + i:
+                        self.rows.append([])
+                    row = self.rows[r0 + i]
+                    if len(row) < c0 + len(values):
+                        row.extend([""] * (c0 + len(values) - len(row)))
+                    row[c0:c0 + len(values)] = ["" if v is None else str(v) for v in values]
+            if self.autosave:
+                self.save()
+        return {"totalUpdatedCells": sum(len(v) for item in body.get("data", []) for v in item["values"])}
+
+
+class LocalWorkbook(SpreadsheetBackend):
+    """Spreadsheet stand-in: a directory with one CSV file per worksheet, titled by file name.
+
+    ``values_batch_update`` routes each range by its sheet prefix
+    (``'Sheet1 2024'!A2:B3``); unqualified ranges go to the first worksheet,
+    as in the Sheets API.
+    """
+
+    def __init__(self, path, autosave=True):
+        self.path = path
+        self.autosave = autosave
+        self.sheets = {}
+        self._scan()
+
+    def _scan(self):
+        """Pick up CSV files added since the last look, as the API lists new worksheets."""
+        for name in sorted(os.listdir(self.path)):
+            title = name[:-4]
+            if name.endswith(".csv") and title not in self.sheets:
+                self.sheets[title] = LocalSheet(os.path.join(self.path, name), title=title,
+                                                autosave=self.autosave, workbook=self)
+
+    def worksheets(self):
+        self._scan()
+        return list(self.sheets.values())
+
+    def worksheet(self, name):
+        if name not in self.sheets:
+            raise gspread.exceptions.WorksheetNotFound(name)
+        return self.sheets[name]
+
+    def values_batch_update(self, body):
+        first = next(iter(self.sheets))
+        by_sheet = {}
+        for item in body.get("data", []):
+            title, _, a1 = item["range"].rpartition("!")
+            title = title[1:-1].replace("''", "'") if title.startswith("'") else title
+            by_sheet.setdefault(title or first, []).append(dict(item, range=a1))
+        cells = 0
+        for title, data in by_sheet.items():
+            cells += self.worksheet(title).values_batch_update(dict(body, data=data))["totalUpdatedCells"]
+        return {"totalUpdatedCells": cells}
@@ -0,0 +1,133 @@
+# ---------- BENCHMARKS ----------
+# python benchmark.py classify|memory|scale [rows]
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend import LocalSheet
+from classifier import classify_feedback, classify_feedback_series, StatusCache
+from constants import FOOTPLATE_ROUTE_HIERARCHY, HEAD_LIST
+from locations import LOCATIONS
+from dataset import frame_bytes
+from export import build_excel
+from indexes import TokenIndex, SearchIndex, text_match
+from ingest import categorize, ingest_frame
+from sync import SheetSync, TIMESTAMP_COL_NAME
+from synth import feedback_corpus, synthetic_frame, local_sheet
+from writeback import column_map, edited_values, a1_ranges
+
+SCALE_SIZES = [10000, 100000, 1000000]
+SEARCH_COLS = ["Deficiencies Noted", "Feedback", "User Feedback/Remark", "Location", "Head", "Sub Head"]
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    out = fn()
+    print(f"{label:<48} {time.perf_counter() - t0:8.3f} s")
+    return out
+
+
+def bench_classify(rows=100000):
+    fb, rm = feedback_corpus(rows, seed=2)
+    pool_fb, pool_rm = feedback_corpus(2000, seed=3)
+    rnd = np.random.default_rng(4)
+    corpora = {
+        "all distinct": (fb, rm),
+        # real sheets repeat a few thousand phrasings ("done", "attended", ...)
+        "2k phrasings": (pool_fb.iloc[rnd.integers(0, 2000, rows)].reset_index(drop=True),
+                         pool_rm.iloc[rnd.integers(0, 2000, rows)].reset_index(drop=True)),
+    }
+    for name, (f, r) in corpora.items():
+        df = pd.DataFrame({"Feedback": f, "User Feedback/Remark": r})
+        timed(f"{name}: row-wise apply",
+              lambda: df.apply(lambda x: classify_feedback(x["Feedback"], x["User Feedback/Remark"]), axis=1))
+        timed(f"{name}: batched series",
+              lambda: classify_feedback_series(df["Feedback"], df["User Feedback/Remark"]))
+
+
+def bench_memory(rows=200000):
+    df = synthetic_frame(rows)
+    df["Status"] = classify_feedback_series(df["Feedback"], df["User Feedback/Remark"])
+    encoded = categorize(df.copy())
+    cols = ["Type of Inspection", "Location", "Head", "Sub Head", "Inspection By", "Action By", "Status"]
+    print(f"{'column':<22} {'object MB':>10} {'category MB':>12}")
+    for col in cols:
+        print(f"{col:<22} {df[col].memory_usage(deep=True) / 2**20:10.2f} {encoded[col].memory_usage(deep=True) / 2**20:12.2f}")
+    print(f"{'whole frame':<22} {frame_bytes(df) / 2**20:10.2f} {frame_bytes(encoded) / 2**20:12.2f}  ({rows:,} rows)")
+
+
+def bench_scale(rows):
+    """Time the app's data path end to end against a local sheet of ``rows`` synthetic inspections."""
+    print(f"--- {rows:,} rows ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sheet.csv")
+        timed("generate sheet file", lambda: local_sheet(path, rows))
+        sheet = LocalSheet(path, autosave=False)
+        engine = SheetSync(sheet, ingest=ingest_frame)
+        df = timed("load (full sync: parse + ingest)", engine.sync)
+
+        cache = StatusCache(max_entries=max(250000, rows))
+        status = timed("classify (cold status cache)", lambda: cache.classify(df["Feedback"], df["User Feedback/Remark"]))
+        timed("classify (warm status cache)", lambda: cache.classify(df["Feedback"], df["User Feedback/Remark"]))
+        df = df.copy(deep=False)
+        df["Status"] = status
+        df = categorize(df)
+
+        officers = timed("officer token index build", lambda: TokenIndex(df["Inspection By"]))
+        route = next(iter(FOOTPLATE_ROUTE_HIERARCHY))
+        end = df["Date of Inspection"].max()
+
+        def view_filter():
+            mask = (df["Date of Inspection"] >= end - pd.Timedelta(days=365)).to_numpy()
+            mask &= LOCATIONS.mask(df["Location"], [route]) | df["Head"].isin(HEAD_LIST[1:4]).to_numpy()
+            mask &= officers.mask(["Sr.DSO", "DRM/SUR"])
+            mask &= (df["Status"] == "Pending").to_numpy()
+            return df[mask]
+
+        filtered = timed("filter (date, location/head, officer, status)", view_filter)
+        index = timed("search index build", lambda: SearchIndex(df, SEARCH_COLS))
+
+        def search():
+            candidates = index.candidates("broken fencing")
+            frame = df.iloc[candidates]
+            return frame[text_match(frame, SEARCH_COLS, "broken fencing")]
+
+        found = timed("search 'broken fencing'", search)
+        export = df.head(20000)  # export cost grows with exported rows, not the sheet
+        data = timed(f"excel export ({len(export):,} rows)", lambda: build_excel(export, "Filtered Records"))
+
+        rnd = np.random.default_rng(5)
+        picked = df.iloc[np.sort(rnd.choice(len(df), min(500, len(df)), replace=False))]
+        edited = picked[["_sheet_row", "Feedback", "User Feedback/Remark", "Head", "Action By", "Sub Head"]].astype(object)
+        edited["Feedback"] = "done"
+        columns = column_map(engine.headers)
+
+        def write_back():
+            local = edited_values(edited, "01-01-2025 10:00:00 IST", with_timestamp=TIMESTAMP_COL_NAME in columns)
+            sheet.values_batch_update({"valueInputOption": "USER_ENTERED", "data": a1_ranges(local, columns)})
+
+        timed(f"write-back ({len(edited)} rows)", write_back)
+        after = categorize(timed("delta sync after write-back", engine.sync))
+        timed(f"search index update ({len(engine.changed):,} changed rows)",
+              lambda: index.updated(df, after, engine.changed))
+        timed("officer token index update", lambda: officers.updated(after["Inspection By"], engine.changed))
+        print(f"filtered {len(filtered):,} rows, search found {len(found):,}, export {len(data) / 2**20:.1f} MB, "
+              f"frame {frame_bytes(df) / 2**20:.0f} MB, delta fetched {engine.last_fetched:,} rows")
+
+
+if __name__ == "__main__":
+    what = sys.argv[1] if len(sys.argv) > 1 else "classify"
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    if what == "classify":
+        bench_classify(size or 100000)
+    elif what == "memory":
+        bench_memory(size or 200000)
+    elif what == "scale":
+        for n in ([size] if size else SCALE_SIZES):
+            bench_scale(n)
+    else:
+        sys.exit(f"unknown benchmark: {what}")
@@ -0,0 +1,132 @@
+# ---------- CHART RENDER CACHE ----------
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+from matplotlib import pyplot as plt
+
+
+def _label_wedges(ax, wedges, labels, fontsize):
+    """Boxed labels alternating left/right of the pie, joined to their wedge by a line."""
+    for i, (wedge, label) in enumerate(zip(wedges, labels)):
+        ang = (wedge.theta2 + wedge.theta1) / 2.0
+        x = np.cos(np.deg2rad(ang))
+        y = np.sin(np.deg2rad(ang))
+        place_right = (i % 2 == 0)
+        lx = 1.5 if place_right else -1.5
+        ly = 1.2 * y
+        ax.text(lx, ly, label,
+                ha="left" if place_right else "right",
+                va="center", fontsize=fontsize,
+                bbox=dict(facecolor="white", edgecolor="gray", alpha=0.7, pad=1))
+        ax.annotate("", xy=(0.9*x, 0.9*y), xytext=(lx, ly),
+                    arrowprops=dict(arrowstyle="-", lw=0.8, color="black"))
+
+
+def draw_head_pie(slices, caption):
+    """Department-wise pie; slices are (head, count) pairs."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    wedges, texts, autotexts = ax.pie(
+        [c for _, c in slices], startangle=90, autopct='%1.1f%%',
+        textprops=dict(color='black', fontsize=10)
+    )
+    _label_wedges(ax, wedges, [f"{h} ({c})" for h, c in slices], fontsize=10)
+    fig.suptitle("Department-wise Breakdown", fontsize=14, fontweight="bold")
+    fig.text(0.5, 0.02, caption, ha='center', fontsize=9, color='gray')
+    plt.tight_layout(rect=[0, 0.06, 1, 0.94])
+    return fig
+
+
+def draw_subhead_pie(slices, table_rows, total, caption, filter_caption=None):
+    """Sub head pie next to the full count table; slices are (sub head, count) pairs."""
+    fig, axes = plt.subplots(1, 2, figsize=(16, 8))
+    wedges, texts, autotexts = axes[0].pie(
+        [c for _, c in slices], startangle=90, autopct='%1.1f%%',
+        textprops=dict(color='black', fontsize=8)
+    )
+    _label_wedges(axes[0], wedges, [f"{s} ({c})" for s, c in slices], fontsize=8)
+    table_data = [["Sub Head", "Count"]] + [list(r) for r in table_rows] + [["Total", total]]
+    axes[1].axis('off')
+    tbl = axes[1].table(cellText=table_data, loc='center')
+    tbl.auto_set_font_size(False)
+    tbl.set_fontsize(10)
+    tbl.scale(1, 1.5)
+    fig.suptitle("Sub Head Breakdown", fontsize=14, fontweight="bold")
+    fig.text(0.5, 0.02 + 0.015, caption, ha='center', fontsize=9, color='gray')
+    if filter_caption:
+        fig.text(0.5, 0.02, filter_caption, ha='center', fontsize=9, color='black', fontweight='bold')
+    plt.tight_layout(rect=[0, 0.06, 1, 0.94])
+    return fig
+
+
+def png_bytes(fig, dpi):
+    buf = BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+    return buf.getvalue()
+
+
+class ChartCache:
+    """Bounded LRU of rendered charts as [preview PNG, full-resolution PNG or None].
+
+    Keys are the chart's inputs (aggregated counts and caption text), so an
+    unchanged chart is never redrawn. ``render`` saves only the preview; the
+    full-resolution PNG is drawn by ``full`` when a download is requested and
+    kept with it. pyplot is not thread-safe, so drawing holds the lock.
+    """
+
+    def __init__(self, max_entries=64, preview_dpi=90, full_dpi=200):
+        self.max_entries = max_entries
+        self.preview_dpi = preview_dpi
+        self.full_dpi = full_dpi
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _draw(self, draw, dpi):
+        fig = draw()
+        try:
+            return png_bytes(fig, dpi)
+        finally:
+            plt.close(fig)
+
+    def _entry(self, key, draw):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = self.entries[key] = [self._draw(draw, self.preview_dpi), None]
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def render(self, key, draw):
+        """Preview PNG of the chart."""
+        with self.lock:
+            return self._entry(key, draw)[0]
+
+    def peek_full(self, key):
+        """Full-resolution PNG if it was already drawn, else None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry[1] if entry is not None else None
+
+    def full(self, key, draw):
+        """Full-resolution PNG of the chart, drawn on first request."""
+        with self.lock:
+            entry = self._entry(key, draw)
+            if entry[1] is None:
+                entry[1] = self._draw(draw, self.full_dpi)
+            return entry[1]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
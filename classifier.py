@@ -0,0 +1,205 @@
+# ---------- FEEDBACK CLASSIFIER ----------
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+RESOLVED_KW = [
+    "attended", "solved", "done", "completed", "confirmed by", "message given",
+    "tdc work completed", "replaced", "msg given", "msg sent", "counseled", "info shared",
+    "communicated", "sent successfully", "counselled", "gate will be closed soon",
+    "attending at the time", "handled", "resolved", "action taken", "spoken to", "warned",
+    "counselling", "hubli", "working normal", "met", "discussion held", "report sent",
+    "notified", "explained", "nil", "na", "tlc", "work completed", "acknowledged", "visited",
+    "briefed", "guided", "handover", "working properly", "checked found working", "supply restored", "This is not a deficiency.", "This is not a deficiency", "not a deficiency", "this is observation", "It is observation",
+    "updated by", "adv to", "counselled the staff", "complied", "checked and found",
+    "maintained", "for needful action", "provided at", "in working condition", "is working",
+    "found working", "equipment is working", "item is working", "as per plan", "putright", "put right", 'attend dt','attend dt.',
+    "operational feasibility", "will be provided", "will be supplied shortly", "advised to ubl", "updated"
+]
+
+PENDING_KW = [
+    "work is going on", "tdc given", "target date", "expected by", "likely by", "planned by",
+    "will be", "needful", "to be", "pending", "not done", "awaiting", "waiting", "yet to", "next time",
+    "follow up", "tdc.", "tdc", "t d c", "will attend", "will be attended", "scheduled", "reminder",
+    "to inform", "to counsel", "to submit", "to do", "to replace", "prior", "remains", "still",
+    "under process", "not yet", "to be done", "will ensure", "during next", "action will be taken", 'noted please tdc',
+    "will be supplied shortly", "not available", "not updated", "progress", "under progress",
+    "to arrange", "awaited", "material awaited", "approval awaited", "to procure", "yet pending",
+    "incomplete", "tentative", "ongoing", "in progress", "being done", "arranging", "waiting for",
+    "subject to", "awaiting approval", "awaiting material", "awaiting confirmation", "next schedule",
+    "planned for", "will arrange", "proposed date", "to complete", "to be completed",
+    "likely completion", "expected completion", "not received", "awaiting response"
+]
+
+
+def keyword_pattern(keywords):
+    """Compile keywords into one prefix-factored regex; a match means some keyword is a substring."""
+    trie = {}
+    for word in keywords:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # a keyword ends here, so the rest is optional
+        return f"(?:{body})?" if "" in node else body
+
+    return re.compile(build(trie))
+
+
+RESOLVED_RE = keyword_pattern(RESOLVED_KW)
+PENDING_RE = keyword_pattern(PENDING_KW)
+DATE_RE = re.compile(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b')
+MARK_RE = re.compile(r"[!#]")
+LAST_MARK_RE = re.compile(r"([!#])[^!#]*$")
+SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_str(text):
+    if not isinstance(text, str):
+        return ""
+    return SPACE_RE.sub(' ', text.lower()).strip()
+
+
+def _classify(text_normalized):
+    if not text_normalized:
+        return None
+    tdc = "tdc" in text_normalized
+    resolved = RESOLVED_RE.search(text_normalized) is not None
+    if tdc and resolved:
+        return "Resolved"
+    if PENDING_RE.search(text_normalized):
+        return "Pending"
+    if DATE_RE.search(text_normalized):
+        return "Pending" if tdc else "Resolved"
+    if resolved:
+        return "Resolved"
+    return None
+
+
+def classify_feedback(feedback, user_remark=""):
+    if isinstance(feedback, str) and feedback.strip() == "`":
+        return ""
+    fb = normalize_str(feedback)
+    rm = normalize_str(user_remark)
+    m = MARK_RE.findall(f"{fb} {rm}".strip())
+    if m:
+        return "Resolved" if m[-1] == "#" else "Pending"
+    a = _classify(fb)
+    b = _classify(rm)
+    if a == "Resolved" or b == "Resolved":
+        return "Resolved"
+    if a == "Pending" or b == "Pending":
+        return "Pending"
+    return "Pending"
+
+
+# ---------- BATCHED CLASSIFIER ----------
+def _last_mark(text):
+    m = LAST_MARK_RE.search(text)
+    return m.group(1) if m else ""
+
+
+def classify_feedback_series(feedback, remark=None):
+    """classify_feedback over whole Feedback / User Feedback/Remark columns in one pass.
+
+    Raw values are deduplicated first, so each distinct text is normalised and
+    matched against the compiled keyword patterns only once; the per-row
+    result is then assembled with array operations.
+    """
+    feedback = pd.Series(feedback, dtype=object)
+    n = len(feedback)
+    if remark is None:
+        remark = [""] * n
+    remark = pd.Series(remark, dtype=object)
+    if n == 0:
+        return pd.Series([], index=feedback.index, dtype=object)
+
+    raw_codes, raw = pd.factorize(np.concatenate([feedback.to_numpy(object), remark.to_numpy(object)]))
+    # missing values factorize to -1; they normalise to "" like any non-string
+    norm = np.array([normalize_str(v) for v in raw] + [""], dtype=object)
+    codes, texts = pd.factorize(norm)
+    codes = codes[raw_codes]
+
+    label = np.array([_classify(t) for t in texts], dtype=object)
+    mark = np.array([_last_mark(t) for t in texts], dtype=object)
+    a, b = label[codes[:n]], label[codes[n:]]
+    mark_rm = mark[codes[n:]]
+    last_mark = np.where(mark_rm != "", mark_rm, mark[codes[:n]])
+
+    out = np.where((a == "Resolved") | (b == "Resolved"), "Resolved", "Pending").astype(object)
+    out[last_mark == "!"] = "Pending"
+    out[last_mark == "#"] = "Resolved"
+    # normalising only ever yields "`" from a stripped backtick
+    out[texts[codes[:n]] == "`"] = ""
+    return pd.Series(out, index=feedback.index, dtype=object)
+
+
+# ---------- STATUS CACHE ----------
+def content_keys(feedback, remark):
+    """64-bit hash per (Feedback, User Feedback/Remark) pair.
+
+    Non-strings classify exactly like "" so they are hashed as "", which also
+    keeps NaN from colliding with the text "nan".
+    """
+    pair = pd.DataFrame({"f": pd.Series(feedback, dtype=object).to_numpy(),
+                         "r": pd.Series(remark, dtype=object).to_numpy()})
+    for col in pair.columns:
+        is_str = pair[col].map(lambda x: isinstance(x, str)).astype(bool)
+        pair[col] = pair[col].where(is_str, "")
+    return pd.util.hash_pandas_object(pair, index=False).to_numpy()
+
+
+class StatusCache:
+    """Bounded LRU of Status labels keyed by content_keys; only unseen pairs are classified."""
+
+    def __init__(self, max_entries=250000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def classify(self, feedback, remark):
+        feedback = pd.Series(feedback, dtype=object)
+        remark = pd.Series(remark, dtype=object)
+        keys = content_keys(feedback, remark).tolist()
+        labels = np.empty(len(keys), dtype=object)
+        missing = []
+        with self.lock:
+            entries = self.entries
+            for i, k in enumerate(keys):
+                label = entries.get(k)
+                if label is None:
+                    missing.append(i)
+                else:
+                    labels[i] = label
+                    entries.move_to_end(k)
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            fresh = classify_feedback_series(feedback.iloc[missing], remark.iloc[missing]).to_numpy()
+            labels[missing] = fresh
+            with self.lock:
+                for i, label in zip(missing, fresh):
+                    self.entries[keys[i]] = label
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return pd.Series(labels, index=feedback.index, dtype=object)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,216 @@
+# ---------- SHARED DATASET ----------
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+
+class Dataset:
+    """One immutable, versioned snapshot of the inspection sheet shared by every session.
+
+    Never mutate ``df`` in place; derive new frames or publish a new version.
+    ``memo`` caches structures derived from this version (indexes, maps, ...).
+    """
+
+    def __init__(self, df, version=0, synced_at=None, source="sheet"):
+        self.df = df
+        self.version = version
+        self.synced_at = synced_at if synced_at is not None else time.time()
+        # last time the sheet confirmed this content; "snapshot" versions come from disk
+        self.checked_at = self.synced_at
+        self.source = source
+        self._memo = {}
+        self._memo_lock = threading.Lock()
+
+    def memo(self, name, build):
+        if name not in self._memo:
+            with self._memo_lock:
+                if name not in self._memo:
+                    self._memo[name] = build(self.df)
+        return self._memo[name]
+
+    def peek(self, name):
+        """The memoised structure if it was already built, else None."""
+        return self._memo.get(name)
+
+    def seed(self, name, value):
+        """Provide a structure derived elsewhere (e.g. from the previous version)."""
+        with self._memo_lock:
+            self._memo.setdefault(name, value)
+
+    def row_index(self):
+        """Sheet row number -> position lookup for this version."""
+        return self.memo("row_index", lambda df: pd.Index(df["_sheet_row"]) if "_sheet_row" in df.columns else pd.Index([]))
+
+
+class DatasetStore:
+    """Holds the current Dataset; ``publish`` swaps in a new version atomically."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # held across sync + publish so per-sync changes line up with consecutive versions
+        self.refresh_lock = threading.Lock()
+        self.current = Dataset(pd.DataFrame(), version=0)
+        self._source = None
+
+    def publish(self, df, prepare=None, synced_at=None, source="sheet"):
+        with self.lock:
+            if df is self._source and source == self.current.source:
+                self.current.checked_at = time.time()
+                return self.current
+            prepared = prepare(df) if prepare is not None else df
+            self._source = df
+            self.current = Dataset(prepared, version=self.current.version + 1, synced_at=synced_at, source=source)
+            return self.current
+
+
+# ---------- FRAME HELPERS ----------
+def patch_series(series, positions, values):
+    """Copy of series with values written at positions; categoricals grow new categories first."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        new = pd.Index(pd.unique(pd.Series(values, dtype=object).dropna()))
+        new = new.difference(series.cat.categories)
+        if len(new):
+            series = series.cat.add_categories(new)
+    series = series.copy()
+    series.iloc[positions] = values
+    return series
+
+
+def differs(series, positions, values):
+    """True when writing values at positions would change series (missing equals missing)."""
+    old = pd.Series(series.iloc[positions].to_numpy())
+    new = pd.Series(values)
+    if len(old) != len(new):
+        return True
+    return not (old.eq(new) | (old.isna() & new.isna())).all()
+
+
+def concat_frames(top, bottom):
+    """Row-wise concat that keeps categorical columns categorical (union of categories)."""
+    if top.empty:
+        return bottom.reset_index(drop=True)
+    bottom = bottom.copy(deep=False)
+    top = top.copy(deep=False)
+    for col in top.columns:
+        if col in bottom.columns and isinstance(top[col].dtype, pd.CategoricalDtype):
+            other = bottom[col]
+            extra = pd.Index(pd.unique(other.astype(object).dropna())).difference(top[col].cat.categories)
+            categories = top[col].cat.categories.append(extra)
+            top[col] = top[col].cat.set_categories(categories)
+            bottom[col] = pd.Categorical(other.astype(object), categories=categories)
+    return pd.concat([top, bottom], ignore_index=True)
+
+
+# ---------- SESSION OVERLAY ----------
+def record_overlay(overlay, sheet_row, values, submission=None):
+    """Remember an edit; a queued one (``submission`` set) is kept until its write is settled."""
+    at = time.time() if submission is None else float("inf")
+    overlay[int(sheet_row)] = {"values": dict(values), "at": at, "submission": submission}
+
+
+def record_overlays(overlay, edits, submission=None):
+    """``record_overlay`` for a whole submit: {sheet row: values} in one update."""
+    at = time.time() if submission is None else float("inf")
+    overlay.update({int(r): {"values": dict(values), "at": at, "submission": submission} for r, values in edits.items()})
+
+
+def settle_overlay(overlay, submission, written_at=None):
+    """Stamp a queued submission's rows with the time it reached the sheet, or drop them if it failed."""
+    for r in [r for r, e in overlay.items() if e.get("submission") == submission]:
+        if written_at is None:
+            del overlay[r]
+        else:
+            overlay[r]["at"] = written_at
+            overlay[r]["submission"] = None
+
+
+def prune_overlay(overlay, dataset):
+    """Drop edits already contained in a dataset version published after they were written."""
+    for r in [r for r, e in overlay.items() if e["at"] < dataset.synced_at]:
+        del overlay[r]
+
+
+def with_overlay(dataset, overlay):
+    """Return the shared frame with this session's edits applied.
+
+    Without edits the shared frame itself is returned. Otherwise only the
+    edited columns are copied; every other column stays shared.
+    """
+    df = dataset.df
+    if not overlay or df.empty:
+        return df
+    rows = list(overlay)
+    pos = dataset.row_index().get_indexer(rows)
+    keep = pos >= 0
+    if not keep.any():
+        return df
+    out = df.copy(deep=False)
+    cols = {c for r, ok in zip(rows, keep) if ok for c in overlay[r]["values"]}
+    for col in cols:
+        if col not in out.columns:
+            continue
+        hits = [(p, overlay[r]["values"][col]) for r, p, ok in zip(rows, pos, keep) if ok and col in overlay[r]["values"]]
+        out[col] = patch_series(out[col], [p for p, _ in hits], [v for _, v in hits])
+    return out
+
+
+def overlay_rows(dataset, overlay):
+    """Positions of overlaid rows in the shared frame."""
+    if not overlay:
+        return []
+    pos = dataset.row_index().get_indexer(list(overlay))
+    return [p for p in pos if p >= 0]
+
+
+# ---------- MEMORY REPORT ----------
+def frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum()) if isinstance(df, pd.DataFrame) else 0
+
+
+def object_bytes(obj, _seen=None):
+    """Rough deep size of session-state values (frames counted with pandas)."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return frame_bytes(obj) if isinstance(obj, pd.DataFrame) else int(obj.memory_usage(deep=True))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(object_bytes(k, seen) + object_bytes(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(object_bytes(v, seen) for v in obj)
+    return size
+
+
+def process_rss():
+    """Current resident set size in bytes (Linux /proc), falling back to peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:
+            return 0
+
+
+class SessionRegistry:
+    """Tracks recently active session ids so RSS can be divided per session."""
+
+    def __init__(self, idle_after=900):
+        self.idle_after = idle_after
+        self.seen = {}
+        self.lock = threading.Lock()
+
+    def touch(self, session_id):
+        now = time.time()
+        with self.lock:
+            self.seen[session_id] = now
+            for sid in [s for s, t in self.seen.items() if now - t > self.idle_after]:
+                del self.seen[sid]
+            return len(self.seen)
@@ -0,0 +1,100 @@
+# ---------- EXCEL EXPORT ----------
+import datetime as dt
+from io import BytesIO
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+from openpyxl.utils import get_column_letter
+
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_THIN = Side(style="thin")
+_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+_WRAP = Alignment(wrap_text=True, vertical="top")
+
+
+def _style(name, **kwargs):
+    return NamedStyle(name=name, border=_BORDER, alignment=_WRAP, **kwargs)
+
+
+STYLES = {
+    "header": _style("export_header", font=Font(bold=True)),
+    "text": _style("export_text"),
+    "date": _style("export_date", number_format="DD-MM-YYYY"),
+}
+STATUS_FONTS = {"pending": Font(color="FF0000"), "resolved": Font(color="008000")}
+# long free text: the only plain columns that need a cell style, for wrapping
+WRAP_COLS = ("Deficiencies Noted", "Feedback", "User Feedback/Remark")
+
+
+def frame_fingerprint(df):
+    """Cheap content hash used to tell whether a prepared export is still current."""
+    if df.empty:
+        return (tuple(df.columns), 0)
+    return (tuple(df.columns), len(df), int(pd.util.hash_pandas_object(df.astype(object), index=True).sum()))
+
+
+def column_widths(df, cap=50):
+    """Width per column: longest rendered value or header + 2, capped at ``cap``."""
+    widths = []
+    for col in df.columns:
+        values = df[col].dropna()
+        longest = values.astype(str).str.len().max() if len(values) else 0
+        longest = max(int(longest or 0), len(str(col)))
+        widths.append(longest + 2 if longest < cap else cap)
+    return widths
+
+
+def _plain_values(series):
+    """Column as Python values with missing ones as None (object dtype turns numpy scalars into Python ones)."""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def build_excel(df, sheet_name, date_cols=("Date of Inspection",), status_col="Status", wrap_cols=WRAP_COLS):
+    """Render df as a formatted .xlsx in one streaming pass and return the bytes.
+
+    A write-only workbook streams rows as they are produced. Most cells are
+    plain values; only the header, date columns (number format) and
+    ``wrap_cols`` carry a named style. Borders and the status colours are
+    conditional formats over the written range, so they cost nothing per cell.
+    """
+    wb = Workbook(write_only=True)
+    for style in STYLES.values():
+        wb.add_named_style(style)
+    ws = wb.create_sheet(sheet_name)
+    for i, width in enumerate(column_widths(df), start=1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+
+    def cell(value, style):
+        c = WriteOnlyCell(ws, value=value)
+        c.style = style
+        return c
+
+    if len(df.columns):
+        last = f"{get_column_letter(len(df.columns))}{len(df) + 1}"
+        ws.conditional_formatting.add(f"A1:{last}", FormulaRule(formula=["TRUE"], border=_BORDER))
+        if status_col in df.columns and len(df):
+            letter = get_column_letter(df.columns.get_loc(status_col) + 1)
+            for label, font in STATUS_FONTS.items():
+                ws.conditional_formatting.add(f"{letter}2:{letter}{len(df) + 1}", FormulaRule(
+                    formula=[f'LOWER(TRIM({letter}2))="{label}"'], font=font))
+
+    ws.append([cell(str(col), "export_header") for col in df.columns])
+    columns = []
+    for col in df.columns:
+        values = _plain_values(df[col])
+        if col in date_cols:
+            columns.append([cell(v.date() if isinstance(v, dt.datetime) else v, "export_date") for v in values])
+        elif col in wrap_cols:
+            columns.append([cell(v, "export_text") for v in values])
+        else:
+            columns.append(values)
+    for row in zip(*columns):
+        ws.append(row)
+
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
@@ -0,0 +1,288 @@
+# ---------- DATASET INDEXES ----------
+import bisect
+import itertools
+import re
+
+import numpy as np
+import pandas as pd
+
+
+class TokenIndex:
+    """Token -> row positions for a comma-separated column such as "Inspection By".
+
+    Tokens are the raw ``str(cell).split(",")`` parts, exactly what the filter
+    compares against, so "Sr.DSO,DRM/SUR" is indexed under "Sr.DSO" and "DRM/SUR".
+    Built once; ``updated`` carries it to the next version through only the
+    rows a sync changed or appended.
+    """
+
+    def __init__(self, values, postings=None):
+        self.size = len(values)
+        if postings is not None:
+            self.postings = postings
+            return
+        parts = pd.Series(values, dtype=object).astype(str).str.split(",").tolist()
+        lengths = np.fromiter((len(p) for p in parts), dtype=np.int64, count=self.size)
+        rows = np.repeat(np.arange(self.size, dtype=np.int64), lengths)
+        codes, tokens = pd.factorize(np.fromiter(itertools.chain.from_iterable(parts), dtype=object, count=int(lengths.sum())))
+        order = np.argsort(codes, kind="stable")
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(tokens)))])
+        rows = rows[order]
+        self.postings = {tok: rows[bounds[i]:bounds[i + 1]] for i, tok in enumerate(tokens)}
+
+    def updated(self, values, changed):
+        """Index for the next version's values, given the positions whose rows changed or were appended."""
+        changed = np.unique(np.asarray(changed, dtype=np.int64))
+        if len(values) < self.size:
+            return TokenIndex(values)
+        drop = np.zeros(len(values), dtype=bool)
+        drop[changed] = True
+        postings = {tok: rows[~drop[rows]] for tok, rows in self.postings.items()}
+        fresh = TokenIndex(pd.Series(values, dtype=object).iloc[changed])
+        for tok, rows in fresh.postings.items():
+            postings[tok] = _merge_rows(postings.get(tok, rows[:0]), changed[rows])
+        return TokenIndex(values, postings)
+
+    def postings_for(self, selected):
+        # selections are stripped, cell parts are not, as in the original filter
+        return [self.postings[t] for t in {s.strip() for s in selected} if t in self.postings]
+
+    def mask(self, selected):
+        """Boolean array over the indexed rows: the union of the selected tokens' postings."""
+        out = np.zeros(self.size, dtype=bool)
+        for rows in self.postings_for(selected):
+            out[rows] = True
+        return out
+
+
+def _merge_rows(rows, new):
+    """Sorted union of two sorted, disjoint position arrays."""
+    return np.insert(rows, np.searchsorted(rows, new), new)
+
+
+def token_mask(values, selected):
+    """Vectorised fallback: True where any stripped selection is one of the cell's comma parts."""
+    wanted = {s.strip() for s in selected}
+    exploded = pd.Series(values, dtype=object).astype(str).str.split(",").explode()
+    return exploded.isin(wanted).groupby(level=0, sort=False).any().reindex(values.index, fill_value=False)
+
+
+# ---------- DATE INDEX ----------
+class DateIndex:
+    """Row positions sorted by inspection date, so a date range is a ``searchsorted`` slice.
+
+    The frame itself keeps sheet order (row positions are what the sync, the
+    overlay and the indexes above refer to); ``order`` is the date-sorted
+    permutation of the dated rows, ties kept in row order. ``updated`` moves
+    only the rows a sync changed or appended.
+    """
+
+    def __init__(self, dates, order=None):
+        self.dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+        if order is None:
+            dated = np.flatnonzero(~np.isnat(self.dates))
+            order = dated[np.argsort(self.dates[dated], kind="stable")]
+        self.order = order
+        self.sorted = self.dates[order]
+
+    @property
+    def first(self):
+        return pd.Timestamp(self.sorted[0]) if len(self.sorted) else None
+
+    @property
+    def last(self):
+        return pd.Timestamp(self.sorted[-1]) if len(self.sorted) else None
+
+    def positions(self, start=None, end=None, inclusive=True):
+        """Positions with start <= date <= end (date < end when not inclusive), in date order."""
+        a = 0 if start is None else np.searchsorted(self.sorted, np.datetime64(pd.Timestamp(start)), side="left")
+        if end is None:
+            b = len(self.sorted)
+        else:
+            b = np.searchsorted(self.sorted, np.datetime64(pd.Timestamp(end)), side="right" if inclusive else "left")
+        return self.order[a:b]
+
+    def updated(self, dates, changed):
+        """Index for the next version's dates, given the positions whose rows changed or were appended."""
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+        changed = np.unique(np.asarray(changed, dtype=np.int64))
+        if len(dates) < len(self.dates):
+            return DateIndex(dates)
+        keep = self.order[~np.isin(self.order, changed)]
+        kept = self.dates[keep]
+        fresh = changed[~np.isnat(dates[changed])]
+        fresh = fresh[np.lexsort((fresh, dates[fresh]))]
+        lo = np.searchsorted(kept, dates[fresh], side="left")
+        hi = np.searchsorted(kept, dates[fresh], side="right")
+        # equal dates stay in row order
+        at = [a + np.searchsorted(keep[a:b], p) for a, b, p in zip(lo, hi, fresh)]
+        return DateIndex(dates, order=np.insert(keep, at, fresh))
+
+
+# ---------- TEXT SEARCH ----------
+WORD_RE = re.compile(r"\w+")
+
+
+def display_text(series):
+    """Column values as the editor shows them: dates as YYYY-MM-DD, newlines as spaces."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime("%Y-%m-%d").fillna("NaT")
+    return series.astype(str).str.replace("\n", " ")
+
+
+def _factorize_text(series):
+    """(codes, distinct display strings) without rendering every cell; missing values get their own code."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(np.int64), series.cat.categories.astype(str)
+    else:
+        codes, uniques = pd.factorize(series)
+        uniques = display_text(pd.Series(uniques, dtype=series.dtype))
+    missing = "NaT" if pd.api.types.is_datetime64_any_dtype(series) else "nan"
+    codes = np.where(codes < 0, len(uniques), codes)
+    return codes, list(uniques) + [missing]
+
+
+def _expand_ranges(starts, lengths):
+    """Concatenate arange(start, start + length) for every pair, without a Python loop."""
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + (np.arange(total) - offsets)
+
+
+class SearchIndex:
+    """Inverted word index (lower-cased \\w+ tokens -> row positions) over the editor's text columns.
+
+    Built once; ``updated`` carries it to the next version by re-tokenising
+    only the rows a sync changed or appended. Each distinct cell value is
+    tokenised once. A query token matches vocabulary terms containing it
+    (substring mode) or starting with it (prefix mode); a row is a candidate
+    when every query token matches one of its terms. Candidates are a
+    superset of the rows containing the query, so callers verify only those rows.
+    """
+
+    def __init__(self, df, columns, postings=None):
+        self.size = len(df)
+        self.columns = columns
+        if postings is None:
+            postings = self._build(df, columns)
+        self.terms = sorted(postings)
+        self.postings = [postings[t] for t in self.terms]
+        # all terms in one string so substring lookups run in C: offset -> term via bisect
+        self._joined = "\n".join(self.terms)
+        self._offsets = list(itertools.accumulate((len(t) + 1 for t in self.terms), initial=0))
+
+    @staticmethod
+    def _build(df, columns):
+        """{term: sorted row positions} over df."""
+        vocab = {}
+        token_ids, rows = [], []
+        for col in columns:
+            if col not in df.columns:
+                continue
+            codes, uniques = _factorize_text(df[col])
+            order = np.argsort(codes, kind="stable")
+            counts = np.bincount(codes, minlength=len(uniques))
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            # categoricals list every category of the full column: tokenise only the values present
+            used = np.flatnonzero(counts)
+            per_value = [[vocab.setdefault(t, len(vocab)) for t in set(WORD_RE.findall(uniques[v].lower()))] for v in used]
+            value_ids = np.repeat(used, [len(t) for t in per_value])
+            flat = np.fromiter(itertools.chain.from_iterable(per_value), dtype=np.int64, count=len(value_ids))
+            token_ids.append(np.repeat(flat, counts[value_ids]))
+            rows.append(order[_expand_ranges(starts[value_ids], counts[value_ids])])
+        terms = sorted(vocab)
+        rank = np.empty(len(vocab), dtype=np.int64)
+        rank[[vocab[t] for t in terms]] = np.arange(len(terms))
+        codes = rank[np.concatenate(token_ids)] if token_ids else np.empty(0, dtype=np.int64)
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        order = np.lexsort((rows, codes))
+        codes, rows = codes[order], rows[order]
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+        codes, rows = codes[keep], rows[keep]
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(terms)))])
+        return {t: rows[bounds[i]:bounds[i + 1]] for i, t in enumerate(terms)}
+
+    def updated(self, old_df, df, changed):
+        """Index for df, the next version, given the previous frame and the positions that changed or were appended.
+
+        Only the terms of the changed rows' old and new values are touched.
+        """
+        changed = np.unique(np.asarray(changed, dtype=np.int64))
+        if len(df) < self.size:
+            return SearchIndex(df, self.columns)
+        gone = changed[changed < self.size]
+        drop = np.zeros(len(df), dtype=bool)
+        drop[gone] = True
+        postings = dict(zip(self.terms, self.postings))
+        for term in self._build(old_df.iloc[gone], self.columns):
+            rows = postings.get(term)
+            if rows is None:
+                continue
+            rows = rows[~drop[rows]]
+            if len(rows):
+                postings[term] = rows
+            else:
+                del postings[term]
+        for term, rows in self._build(df.iloc[changed], self.columns).items():
+            postings[term] = _merge_rows(postings.get(term, rows[:0]), changed[rows])
+        return SearchIndex(df, self.columns, postings)
+
+    def _terms_containing(self, token):
+        found, at = [], self._joined.find(token)
+        while at != -1:
+            i = bisect.bisect_right(self._offsets, at) - 1
+            found.append(i)
+            at = self._joined.find(token, self._offsets[i + 1])
+        return found
+
+    def _terms_starting(self, token):
+        lo = bisect.bisect_left(self.terms, token)
+        hi = bisect.bisect_left(self.terms, token + "\U0010ffff")
+        return range(lo, hi)
+
+    def candidates(self, query, prefix=False):
+        """Sorted candidate positions, or None when the query has no word characters."""
+        words = set(WORD_RE.findall(query.lower()))
+        if not words:
+            return None
+        result = None
+        for word in sorted(words, key=len, reverse=True):
+            ids = self._terms_starting(word) if prefix else self._terms_containing(word)
+            hits = [self.postings[i] for i in ids]
+            rows = np.unique(np.concatenate(hits)) if hits else np.empty(0, dtype=np.int64)
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+            if not len(result):
+                break
+        return result
+
+
+def text_match(frame, columns, query, prefix=False):
+    """Exact check on frame rows: literal substring, or every query word starting a word."""
+    text = [display_text(frame[c]).str.lower() for c in columns if c in frame.columns]
+    if not text:
+        return pd.Series(False, index=frame.index)
+    if not prefix:
+        hits = [t.str.contains(query.lower(), regex=False) for t in text]
+        return pd.concat(hits, axis=1).any(axis=1)
+    mask = pd.Series(True, index=frame.index)
+    for word in set(WORD_RE.findall(query.lower())):
+        pattern = re.compile(r"(?<!\w)" + re.escape(word))
+        mask &= pd.concat([t.str.contains(pattern) for t in text], axis=1).any(axis=1)
+    return mask
+
+
+def relevance(frame, columns, query, weights=None):
+    """Occurrences of the query words per row, weighted per column."""
+    weights = weights or {}
+    words = set(WORD_RE.findall(query.lower())) or {query.lower()}
+    score = pd.Series(0.0, index=frame.index)
+    for col in columns:
+        if col not in frame.columns:
+            continue
+        text = display_text(frame[col]).str.lower()
+        for word in words:
+            score += text.str.count(re.escape(word)) * weights.get(col, 1.0)
+    return score
@@ -0,0 +1,158 @@
+# ---------- INGEST ----------
+import re
+
+import numpy as np
+import pandas as pd
+
+from constants import STATION_LIST, HEAD_LIST, SUBHEAD_LIST, INSPECTION_BY_LIST, ACTION_BY_LIST, VALID_INSPECTIONS
+from locations import LOCATIONS
+
+STATUS_CATEGORIES = ["", "Pending", "Resolved"]
+
+# Closed lists the sheet's dropdowns come from. Their values get the first,
+# stable category codes; anything else seen in the sheet is appended after
+# them as an extra category, so free-typed values survive untouched.
+CATEGORY_DOMAINS = {
+    "Type of Inspection": [""] + VALID_INSPECTIONS,
+    "Location": [""] + LOCATIONS.names,
+    "Head": HEAD_LIST,
+    "Sub Head": [""] + [s for subs in SUBHEAD_LIST.values() for s in subs],
+    "Inspection By": INSPECTION_BY_LIST,
+    "Action By": ACTION_BY_LIST,
+    "Status": STATUS_CATEGORIES,
+}
+
+
+def as_category(values, domain):
+    values = pd.Series(values).astype(object)
+    known = list(dict.fromkeys(domain))
+    known_set = set(known)
+    extras = sorted((v for v in pd.unique(values.dropna()) if v not in known_set), key=str)
+    return pd.Categorical(values, categories=known + extras)
+
+
+def categorize(df):
+    """Dictionary-encode the closed-list columns of a parsed sheet frame (in place)."""
+    for col, domain in CATEGORY_DOMAINS.items():
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = as_category(df[col], domain)
+    return df
+
+
+# ---------- CANONICAL COLUMNS ----------
+# Tried in order after the format pinned from the sheet's first date.
+INSPECTION_DATE_FORMATS = ["%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y", "%Y-%m-%d %H:%M:%S", "%d-%m-%Y %H:%M:%S"]
+# What the write-back stamps into "Timestamp of Compliance"
+COMPLIANCE_FORMAT = "%d-%m-%Y %H:%M:%S IST"
+
+TEXT_COLS = ["Type of Inspection", "Location", "Head", "Sub Head", "Deficiencies Noted",
+             "Inspection By", "Action By", "Feedback", "User Feedback/Remark", "Timestamp of Compliance"]
+
+DEPT_MAP = {
+    "ENGINEERING": "ENGINEERING",
+    "ELECT/G": "ELECT/G", "ELECTG": "ELECT/G",
+    "ELECT/TRD": "ELECT/TRD",
+    "ELECT/TRO": "ELECT/TRO",
+    "OPTG": "OPTG", "OPERATING": "OPTG",
+    "SIGNAL & TELECOM": "SIGNAL & TELECOM",
+    "MECHANICAL": "MECHANICAL",
+    "COMMERCIAL": "COMMERCIAL",
+    "SECURITY": "SECURITY",
+    "PERSONNEL": "PERSONNEL",
+    "MEDICAL": "MEDICAL",
+    "FINANCE": "FINANCE",
+    "STORE": "STORE",
+}
+
+
+def clean_name(text):
+    if pd.isna(text):
+        return "UNKNOWN"
+    s = str(text).strip()
+    s = re.sub(r"[\*\-\_\'\"]", "", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return s.upper()
+
+
+STATIONS_NORM = {clean_name(x) for x in STATION_LIST}
+
+
+def map_distinct(values, fn):
+    """fn applied once per distinct value (per category for categoricals), as an aligned categorical."""
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values.astype(object))
+    # the extra last slot is what missing values (code -1) map to
+    mapped = np.array([fn(u) for u in uniques] + [fn(np.nan)], dtype=object)
+    new_codes, categories = pd.factorize(mapped)
+    return pd.Categorical.from_codes(new_codes[codes], categories=categories)
+
+
+def parse_dates(values, formats):
+    """Parse each distinct string with the first of ``formats`` that fits; blanks and misfits become NaT."""
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    codes, uniques = pd.factorize(values.astype(object).where(values.notna(), "").astype(str).str.strip())
+    parsed = pd.Series(pd.NaT, index=range(len(uniques)), dtype="datetime64[ns]")
+    todo = pd.Series(uniques != "", index=parsed.index)
+    for fmt in formats:
+        if not todo.any():
+            break
+        parsed[todo] = pd.to_datetime(pd.Series(uniques)[todo], format=fmt, errors="coerce")
+        todo &= parsed.isna()
+    lookup = np.append(parsed.to_numpy(), np.datetime64("NaT"))  # code -1 (missing) -> last slot
+    return pd.Series(lookup[codes], index=values.index, name=values.name)
+
+
+def flatten_newlines(values):
+    """Newlines replaced by spaces in text columns; categoricals are fixed per category."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories
+        flat = [c.replace("\n", " ") if isinstance(c, str) else c for c in categories]
+        if flat == list(categories):
+            return values
+        if len(set(flat)) == len(flat):
+            return values.cat.rename_categories(flat)  # codes (and domain order) unchanged
+        return map_distinct(values, lambda v: v.replace("\n", " ") if isinstance(v, str) else v)
+    if values.dtype == object and _has_newline(values):
+        return values.str.replace("\n", " ", regex=False)
+    return values
+
+
+def _has_newline(values):
+    try:
+        return "\n" in "".join(values)  # one C-level pass when every cell is a string
+    except TypeError:
+        return any(isinstance(v, str) and "\n" in v for v in values)
+
+
+def derived_columns(df):
+    """Standardised department/location, the station flag and the parsed compliance time."""
+    head_std = map_distinct(df["Head"], lambda h: DEPT_MAP.get(clean_name(h), "UNKNOWN"))
+    location = map_distinct(df["Location"], lambda x: clean_name(str(x)))
+    return pd.DataFrame({
+        "Head_std": head_std,
+        "Location_clean": location,
+        "Is_Station": np.asarray(location.isin(STATIONS_NORM)),
+        "Compliance At": parse_dates(df["Timestamp of Compliance"], [COMPLIANCE_FORMAT]).to_numpy()
+                         if "Timestamp of Compliance" in df.columns else pd.NaT,
+    }, index=df.index)
+
+
+def standardize(df):
+    """Add the derived columns to a parsed, categorized frame (in place)."""
+    for col, values in derived_columns(df).items():
+        df[col] = values
+    return df
+
+
+def ingest_frame(df):
+    """Everything done once per synced row: dictionary encoding, flat text, derived columns."""
+    df = categorize(df)
+    for col in TEXT_COLS:
+        if col in df.columns:
+            df[col] = flatten_newlines(df[col])
+    return standardize(df)
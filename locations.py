@@ -0,0 +1,72 @@
+# ---------- LOCATION MODEL ----------
+import numpy as np
+import pandas as pd
+
+from constants import STATION_LIST, GATE_LIST, FOOTPLATE_ROUTE_HIERARCHY
+
+
+class LocationModel:
+    """Every known location with an integer code, plus the footplate route links both ways.
+
+    ``members`` maps a route to its subsections, stations and gates;
+    ``routes_of`` answers the reverse question (which routes include this
+    location). Selecting a route selects everything it covers.
+    """
+
+    def __init__(self, stations, gates, hierarchy):
+        self.names = list(dict.fromkeys(
+            stations + gates + list(hierarchy) + [s for subs in hierarchy.values() for s in subs]
+        ))
+        self.code = {name: i for i, name in enumerate(self.names)}
+        station_set, gate_set = set(stations), set(gates)
+        self.kind = {
+            name: "route" if name in hierarchy else "station" if name in station_set
+            else "gate" if name in gate_set else "section"
+            for name in self.names
+        }
+        self.members = {route: tuple(dict.fromkeys(subs)) for route, subs in hierarchy.items()}
+        routes_of = {}
+        for route, subs in self.members.items():
+            for name in subs:
+                routes_of.setdefault(name, []).append(route)
+        self.routes_of = {name: tuple(routes) for name, routes in routes_of.items()}
+        # code -> codes selected along with it (itself, plus members for a route)
+        self._expansion = [
+            np.array([i] + [self.code[s] for s in self.members.get(name, ())], dtype=np.int64)
+            for i, name in enumerate(self.names)
+        ]
+
+    def expand(self, selected):
+        """Selected names plus everything the selected routes cover."""
+        out = set(selected)
+        for name in selected:
+            out.update(self.members.get(name, ()))
+        return out
+
+    def routes_including(self, name):
+        return list(self.routes_of.get(name, ()))
+
+    def codes_for(self, values):
+        """Integer code per value; -1 for anything outside the known lists."""
+        values = pd.Series(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            lookup = np.array([self.code.get(c, -1) for c in values.cat.categories] + [-1], dtype=np.int64)
+            return lookup[values.cat.codes.to_numpy()]  # missing values have code -1 -> the final -1
+        codes, uniques = pd.factorize(values)
+        lookup = np.array([self.code.get(u, -1) for u in uniques] + [-1], dtype=np.int64)
+        return lookup[codes]
+
+    def mask(self, values, selected):
+        """Boolean array: value is a selected location or covered by a selected route."""
+        wanted = np.zeros(len(self.names) + 1, dtype=bool)  # last slot answers code -1
+        for name in selected:
+            if name in self.code:
+                wanted[self._expansion[self.code[name]]] = True
+        out = wanted[self.codes_for(values)]
+        unknown = [name for name in selected if name not in self.code]
+        if unknown:
+            out |= pd.Series(values).isin(unknown).to_numpy()
+        return out
+
+
+LOCATIONS = LocationModel(STATION_LIST, GATE_LIST, FOOTPLATE_ROUTE_HIERARCHY)
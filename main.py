@@ -3,20 +3,42 @@ import streamlit as st
 import pandas as pd
 import gspread
 from google.oauth2.service_account import Credentials
-from io import BytesIO
-from matplotlib import pyplot as plt
 import altair as alt
-import re
 import numpy as np
-from openpyxl.styles import Alignment, Font, Border, Side, NamedStyle
 from pandas.api.types import is_categorical_dtype, is_numeric_dtype, is_datetime64_any_dtype
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
 from st_aggrid.shared import JsCode
 import pytz
+import os
+import time
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from datetime import datetime, date, timedelta
+from constants import (ALL_LOCATIONS, HEAD_LIST, SUBHEAD_LIST, INSPECTION_BY_LIST, ACTION_BY_LIST, VALID_INSPECTIONS)
+from sync import SheetSync, REQUIRED_COLS, TIMESTAMP_COL_NAME
+from ingest import categorize, standardize, derived_columns, ingest_frame, STATIONS_NORM
+from export import build_excel, frame_fingerprint, EXCEL_MIME
+from charts import ChartCache, draw_head_pie, draw_subhead_pie
+from writeback import (EDIT_COLS, REMARK_HASH_COL, column_map, edited_values, remark_hash, feedback_changes,
+                       WriteQueue)
+from snapshot import SNAPSHOT_PATH, save_snapshot, load_snapshot
+from backend import LocalSheet, LocalWorkbook, LOCAL_SHEET_ENV
+from partitions import PartitionedSync
+from refresher import Refresher, REFRESH_SECONDS
+from acks import AckStore, ACK_DB_PATH, LEGACY_XLSX
+from locations import LOCATIONS
+from planner import FilterPlan
+from paging import PAGE_SIZES, SHEET_ORDER, sort_positions, page_bounds, PageEdits
+from analytics import (AnalyticsCube, analytics_keys, monthly_trend, locations_in,
+                       total_by, status_by)
+from classifier import StatusCache
+from indexes import TokenIndex, token_mask, SearchIndex, DateIndex, text_match, relevance
+from tracing import TRACER
+from dataset import (DatasetStore, SessionRegistry, record_overlays, settle_overlay, prune_overlay, with_overlay,
+                     overlay_rows, patch_series, frame_bytes, object_bytes, process_rss)
 
 # ---------- CONFIG ----------
 st.set_page_config(page_title="Inspection App", layout="wide")
+run_started = time.perf_counter()
 
 # ---------- SESSION STATE INITIALIZATION ----------
 if "logged_in" not in st.session_state:
@@ -25,8 +47,20 @@ if "user" not in st.session_state:
     st.session_state.user = {}
 if "ack_done" not in st.session_state:
     st.session_state.ack_done = False
-if "df" not in st.session_state:
-    st.session_state.df = None
+if "overlay" not in st.session_state:
+    st.session_state.overlay = {}
+if "submissions" not in st.session_state:
+    st.session_state.submissions = []
+if "page_edits" not in st.session_state:
+    st.session_state.page_edits = PageEdits()
+
+# Only the selected view's widgets are rendered, and Streamlit forgets the
+# state of widgets that were not rendered; writing it back keeps the
+# filters and grid settings across view switches.
+PERSISTED_WIDGETS = ("view_", "analytics_range", "grid_", "search_", "filter_", "case_", "date_", "range_",
+                     "column_select_filter", "max_cols_filter")
+for key in [k for k in st.session_state if str(k).startswith(PERSISTED_WIDGETS)]:
+    st.session_state[key] = st.session_state[key]
 
 # ---------- LOGIN ----------
 def login(email, password):
@@ -36,6 +70,10 @@ def login(email, password):
             return user
     return None
 
+def is_admin(user):
+    """Admins are the users listed with role = "admin" in st.secrets['users']"""
+    return str(user.get("role", "")).lower() == "admin"
+
 if not st.session_state.logged_in:
     st.title("🔐 Login to S.A.R.A.L (Safety Abnormality Report & Action List)")
     with st.form("login_form", clear_on_submit=True):
@@ -53,17 +91,42 @@ if not st.session_state.logged_in:
                 st.error("❌ Invalid email or password.")
     st.stop()
 
+# ---------- EXCEL EXPORT ----------
+def chart_download(chart_key, draw, label, file_name, key):
+    """Draw the full-resolution PNG only on request; later runs serve it from the chart cache."""
+    full = get_chart_cache().peek_full(chart_key)
+    if full is None:
+        if not st.button(f"⚙️ Prepare PNG: {file_name}", key=f"{key}_prepare"):
+            return
+        with st.spinner("Preparing PNG..."), TRACER.span(f"chart download: {file_name}"):
+            full = get_chart_cache().full(chart_key, draw)
+    st.download_button(label, data=full, file_name=file_name, mime="image/png", key=f"{key}_download")
+
+def excel_download(frame, sheet_name, label, file_name, key):
+    """Build the workbook only on request; the download button then serves the cached bytes."""
+    fingerprint = frame_fingerprint(frame)
+    cached = st.session_state.get(key)
+    if cached is not None and cached[0] != fingerprint:
+        del st.session_state[key]
+        cached = None
+    if cached is None:
+        if not st.button(f"⚙️ Prepare Excel: {sheet_name}", key=f"{key}_prepare"):
+            return
+        with st.spinner("Preparing Excel..."), TRACER.span(f"export: {sheet_name}", rows=len(frame)):
+            cached = (fingerprint, build_excel(frame, sheet_name))
+        st.session_state[key] = cached
+    st.download_button(label, data=cached[1], file_name=file_name, mime=EXCEL_MIME, key=f"{key}_download")
+
 # ---------- ACKNOWLEDGMENT ----------
-user_id = st.session_state.user["email"]  # use email as unique ID
+@st.cache_resource
+def get_ack_store():
+    return AckStore(ACK_DB_PATH, legacy_xlsx=LEGACY_XLSX)
 
-try:
-    ack_df = pd.read_excel("responses.xlsx")
-    if "UserID" not in ack_df.columns or "Name" not in ack_df.columns:
-        ack_df = pd.DataFrame(columns=["UserID", "Name"])
-except FileNotFoundError:
-    ack_df = pd.DataFrame(columns=["UserID", "Name"])
+ack_store = get_ack_store()
+user_id = st.session_state.user["email"]  # use email as unique ID
 
-user_ack_done = user_id in ack_df["UserID"].values
+with TRACER.span("ack: lookup"):
+    user_ack_done = ack_store.has(user_id)
 
 if not user_ack_done:
     st.title("📢 Pending Deficiencies Compliance")
@@ -77,9 +140,8 @@ if not user_ack_done:
             ack_submitted = st.form_submit_button("Submit Acknowledgment")
             if ack_submitted:
                 if responder_name.strip():
-                    new_entry = {"UserID": user_id, "Name": responder_name.strip()}
-                    ack_df = pd.concat([ack_df, pd.DataFrame([new_entry])], ignore_index=True)
-                    ack_df.to_excel("responses.xlsx", index=False)
+                    with TRACER.span("ack: append"):
+                        ack_store.append(user_id, responder_name.strip())
                     st.success(f"✅ Thank you, {responder_name}, for acknowledging.")
                     st.rerun()
                 else:
@@ -87,25 +149,35 @@ if not user_ack_done:
     st.stop()
 
 # ---------- DISPLAY ALL RESPONSES ----------
-st.markdown("### 📝 Responses Received")
-
-try:
-    ack_df = pd.read_excel("responses.xlsx")
+@st.fragment
+def responses_panel():
+    st.markdown("### 📝 Responses Received")
+    ack_store = get_ack_store()
+    with TRACER.span("ack: read all"):
+        ack_df = ack_store.frame()
     if not ack_df.empty:
         st.dataframe(ack_df, use_container_width=True, hide_index=True)
+        excel_download(ack_df, "Responses", "📥 Export Responses to Excel", "responses.xlsx", key="export_responses")
     else:
         st.info("No responses submitted yet.")
-except FileNotFoundError:
-    st.info("No responses submitted yet.")
 
-if st.button("🗑️ Clear All Responses", key="clear_responses_btn"):
-    df = pd.DataFrame(columns=["UserID", "Name"])
-    df.to_excel("responses.xlsx", index=False)
-    st.success("✅ All responses have been cleared.")
+    if st.button("🗑️ Clear All Responses", key="clear_responses_btn"):
+        with TRACER.span("ack: clear"):
+            ack_store.clear()
+        st.success("✅ All responses have been cleared.")
+
+responses_panel()
 
 # ---------- GOOGLE SHEETS CONNECTION ----------
 @st.cache_resource
+@TRACER.traced("connect_to_gsheet")
 def connect_to_gsheet():
+    local_file = os.environ.get(LOCAL_SHEET_ENV)
+    if local_file:
+        if os.path.isdir(local_file):
+            # one CSV per worksheet partition
+            return LocalWorkbook(local_file).worksheet(st.secrets.get("google_sheets", {}).get("sheet_name", "Sheet1"))
+        return LocalSheet(local_file)  # file-backed stand-in, no credentials needed
     SCOPES = [
         "https://www.googleapis.com/auth/spreadsheets",
         "https://www.googleapis.com/auth/drive",
@@ -119,8 +191,13 @@ def connect_to_gsheet():
     SHEET_NAME = st.secrets["google_sheets"]["sheet_name"]
     return gc.open_by_key(SHEET_ID).worksheet(SHEET_NAME)
 
-sheet = connect_to_gsheet()
-st.sidebar.success("✅ Connected to Google Sheets!")
+try:
+    sheet = connect_to_gsheet()
+    st.sidebar.success("✅ Connected to Google Sheets!")
+except Exception as e:
+    # degraded mode: read from the last disk snapshot until Sheets answers again
+    sheet = None
+    st.sidebar.error(f"⚠️ Google Sheets unavailable: {str(e)}")
 
 # ---------- SIDEBAR ----------
 st.sidebar.markdown(f"👤 Logged in as: **{st.session_state.user['name']}**")
@@ -131,252 +208,128 @@ if st.sidebar.button("🚪 Logout"):
     st.session_state.user = {}
     st.rerun()
 
-# ---------- CONSTANT LISTS ----------
-STATION_LIST = list(dict.fromkeys([
-    'BRB', 'MLM', 'BGVN', 'JNTR', 'KEU', 'WSB', 'PPJ', 'JEUR', 'KEM', 'BLNI', 'DHS', 'KWV', 'WDS', 'MA', 'AAG',
-    'MKPT', 'MO', 'MVE', 'PK', 'BALE', "SUR", 'TKWD', 'HG', 'TLT', 'AKOR', 'NGS', 'BOT', 'DUD', 'KUI', 'GDGN', 'GUR',
-    'HHD', 'SVG', 'BBD', 'TJSP', 'KLBG', 'HQR', 'MR', 'SDB', 'WADI', 'ARAG', 'BLNK', 'SGRE', 'KVK', 'LNP', 'DLGN',
-    'JTRD', 'MSDG', 'JVA', 'WSD', 'SGLA', 'PVR', 'MLB', 'SEI', 'BTW', 'PJR', 'DRSV', 'YSI', 'KMRD', 'DKY', 'MRX',
-    'OSA', 'HGL', 'LUR', 'NTPC', 'MRJ', 'BHLI'
-]))
-
-GATE_LIST = list(dict.fromkeys([
-    'LC-19', 'LC-22', 'LC-25', 'LC-26', 'LC-27C', 'LC-28', 'LC-30', 'LC-31', 'LC-35', 'LC-37', 'LC-40', 'LC-41',
-    'LC-61', 'LC-66', 'LC-82', 'LC-1', 'LC-60',  'LC-91', 'LC-22', 'LC-24', 'LC-49', 'LC-70', 'LC-10', 'LC-34', 'LC-36', 'LC-47', 'LC-55', 'LC-59', 'LC-2', 'LC-4', 'LC-42', 'LC-2',
-    'LC-04', 'LC-67', 'LC-77', 'LC-75', 'LC-64', 'LC-65', 'LC-5', 'LC-57', 'LC-62', 'LC-39', 
-    'LC-6', 'LC-3', 'LC-21'
-]))
-
-FOOTPLATE_ROUTE_HIERARCHY = {
-    "SUR-DD": ["SUR-KWV", "KWV-DD", "BRB-DD", 'PPJ-WSB', 'SUR-BGVN', 'SUR-MA', 'SUR-PUNE', 'SUR', 'BALE', 'PK', 'MVE', 'MO', 'MKPT','WKA', 'ANG', 'MA', 'WDS', 'KWV', 'KEM', 'DHS', 'BLNI', 'JEUR', 'PPJ', 'WSB', 'KEU', 'JNTR', 'BGVN', 'MLM', 'BRB', 'DD', 'LC-40', 'LC-42','LC-21', 'LC-19' ],
-    "SUR-WADI": ["SUR-KLBG", "SDB-WADI", "KLBG-WADI", "BOT-DUD", "DUD-WADI", "SUR-TKWD", 'BBD-KLBG', 'SUR-DUD', 'SUR-SDB', 'SUR', 'TKWD', 'HG', 'TLT', 'AKOR', 'NGS', 'BOT', 'GUR', 'GDGN', 'KUI', 'DUD', 'HDD', 'SVG', 'BBD', 'TJSP', 'KLBG', 'HQR', 'MR', 'SDB', 'WADI', 'LC-1', 'LC-60','LC-61','LC-66','LC-74','LC-82','LC-91'],
-    "LUR-KWV": ["BTW-KWV", "DRSV-KWV", 'SEI-KWV', 'SEI', 'BTW', 'PJR', 'DRSV', 'YSI', 'KMRD', 'DKY', 'MRX', 'OSA', 'HGL', 'LUR' ],
-    "KWV-MRJ": ["KWV-PVR", 'DLGN-KVK', 'DLGN-PVR', 'PVR-MRJ', 'ARAG', 'BLNK', 'SGRE', 'KVK', 'LNP', 'DLGN','JTRD', 'MSDG', 'JVA', 'WSD', 'SGLA', 'PVR', 'MLB'],
-    "DD-SUR": ["JEUR-KWV", "BGVN-JNTR", 'BGVN-JNTR', 'DD-KWV', 'KWV-SUR', 'SUR', 'BALE', 'PK', 'MVE', 'MO', 'MKPT','WKA', 'ANG', 'MA', 'WDS', 'KWV', 'KEM', 'DHS', 'BLNI', 'JEUR', 'PPJ', 'WSB', 'KEU', 'JNTR', 'BGVN', 'MLM', 'BRB', 'DD'],
-    "WADI-SUR": ["WADI-KLBG", "KLBG-SUR", "DUD-HG", 'BOT-NGS', 'WADI-SDB', 'SUR','TKWD', 'HG', 'TLT', 'AKOR', 'NGS', 'BOT', 'GUR', 'GDGN', 'KUI', 'DUD', 'HDD', 'SVG', 'BBD', 'KLBG', 'HQR', 'MR', 'SDB', 'WADI'],
-    "KWV-LUR": ["KWV-BTW", 'DRSV-LUR', 'SEI', 'BTW', 'PJR', 'DRSV', 'YSI', 'KMRD', 'DKY', 'MRX', 'OSA', 'HGL', 'LUR', 'LC-10', 'LC-34', 'LC-36', 'LC-39', 'LC-47', 'LC-55', 'LC-59'],
-    "MRJ-KWV": ["PVR-KWV", "SGLA-PVR", 'SGRE-KVK', 'ARAG', 'BLNK', 'SGRE', 'KVK', 'LNP', 'DLGN','JTRD', 'MSDG', 'JVA', 'WSD', 'SGLA', 'PVR', 'MLB', 'LC-22', 'LC-24', 'LC-31', 'LC-49', 'LC-70'],
-}
-
-FOOTPLATE_ROUTES = list(FOOTPLATE_ROUTE_HIERARCHY.keys())
-ALL_FOOTPLATE_LOCATIONS = FOOTPLATE_ROUTES + [sub for subs in FOOTPLATE_ROUTE_HIERARCHY.values() for sub in subs]
-ALL_LOCATIONS = STATION_LIST + GATE_LIST + ALL_FOOTPLATE_LOCATIONS
-
-HEAD_LIST = ["", "ELECT/TRD", "ELECT/G", "ELECT/TRO", "SIGNAL & TELECOM", "OPTG", "MECHANICAL",
-             "ENGINEERING", "COMMERCIAL", 'PERSONNEL', 'SECURITY', "FINANCE", "MEDICAL", "STORE"]
-
-SUBHEAD_LIST = {
-    "ELECT/TRD": ["T/W WAGON", "TSS/SP/SSP", "OHE SECTION", "OHE STATION", "MISC"],
-    "ELECT/G": ["TL/AC COACH", "POWER/PANTRY CAR", "WIRING/EQUIPMENT", "UPS", "AC", "DG", "SOLAR LIGHT", "MISC", 'LIGHT/ILLUMINATION'],
-    "ELECT/TRO": ["LOCO DEFECTS", "RUNNING ROOM DEFICIENCIES", "LOBBY DEFICIENCIES", "LRD RELATED", "PERSONAL STORE", "PR RELATED",
-                  "CMS", "FSD","MISC"],
-    "MECHANICAL": ['C&W RELATED', "DEMU RELATED", "VANDE BHARAT RELATED", "MISC", 'MECHANICAL RELATED', 'HABD'],
-    "SIGNAL & TELECOM": ["S&T ASSETS", 'WALKIE-TALKIE/PHONE', 'VDU/BPAC/BLOCK INST./PANEL', 'PASSENGER AMENITIES', 'SIGNAL RELATED', 'P&C', 'TRACK CIRCUIT', 'RELAY ROOM', 'MISC'],
-    "OPTG": ["SWR/CSR/CSL/TWRD", "STATION RECORDS", "STATION DEFICIENCIES", "TRAIN O/P RELATED", "LC GATE DEFICIENCIES", "CIRCULAR/KNOWLEDGE/STAFF", "SIGNAL EXCHANGE", 'WALKIE-TALKIE/PHONE',
-             "SM OFFICE DEFICIENCIES/ASSETS", "MISC"],
-    "ENGINEERING": ["IOW WORKS (Other)", "IOW WORKS (Safety Related)", "PWI (Track Related)", 'LC GATE DEFICIENCIES', 'P&C', 'WORKSITE'],
-    "COMMERCIAL": ["REQUIREMENT/ASSETS", "CLEANLINESS/COAL BAGS", "PASSENGER AMENITIES", "STAFF (RAILWAY/CONTRACT)", "MISC"],
-    "FINANCE": ["MISC"], "MEDICAL": ["MISC"], "STORE": ["MISC"],
-}
-
-INSPECTION_BY_LIST = [""] + ["HQ OFFICER CCE/CR", 'DRM/SUR', 'ADRM', 'Sr.DSO', 'Sr.DOM', 'Sr.DEN/S', 'Sr.DEN/C', 'Sr.DEN/Co', 'Sr.DSTE',
-                             'Sr.DEE/TRD', 'Sr.DEE/G', 'Sr.DEE/TRO', 'Sr.DME', 'Sr.DCM', 'Sr.DPO', 'Sr.DFM', 'Sr.DMM', 'DSC',
-                             'DME','DEE/TRD', 'DFM', 'DSTE/HQ', 'DSTE/KLBG', 'ADEN/T/SUR', 'ADEN/W/SUR', 'ADEN/KWV',
-                             'ADEN/PVR', 'ADEN/LUR', 'ADEN/KLBG', 'ADSTE/SUR', 'ADSTE/I/KWV', 'ADSTE/II/KWV',
-                             'ADME/SUR', 'AOM/GD', 'AOM/GEN', 'ACM/Cog', 'ACM/TC', 'ACM/GD', 'APO/GEN', 'APO/WEL',
-                             'ADFM/I', 'ADFMII', 'ASC', 'ADSO/SUR', "ADME/WADI", 'DEN/TRACK']
-
-ACTION_BY_LIST = [""] + ['DRM/SUR', 'ADRM', 'Sr.DSO', 'Sr.DOM', 'Sr.DEN/S', 'Sr.DEN/C', 'Sr.DEN/Co', 'Sr.DSTE',
-                         'Sr.DEE/TRD', 'Sr.DEE/G', 'Sr.DEE/TRO', 'Sr.DME', 'Sr.DCM', 'Sr.DPO', 'Sr.DFM', 'Sr.DMM', 'DSC', 'CMS', 'ADEN/TM/SUR', 'DEN/TRACK', 'GSU']
-
-VALID_INSPECTIONS = [
-    "FOOTPLATE INSPECTION", "STATION INSPECTION", "LC GATE INSPECTION",
-    "COACHING DEPOT", "ON TRAIN", "SURPRISE/AMBUSH INSPECTION", "WORKSITE INSPECTION", "OTHER (UNUSUAL)",
-]
-
-TIMESTAMP_COL_NAME = "Timestamp of Compliance"
-
 # ---------- HELPERS ----------
-def normalize_str(text):
-    if not isinstance(text, str):
-        return ""
-    return re.sub(r'\s+', ' ', text.lower()).strip()
-
-def classify_feedback(feedback, user_remark=""):
-    if isinstance(feedback, str) and feedback.strip() == "`":
-        return ""
-
-    def _classify(text_normalized):
-        if not text_normalized:
-            return None
-        date_found = bool(re.search(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b', text_normalized))
-        resolved_kw = [
-            "attended", "solved", "done", "completed", "confirmed by", "message given",
-            "tdc work completed", "replaced", "msg given", "msg sent", "counseled", "info shared",
-            "communicated", "sent successfully", "counselled", "gate will be closed soon",
-            "attending at the time", "handled", "resolved", "action taken", "spoken to", "warned",
-            "counselling", "hubli", "working normal", "met", "discussion held", "report sent",
-            "notified", "explained", "nil", "na", "tlc", "work completed", "acknowledged", "visited",
-            "briefed", "guided", "handover", "working properly", "checked found working", "supply restored", "This is not a deficiency.", "This is not a deficiency", "not a deficiency", "this is observation", "It is observation",
-            "updated by", "adv to", "counselled the staff", "complied", "checked and found",
-            "maintained", "for needful action", "provided at", "in working condition", "is working",
-            "found working", "equipment is working", "item is working", "as per plan", "putright", "put right", 'attend dt','attend dt.',
-            "operational feasibility", "will be provided", "will be supplied shortly", "advised to ubl", "updated"
-        ]
-        pending_kw = [
-            "work is going on", "tdc given", "target date", "expected by", "likely by", "planned by",
-            "will be", "needful", "to be", "pending", "not done", "awaiting", "waiting", "yet to", "next time",
-            "follow up", "tdc.", "tdc", "t d c", "will attend", "will be attended", "scheduled", "reminder",
-            "to inform", "to counsel", "to submit", "to do", "to replace", "prior", "remains", "still",
-            "under process", "not yet", "to be done", "will ensure", "during next", "action will be taken", 'noted please tdc',
-            "will be supplied shortly", "not available", "not updated", "progress", "under progress",
-            "to arrange", "awaited", "material awaited", "approval awaited", "to procure", "yet pending",
-            "incomplete", "tentative", "ongoing", "in progress", "being done", "arranging", "waiting for",
-            "subject to", "awaiting approval", "awaiting material", "awaiting confirmation", "next schedule",
-            "planned for", "will arrange", "proposed date", "to complete", "to be completed",
-            "likely completion", "expected completion", "not received", "awaiting response"
-        ]
-        if "tdc" in text_normalized and any(k in text_normalized for k in resolved_kw):
-            return "Resolved"
-        if any(k in text_normalized for k in pending_kw):
-            return "Pending"
-        if date_found:
-            return "Pending" if "tdc" in text_normalized else "Resolved"
-        if any(k in text_normalized for k in resolved_kw):
-            return "Resolved"
-        return None
-
-    fb = normalize_str(feedback)
-    rm = normalize_str(user_remark)
-    m = re.findall(r"[!#]", f"{fb} {rm}".strip())
-    if m:
-        return "Resolved" if m[-1] == "#" else "Pending"
-    a = _classify(fb)
-    b = _classify(rm)
-    if a == "Resolved" or b == "Resolved":
-        return "Resolved"
-    if a == "Pending" or b == "Pending":
-        return "Pending"
-    return "Pending"
-
-def get_status(feedback, remark):
-    return classify_feedback(feedback, remark)
-
 def color_text_status(status):
     return "🔴 Pending" if status == "Pending" else ("🟢 Resolved" if status == "Resolved" else status)
 
 # ---------- GOOGLE SHEET UPDATE ----------
+@TRACER.traced("update_feedback_column")
 def update_feedback_column(edited_df):
-    header = sheet.row_values(1)
-   
-    def col_idx(name):
-        try:
-            return header.index(name) + 1
-        except ValueError:
-            st.warning(f"Column '{name}' not found in sheet header.")
-            return None
-
-    feedback_col = col_idx("Feedback")
-    remark_col = col_idx("User Feedback/Remark")
-    head_col = col_idx("Head")
-    action_col = col_idx("Action By")
-    subhead_col = col_idx("Sub Head")
-    timestamp_col = col_idx(TIMESTAMP_COL_NAME)
-
-    if None in (feedback_col, remark_col, head_col, action_col, subhead_col):
+    if sheet is None:
+        st.error("Cannot update: Google Sheets is unavailable right now. Please try again shortly.")
+        return
+    # each target worksheet has its own header; positions only change with a new data version
+    # (read from session state: this runs in a fragment)
+    engine = get_sync_engine()
+    if isinstance(engine, PartitionedSync):
+        titles = sorted({engine.locate(key)[0] for key in edited_df["_sheet_row"].astype(int)})
+    else:
+        titles = [None]
+    maps = [st.session_state.dataset.memo(f"sheet_columns:{title}", lambda df, title=title: sheet_columns(title))
+            for title in titles]
+    missing = sorted({name for columns in maps for name in EDIT_COLS if name not in columns})
+    with_timestamp = all(TIMESTAMP_COL_NAME in columns for columns in maps)
+    for name in missing + ([] if with_timestamp else [TIMESTAMP_COL_NAME]):
+        st.warning(f"Column '{name}' not found in sheet header.")
+    if missing:
         st.error("Cannot update: one or more required columns missing in Google Sheet.")
         return
 
-    updates = []
     ist = pytz.timezone('Asia/Kolkata')
+    timestamp_value = datetime.now(ist).strftime("%d-%m-%Y %H:%M:%S IST")
+    local = edited_values(edited_df, timestamp_value, with_timestamp=with_timestamp)
+
+    if local:
+        ctx = get_script_run_ctx()
+        sid = get_write_queue().submit(local, session_id=ctx.session_id if ctx else None)
+        st.session_state.submissions = (st.session_state.submissions + [sid])[-20:]
+        # shown to this session right away; kept until the write lands and a sync picks it up
+        record_overlays(st.session_state.overlay, local, submission=sid)
+
+# ---------- SEARCH ----------
+SEARCH_COLS = [
+    "Date of Inspection", "Type of Inspection", "Head", "Sub Head", "Location",
+    "Deficiencies Noted", "Inspection By", "Action By", "Feedback",
+    "User Feedback/Remark", "Timestamp of Compliance"
+]
 
-    for _, row in edited_df.iterrows():
-        r = int(row["_sheet_row"])
-        def a1(c): return gspread.utils.rowcol_to_a1(r, c)
-
-        fv = row.get("Feedback", "") or ""
-        rv = row.get("User Feedback/Remark", "") or ""
-        hv = row.get("Head", "") or ""
-        av = row.get("Action By", "") or ""
-        sv = row.get("Sub Head", "") or ""
-
-        timestamp_value = ""
-        if fv.strip():
-            now_ist = datetime.now(ist)
-            timestamp_value = now_ist.strftime("%d-%m-%Y %H:%M:%S IST")
-
-        updates.extend([
-            {"range": a1(feedback_col), "values": [[fv]]},
-            {"range": a1(remark_col), "values": [[rv]]},
-            {"range": a1(head_col), "values": [[hv]]},
-            {"range": a1(action_col), "values": [[av]]},
-            {"range": a1(subhead_col), "values": [[sv]]},
-            {"range": a1(timestamp_col), "values": [[timestamp_value]]},
-        ])
-
-        s = st.session_state.df
-        mask = s["_sheet_row"] == r
-        s.loc[mask, "Feedback"] = fv
-        s.loc[mask, "User Feedback/Remark"] = rv
-        s.loc[mask, "Head"] = hv
-        s.loc[mask, "Action By"] = av
-        s.loc[mask, "Sub Head"] = sv
-        if timestamp_col is not None:
-            s.loc[mask, TIMESTAMP_COL_NAME] = timestamp_value
-
-    if updates:
-        try:
-            sheet.spreadsheet.values_batch_update({
-                "valueInputOption": "USER_ENTERED",
-                "data": updates
-            })
-            st.success(f"Updated {len(updates)//6} record(s) including timestamps.")
-        except Exception as e:
-            st.error(f"Google Sheets update failed: {str(e)}")
+# frames smaller than this share of the dataset are scanned directly instead of through an index
+INDEX_MIN_SHARE = 0.1
+
+def search_rows(frame, cols, query, prefix=False, ranked=False):
+    """Rows of frame matching the global search, found through the per-version word index."""
+    base = dataset.df
+    candidates = None
+    if base.index.equals(pd.RangeIndex(len(base))) and len(frame) >= INDEX_MIN_SHARE * len(base):
+        index = dataset.memo("search", lambda df: SearchIndex(df, SEARCH_COLS))
+        candidates = index.candidates(query, prefix=prefix)
+    if candidates is not None:
+        # this session's own edits are not in the shared index
+        keep = np.union1d(candidates, overlay_rows(dataset, st.session_state.overlay))
+        frame = frame[frame.index.isin(keep)]
+    out = frame[text_match(frame, cols, query, prefix=prefix)].copy()
+    if ranked and not out.empty:
+        score = relevance(out, cols, query, weights={"Deficiencies Noted": 2.0})
+        out = out.loc[score.sort_values(ascending=False, kind="stable").index]
+    return out
 
 # ---------- FILTER WIDGETS ----------
-def apply_common_filters(df, prefix=""):
+def date_index(ds):
+    """Date-sorted row order of a dataset version, for searchsorted range queries."""
+    return ds.memo("dates", lambda df: DateIndex(df["Date of Inspection"] if "Date of Inspection" in df.columns else []))
+
+OFFICER_COLS = ["Inspection By", "Action By"]
+
+def officer_mask(frame, col, selected):
+    """Rows of frame whose comma-separated officer column holds any selected officer."""
+    base = dataset.df
+    if not base.index.equals(pd.RangeIndex(len(base))) or len(frame) < INDEX_MIN_SHARE * len(base):
+        return token_mask(frame[col], selected)
+    index = dataset.memo(f"tokens:{col}", lambda df: TokenIndex(df[col]))
+    mask = pd.Series(index.mask(selected)[frame.index.to_numpy()], index=frame.index)
+    # this session's own edits are not in the shared index
+    edited = frame.index.intersection(overlay_rows(dataset, st.session_state.overlay))
+    if len(edited):
+        mask.loc[edited] = token_mask(frame.loc[edited, col], selected)
+    return mask
+
+def add_common_filters(plan, prefix=""):
     default_to_date = date.today()
     default_from_date = default_to_date - timedelta(days=2)
+    # initial values go through session state only: the widgets' state is written back every run
+    st.session_state.setdefault(prefix + "from_date", default_from_date)
+    st.session_state.setdefault(prefix + "to_date", default_to_date)
    
     with st.expander("🔍 Apply Additional Filters", expanded=True):
         c1, c2 = st.columns(2)
         c1.multiselect(
             "Inspection By", INSPECTION_BY_LIST[1:],
-            default=st.session_state.get(prefix + "insp", []),
             key=prefix + "insp"
         )
         c2.multiselect(
             "Action By", ACTION_BY_LIST[1:],
-            default=st.session_state.get(prefix + "action", []),
             key=prefix + "action"
         )
       
         d1, d2 = st.columns(2)
         d1.date_input(
             "📅 From Date",
-            value=st.session_state.get(prefix + "from_date", default_from_date),
             key=prefix + "from_date"
         )
         d2.date_input(
             "📅 To Date",
-            value=st.session_state.get(prefix + "to_date", default_to_date),
             key=prefix + "to_date"
         )
    
-    out = df.copy()
-   
+    df = plan.df
+
     if st.session_state.get(prefix + "insp"):
         sel = st.session_state[prefix + "insp"]
-        out = out[out["Inspection By"].apply(
-            lambda x: any(s.strip() in str(x).split(",") for s in sel)
-        )]
+        plan.add("Inspection By", lambda pos, sel=sel: officer_mask(df["Inspection By"].iloc[pos].to_frame(), "Inspection By", sel).to_numpy())
    
     if st.session_state.get(prefix + "action"):
         sel = st.session_state[prefix + "action"]
-        out = out[out["Action By"].apply(
-            lambda x: any(s.strip() in str(x).split(",") for s in sel)
-        )]
+        plan.add("Action By", lambda pos, sel=sel: officer_mask(df["Action By"].iloc[pos].to_frame(), "Action By", sel).to_numpy())
    
     if st.session_state.get(prefix + "from_date") and st.session_state.get(prefix + "to_date"):
         from_date = st.session_state[prefix + "from_date"]
@@ -385,13 +338,12 @@ def apply_common_filters(df, prefix=""):
         if from_date > to_date:
             st.warning("From Date cannot be after To Date. Adjusting filter.")
             from_date, to_date = to_date, from_date
+
+        # only the worksheet partitions overlapping the range are loaded
+        if load_partitions(pd.to_datetime(from_date), pd.to_datetime(to_date)):
+            st.rerun()
       
-        out = out[
-            (out["Date of Inspection"] >= pd.to_datetime(from_date)) &
-            (out["Date of Inspection"] <= pd.to_datetime(to_date))
-        ]
-   
-    return out
+        plan.date_range("From/To Date", pd.to_datetime(from_date), pd.to_datetime(to_date))
 
 # ---------- HEADER ----------
 st.markdown(
@@ -465,56 +417,544 @@ st.markdown(
 )
 
 # ---------- LOAD DATA ----------
-@st.cache_data(ttl=5)
-def load_data():
-    REQUIRED_COLS = [
-        "Date of Inspection", "Type of Inspection", "Location",
-        "Head", "Sub Head", "Deficiencies Noted",
-        "Inspection By", "Action By", "Feedback",
-        "User Feedback/Remark", "Timestamp of Compliance"
-    ]
-    try:
-        data = sheet.get_all_values()
-        if not data or len(data) < 2:
-            st.warning("No data found in Google Sheet. Returning empty DataFrame.")
-            return pd.DataFrame(columns=REQUIRED_COLS)
-        headers = [c.strip() for c in data[0]]
-        df = pd.DataFrame(data[1:], columns=headers)
-        for col in REQUIRED_COLS:
-            if col not in df.columns:
-                df[col] = ""
-        df["Date of Inspection"] = pd.to_datetime(df["Date of Inspection"], errors="coerce")
-        df["Location"] = df["Location"].astype(str).str.strip().str.upper()
-        df["_sheet_row"] = df.index + 2
-        return df
-    except Exception as e:
-        st.error(f"❌ Error loading Google Sheet: {str(e)}")
-        st.warning("Returning empty DataFrame to prevent crashes.")
-        return pd.DataFrame(columns=REQUIRED_COLS)
+def sheets_partitioned():
+    """Inspections also live in "<sheet_name> 2024" / "<sheet_name> 2024-Q3" tabs.
 
-if st.session_state.df is None:
-    st.session_state.df = load_data()
+    Set google_sheets.partitioned in the secrets; a local sheet directory always is.
+    """
+    local_file = os.environ.get(LOCAL_SHEET_ENV)
+    if local_file:
+        return os.path.isdir(local_file)
+    return bool(st.secrets["google_sheets"].get("partitioned", False))
 
-# ---------- MAIN TABS ----------
-tabs = st.tabs(["📝 View Records", "📊 Analytics"])
+@st.cache_resource
+def get_sync_engine():
+    # raising keeps an engine without a sheet out of the cache; the next run after Sheets is back builds it
+    if sheet is None:
+        raise RuntimeError("Google Sheets is unavailable")
+    if sheets_partitioned():
+        return PartitionedSync(sheet.spreadsheet, sheet.title, ingest=ingest_frame)
+    return SheetSync(sheet, ingest=ingest_frame)
 
-with tabs[0]:
-    df = st.session_state.df
-    if df is None or df.empty:
-        st.warning("No data available. Please check Google Sheets connection or refresh.")
-        st.stop()
+@st.cache_resource
+def get_dataset_store():
+    store = DatasetStore()
+    restored = load_snapshot(SNAPSHOT_PATH)
+    if restored is not None:
+        df, meta = restored
+        if sheet is not None:
+            engine = get_sync_engine()
+            engine.restore(df, meta)
+            if engine.df is None:
+                return store  # saved from another worksheet layout: start from the sheet
+            df = engine.df
+        else:
+            df = df.drop(columns=["_raw_key", "_raw_stamp"], errors="ignore")
+        store.publish(df, prepare=prepare_dataset, synced_at=meta.get("saved_at"), source="snapshot")
+    return store
+
+@st.cache_resource
+def get_session_registry():
+    return SessionRegistry()
+
+@st.cache_resource
+def get_status_cache():
+    return StatusCache()
+
+@st.cache_resource
+def get_chart_cache():
+    return ChartCache()
+
+def sheet_columns(title=None):
+    """{header: 1-based column} of one worksheet (the only one unless partitioned)."""
+    engine = get_sync_engine()
+    if isinstance(engine, PartitionedSync):
+        return column_map(engine.headers_for(title or engine.base))
+    return column_map(engine.headers or sheet.row_values(1))
+
+@st.cache_resource
+def get_write_queue():
+    engine = get_sync_engine()
+    return WriteQueue(sheet, columns=sheet_columns,
+                      locate=engine.locate if isinstance(engine, PartitionedSync) else None)
 
+def prepare_dataset(df, status_cache=None, previous=None, changed=None):
+    """Columns every tab needs, computed once per data version.
+
+    With the previous version's frame and the positions a delta sync changed
+    or appended, the other rows keep their Status by position.
+    """
+    if df.empty:
+        return df
+    df = df.copy(deep=False)
     for col in ["Type of Inspection", "Location", "Head", "Sub Head", "Deficiencies Noted",
                 "Inspection By", "Action By", "Feedback", "User Feedback/Remark"]:
         if col not in df.columns:
             df[col] = ""
-
-    df["Date of Inspection"] = pd.to_datetime(df["Date of Inspection"], errors="coerce")
     df["_original_sheet_index"] = df.index
-    df["Status"] = df.apply(lambda r: classify_feedback(r["Feedback"], r.get("User Feedback/Remark", "")), axis=1)
+    cache = status_cache or get_status_cache()
+    old = previous["Status"] if previous is not None and "Status" in previous.columns else None
+    with TRACER.span("classification") as span:
+        if old is None or changed is None or len(old) > len(df):
+            # only rows whose feedback text the cache has not seen reach the classifier
+            span["rows"] = len(df)
+            df["Status"] = cache.classify(df["Feedback"], df["User Feedback/Remark"])
+        else:
+            pos = np.union1d(np.asarray(changed, dtype=np.int64), np.arange(len(old), len(df)))
+            span["rows"] = len(pos)
+            status = np.empty(len(df), dtype=object)
+            status[:len(old)] = old.to_numpy(dtype=object)
+            status[pos] = cache.classify(df["Feedback"].iloc[pos], df["User Feedback/Remark"].iloc[pos]).to_numpy()
+            df["Status"] = pd.Series(status, index=df.index, dtype=object)
+    df = categorize(df)
+    return df if "Head_std" in df.columns else standardize(df)  # snapshots saved before derived columns
+
+def sync_and_publish(engine, store, status_cache, force_full=False):
+    """Pull the sheet, publish the result and snapshot it to disk when it changed."""
+    with store.refresh_lock:
+        previous = store.current
+        with TRACER.span("sheet sync", full=force_full) as span:
+            synced = engine.sync(force_full)
+            span["changed"] = None if engine.changed is None else len(engine.changed)
+        current = store.publish(synced, prepare=lambda df: prepare_dataset(df, status_cache, previous.df, engine.changed))
+        if current is not previous and engine.changed is not None:
+            # carry the date index and analytics cube forward through only the rows this sync touched
+            dates = previous.peek("dates")
+            if dates is not None:
+                dates = dates.updated(current.df["Date of Inspection"], engine.changed)
+                current.seed("dates", dates)
+            cube = previous.peek("analytics")
+            if cube is not None:
+                current.seed("analytics", cube.updated(current.df, engine.changed, dates))
+            search = previous.peek("search")
+            if search is not None:
+                current.seed("search", search.updated(previous.df, current.df, engine.changed))
+            for col in OFFICER_COLS:
+                tokens = previous.peek(f"tokens:{col}")
+                if tokens is not None:
+                    current.seed(f"tokens:{col}", tokens.updated(current.df[col], engine.changed))
+        if current is not previous:
+            save_snapshot(SNAPSHOT_PATH, *engine.snapshot_state())
+        return current
+
+@st.cache_resource
+def get_refresher():
+    # shared objects are resolved here: the refresher thread has no script context
+    engine, store, status_cache = get_sync_engine(), get_dataset_store(), get_status_cache()
+    interval = float(st.secrets.get("google_sheets", {}).get("refresh_seconds", REFRESH_SECONDS))
+    refresher = Refresher(TRACER.traced("background refresh")(lambda full: sync_and_publish(engine, store, status_cache, full)),
+                          interval=interval)
+    if store.current.source == "snapshot":
+        refresher.request()  # cold start from disk: catch up with the sheet right away
+    return refresher
+
+@TRACER.traced("load_data")
+def load_data():
+    """The newest published version; only the refresher thread reads the sheet."""
+    store = get_dataset_store()
+    if sheet is None:
+        if store.current.source == "snapshot":
+            return store.current
+        st.error("❌ Google Sheets is unavailable and no local snapshot exists yet.")
+        return store.publish(pd.DataFrame(columns=REQUIRED_COLS))
+    refresher = get_refresher()
+    if store.current.version == 0:
+        # nothing to show yet (no snapshot): every waiting session shares the first fetch
+        with st.spinner("🔄 Loading data from Google Sheets..."):
+            refresher.wait(refresher.request())
+        if store.current.version == 0:
+            st.error(f"❌ Error loading Google Sheet: {str(refresher.last_error)}")
+            st.warning("Returning empty DataFrame to prevent crashes.")
+            return store.publish(pd.DataFrame(columns=REQUIRED_COLS))
+    if store.current.df.empty:
+        st.warning("No data found in Google Sheet. Returning empty DataFrame.")
+    return store.current
+
+def load_partitions(lo, hi):
+    """Bring in the worksheet partitions a date range needs; True when this session's data moved on."""
+    if sheet is None:
+        return False
+    engine = get_sync_engine()
+    if not isinstance(engine, PartitionedSync) or not engine.require(lo, hi):
+        return False
+    refresher = get_refresher()
+    with st.spinner("📂 Loading inspections for the selected dates..."):
+        # a fetch already running may have started before these partitions were added
+        refresher.wait(refresher.request(fresh=True))
+    st.session_state.dataset = get_dataset_store().current
+    return True
+
+def session_frame(dataset):
+    """Shared data plus this session's own not-yet-synced edits."""
+    overlay = st.session_state.overlay
+    prune_overlay(overlay, dataset)
+    df = with_overlay(dataset, overlay)
+    positions = overlay_rows(dataset, overlay)
+    if positions:
+        status = df["Status"].copy()
+        status.iloc[positions] = get_status_cache().classify(
+            df["Feedback"].iloc[positions], df["User Feedback/Remark"].iloc[positions]
+        ).to_numpy()
+        df["Status"] = status
+        # derived columns follow the edited Head / compliance timestamp
+        derived = derived_columns(df.iloc[positions])
+        for col in derived.columns:
+            df[col] = patch_series(df[col], positions, derived[col].to_numpy())
+    return df
+
+# Each run moves the session onto the newest shared version, so old versions are only kept
+# alive by runs still using them; the overlay carries this session's unsynced edits across.
+# Fragment reruns keep the version of the last full run.
+if st.session_state.get("dataset") is None or sheet is not None:
+    st.session_state.dataset = load_data()
+if st.session_state.get("refresh_target") is not None and get_refresher().done(st.session_state.refresh_target):
+    st.session_state.refresh_target = None  # the refresh this session asked for landed
+    st.toast("✅ Data refreshed successfully!")
+dataset = st.session_state.dataset
+
+# Polls while a requested refresh is in flight, then reruns the page onto the new version
+@st.fragment(run_every=2)
+def refresh_watcher():
+    if get_refresher().done(st.session_state.refresh_target):
+        st.rerun()
+    st.caption("🔄 Fetching the latest data from Google Sheets in the background...")
+
+if st.session_state.get("refresh_target") is not None:
+    refresh_watcher()
+
+ist = pytz.timezone('Asia/Kolkata')
+as_of = datetime.fromtimestamp(dataset.checked_at, ist).strftime("%d-%m-%Y %H:%M:%S")
+if dataset.source == "snapshot":
+    state = "refreshing from Google Sheets..." if sheet is not None else "Google Sheets unreachable"
+    st.sidebar.warning(f"🕒 Data as of {as_of} (saved snapshot, {state})")
+else:
+    st.sidebar.caption(f"🕒 Data as of {as_of}")
+if sheet is not None and get_refresher().last_error is not None:
+    st.sidebar.warning(f"⚠️ Last background refresh failed: {str(get_refresher().last_error)[:200]}")
+if sheet is not None and isinstance(get_sync_engine(), PartitionedSync):
+    st.sidebar.caption(f"🗂️ Worksheets loaded: {', '.join(get_sync_engine().loaded()) or 'none'}")
+
+# ---------- SUBMISSION STATUS ----------
+SUBMISSION_ICONS = {"queued": "⏳", "retrying": "🔁", "written": "✅", "failed": "❌", "unknown": "❔"}
+
+if sheet is not None and st.session_state.submissions:
+    queue = get_write_queue()
+    with st.sidebar.expander(f"📨 My Submissions ({queue.backlog()} pending overall)"):
+        for sid in reversed(st.session_state.submissions):
+            info = queue.status(sid)
+            state = info["state"]
+            if state == "written":
+                settle_overlay(st.session_state.overlay, sid, info["written_at"])
+            elif state in ("failed", "unknown"):
+                settle_overlay(st.session_state.overlay, sid)
+            line = f"{SUBMISSION_ICONS.get(state, '❔')} {info.get('rows', '?')} record(s): {state}"
+            if state == "retrying":
+                line += f" (attempt {info['attempts']})"
+            st.caption(line)
+            if info.get("error") and state in ("retrying", "failed"):
+                st.caption(f"↳ {info['error'][:200]}")
+
+with st.sidebar.expander("🧠 Memory & Caches"):
+    ctx = get_script_run_ctx()
+    n_sessions = get_session_registry().touch(ctx.session_id if ctx else "local")
+    shared_mb = dataset.memo("bytes", frame_bytes) / 2**20
+    own_mb = object_bytes({k: st.session_state[k] for k in st.session_state if k != "dataset"}) / 2**20
+    rss_mb = process_rss() / 2**20
+    st.caption(f"Shared dataset v{dataset.version}: {shared_mb:.1f} MB (held once per process)")
+    st.caption(f"This session's own state: {own_mb:.2f} MB "
+               f"(a private copy of the data would add {shared_mb:.1f} MB per session)")
+    st.caption(f"Process RSS: {rss_mb:.0f} MB across {n_sessions} active session(s) "
+               f"≈ {rss_mb / max(n_sessions, 1):.0f} MB per session")
+    cache = get_status_cache().stats()
+    st.caption(f"Status cache: {cache['hit_rate']:.1%} hit rate "
+               f"({cache['hits']:,} hits / {cache['misses']:,} misses, {cache['entries']:,} entries)")
+    charts = get_chart_cache().stats()
+    st.caption(f"Chart cache: {charts['hit_rate']:.1%} hit rate "
+               f"({charts['hits']:,} hits / {charts['misses']:,} misses, {charts['entries']:,} charts)")
+
+# ---------- MAIN TABS ----------
+# Columns the View tab reads after filtering (metrics, charts, export, editor)
+VIEW_COLUMNS = [
+    "Date of Inspection", "Type of Inspection", "Location", "Head", "Sub Head",
+    "Deficiencies Noted", "Inspection By", "Action By", "Feedback", "User Feedback/Remark",
+    "Status", "Timestamp of Compliance", "Compliance At", "_original_sheet_index", "_sheet_row"
+]
+
+# Fragments rerun on their own without re-executing the script, so they read
+# their inputs from session state instead of taking arguments from the caller.
+@st.fragment
+def filtered_export():
+    filtered = st.session_state.view_filtered
+    export_df = filtered[[
+        "Date of Inspection", "Type of Inspection", "Location", "Head", "Sub Head",
+        "Deficiencies Noted", "Inspection By", "Action By", "Feedback", "User Feedback/Remark",
+        "Status", "Timestamp of Compliance"
+    ]]
+    excel_download(export_df, "Filtered Records", "📥 Export Filtered Records to Excel",
+                   "filtered_records.xlsx", key="export_filtered")
+
+@st.fragment
+def records_editor():
+    filtered = st.session_state.view_filtered
+    display_cols = [
+        "Date of Inspection", "Type of Inspection", "Head", "Sub Head", "Location",
+        "Deficiencies Noted", "Inspection By", "Action By", "Feedback",
+        "User Feedback/Remark", "Timestamp of Compliance"
+    ]
+    valid_cols = [col for col in display_cols if col in filtered.columns]
+    if not valid_cols:
+        st.error("⚠️ No valid columns found in the DataFrame.")
+        st.stop()
+    if "Deficiencies Noted" not in valid_cols:
+        st.error("⚠️ 'Deficiencies Noted' column is required for search functionality.")
+        st.stop()
+
+    editable_filtered = filtered
+
+    # Ensure stable ID columns
+    if "_original_sheet_index" not in editable_filtered.columns:
+        editable_filtered["_original_sheet_index"] = editable_filtered.index
+    if "_sheet_row" not in editable_filtered.columns:
+        editable_filtered["_sheet_row"] = editable_filtered.index + 2
+
+    # Create editable DataFrame
+    hidden_cols = [c for c in ["Compliance At", "_original_sheet_index", "_sheet_row"] if c in editable_filtered.columns]
+    editable_df = editable_filtered[valid_cols + hidden_cols].copy()
+
+    # Format Date of Inspection (parsed once at ingest)
+    if "Date of Inspection" in editable_df.columns:
+        editable_df["Date of Inspection"] = editable_df["Date of Inspection"].dt.date
+
+    # Add Status column
+    if "Feedback" in editable_df.columns and "User Feedback/Remark" in editable_df.columns:
+        editable_df.insert(
+            editable_df.columns.get_loc("User Feedback/Remark") + 1,
+            "Status",
+            get_status_cache().classify(editable_df["Feedback"], editable_df["User Feedback/Remark"])
+        )
+        editable_df["Status"] = editable_df["Status"].apply(color_text_status)
+
+    # Submit compares each row's remark against this hash instead of the original frame
+    if "User Feedback/Remark" in editable_df.columns:
+        editable_df[REMARK_HASH_COL] = remark_hash(editable_df["User Feedback/Remark"])
+        hidden_cols.append(REMARK_HASH_COL)
+
+    # Global Search
+    st.markdown("#### 🔍 Search and Filter")
+    search_text = st.text_input("Search All Columns (case-insensitive)", "").strip().lower()
+    s1, s2 = st.columns([2, 1])
+    search_mode = s1.radio("Match", ["Contains", "Word starts with"], horizontal=True, key="search_mode")
+    search_ranked = s2.checkbox("Rank by relevance", key="search_ranked")
+    if search_text:
+        editable_df = search_rows(editable_df, valid_cols, search_text,
+                                  prefix=search_mode == "Word starts with", ranked=search_ranked)
+        st.info(f"Found {len(editable_df)} matching rows after search.")
+
+    # Excel-like Column Filtering (FIXED: No more global variable)
+    # persisted widgets are seeded through session state, never with a widget default as well
+    st.session_state.setdefault("max_cols_filter", min(10, len(valid_cols)))
+    max_cols = st.slider(
+        "Max columns to filter on",
+        1, len(valid_cols),
+        key="max_cols_filter"
+    )
+    candidate_columns = valid_cols[:max_cols]
+    selected_columns = st.multiselect(
+        "Select columns to filter",
+        options=candidate_columns,
+        key="column_select_filter"
+    )
+
+    if selected_columns:
+        # Apply column-specific filters
+        df_filtered = editable_df.copy()
+        for column in selected_columns:
+            if is_categorical_dtype(editable_df[column]) or editable_df[column].dtype == "object":
+                unique_vals = sorted(editable_df[column].dropna().unique())
+                selected_vals = st.multiselect(
+                    f"Filter {column}",
+                    unique_vals,
+                    key=f"filter_{column}"
+                )
+                if selected_vals:
+                    df_filtered = df_filtered[df_filtered[column].isin(selected_vals)]
+            elif is_numeric_dtype(editable_df[column]):
+                _min = float(editable_df[column].min())
+                _max = float(editable_df[column].max())
+                step = (_max - _min) / 100 if _max != _min else 1
+                st.session_state.setdefault(f"range_{column}", (_min, _max))
+                selected_range = st.slider(
+                    f"Filter {column}",
+                    _min, _max, step=step,
+                    key=f"range_{column}"
+                )
+                df_filtered = df_filtered[df_filtered[column].between(selected_range[0], selected_range[1])]
+            elif is_datetime64_any_dtype(editable_df[column]):
+                _min = editable_df[column].min()
+                _max = editable_df[column].max()
+                st.session_state.setdefault(f"date_{column}", [_min, _max])
+                selected_dates = st.date_input(
+                    f"Filter {column}",
+                    min_value=_min,
+                    max_value=_max,
+                    key=f"date_{column}"
+                )
+                if len(selected_dates) == 2:
+                    df_filtered = df_filtered[df_filtered[column].between(
+                        pd.to_datetime(selected_dates[0]),
+                        pd.to_datetime(selected_dates[1])
+                    )]
+            else:
+                case = st.selectbox(
+                    f"Case sensitive for {column}?",
+                    ["both", "upper", "lower"],
+                    key=f"case_{column}"
+                )
+                search_term = st.text_input(f"Filter {column}", key=f"search_{column}")
+                if search_term:
+                    if case == "upper":
+                        df_filtered = df_filtered[df_filtered[column].str.upper().str.contains(search_term.upper(), na=False)]
+                    elif case == "lower":
+                        df_filtered = df_filtered[df_filtered[column].str.lower().str.contains(search_term.lower(), na=False)]
+                    else:
+                        df_filtered = df_filtered[df_filtered[column].str.contains(search_term, case=False, na=False)]
+
+        editable_df = df_filtered
+        st.info(f"Applied column filters → {len(editable_df)} rows remaining.")
+
+    # Paged mode sends only one page to the browser; sorting happens here, not in the grid
+    st.markdown("#### 🚈 Inspection Details")
+    g1, g2, g3, g4 = st.columns([1, 2, 1, 1])
+    grid_mode = g1.radio("Rows", ["Paged", "All rows"], horizontal=True, key="grid_mode")
+    paged = grid_mode == "Paged"
+    page_edits = st.session_state.page_edits
+    if paged:
+        sort_col = g2.selectbox("Sort by", [SHEET_ORDER] + valid_cols, key="grid_sort")
+        sort_desc = g2.checkbox("Descending", key="grid_sort_desc")
+        st.session_state.setdefault("grid_page_size", PAGE_SIZES[1])
+        page_size = g3.selectbox("Rows per page", PAGE_SIZES, key="grid_page_size")
+        _, _, page_count = page_bounds(len(editable_df), 1, page_size)
+        if st.session_state.get("grid_page", 1) > page_count:
+            st.session_state.grid_page = page_count
+        page = g4.number_input(f"Page (of {page_count})", 1, page_count, key="grid_page")
+        start, stop, _ = page_bounds(len(editable_df), page, page_size)
+        order = sort_positions(editable_df, None if sort_col == SHEET_ORDER else sort_col, sort_desc)
+        page_base = editable_df.iloc[order[start:stop]]
+        grid_df = page_edits.apply(page_base)
+        st.caption(f"Rows {start + 1:,}–{stop:,} of {len(editable_df):,}"
+                   + (f" · unsaved edits on page(s) {', '.join(map(str, page_edits.pages()))}" if len(page_edits) else ""))
+    else:
+        grid_df = editable_df
+
+    # AgGrid Configuration
+    gb = GridOptionsBuilder.from_dataframe(grid_df)
+    gb.configure_default_column(editable=False, wrapText=True, autoHeight=True, resizable=True,
+                                sortable=not paged)
+    if "User Feedback/Remark" in grid_df.columns:
+        gb.configure_column(
+            "User Feedback/Remark",
+            editable=True,
+            wrapText=True,
+            autoHeight=True,
+            cellEditor="agTextCellEditor",
+            cellEditorPopup=False,
+            cellEditorParams={"maxLength": 4000}
+        )
+    for col in hidden_cols:
+        gb.configure_column(col, hide=True)
+    gb.configure_grid_options(singleClickEdit=True)
+
+    auto_size_js = JsCode("""
+    function(params) {
+        let allColumnIds = [];
+        params.columnApi.getAllColumns().forEach(function(column) {
+            allColumnIds.push(column.getColId());
+        });
+        params.columnApi.autoSizeColumns(allColumnIds);
+    }
+    """)
+    gb.configure_grid_options(onFirstDataRendered=auto_size_js)
+    grid_options = gb.build()
+    # Render AgGrid
+    st.caption("Type your compliance in 'User Feedback/Remark' column. "
+               + ("Edits are kept while you change pages." if paged else "Use column headers to sort."))
+    with TRACER.span("editor grid", rows=len(grid_df)):
+        grid_response = AgGrid(
+            grid_df,
+            gridOptions=grid_options,
+            update_mode=GridUpdateMode.VALUE_CHANGED,
+            height=600,
+            allow_unsafe_jscode=True,
+            key=f"editor_{grid_mode}_{page}_{page_size}_{sort_col}_{sort_desc}" if paged else "editor_all"
+        )
+    if paged:
+        page_edits.record(page_base, pd.DataFrame(grid_response["data"]), page)
+        edited_df = page_edits.apply(editable_df)
+    else:
+        edited_df = pd.DataFrame(grid_response["data"])
+    # Download button for filtered/edited results as Excel
+    export_cols = [col for col in valid_cols if col not in ["_original_sheet_index", "_sheet_row"]] + ["Status"]
+    export_edited_df = edited_df[export_cols]
+    excel_download(export_edited_df, "Edited Records", "📥 Export Edited Records to Excel",
+                   f"edited_records_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                   key="export_edited")
+    # Buttons
+    c1, c2, c3 = st.columns([1, 1, 2])  # Extra space column for better alignment
+    submitted = c1.button("✅ Submit Feedback", use_container_width=True)
+    refresh_clicked = c2.button("🔄 Refresh Data", use_container_width=True)
+
+    if refresh_clicked:
+        if sheet is None:
+            st.error("Cannot refresh: Google Sheets is unavailable right now. Please try again shortly.")
+        else:
+            # a full reload that starts now: deltas never see cells edited in place outside
+            # the key/timestamp columns; the page switches to the new data when it lands
+            st.session_state.refresh_target = get_refresher().request(fresh=True, full=True)
+            st.rerun()
 
-    start_date = df["Date of Inspection"].min() if not df["Date of Inspection"].isna().all() else pd.Timestamp.today()
-    end_date = df["Date of Inspection"].max() if not df["Date of Inspection"].isna().all() else pd.Timestamp.today()
+    # Submit Feedback logic with protection against double submission
+    if submitted:
+        if st.session_state.get("feedback_submitting", False):
+            st.warning("⏳ Submission already in progress. Please wait...")
+        else:
+            st.session_state.feedback_submitting = True
+            try:
+                with st.spinner("💾 Queuing feedback for Google Sheet..."):
+                    need_cols = {"_original_sheet_index", "_sheet_row", "User Feedback/Remark", REMARK_HASH_COL}
+                    if not need_cols.issubset(edited_df.columns) or "Feedback" not in editable_filtered.columns:
+                        st.error("⚠️ Required columns are missing from the data.")
+                    else:
+                        # hash comparison finds the edited rows; remark -> Feedback and routing are column-wise
+                        diffs = feedback_changes(edited_df)
+                        if len(diffs):
+                            # Save to Google Sheet (also records this session's overlay)
+                            update_feedback_column(diffs)
+
+                            page_edits.discard(diffs["_sheet_row"].tolist())
+                            st.success(f"📨 Queued {len(diffs)} record(s) for the Google Sheet; "
+                                       "My Submissions in the sidebar shows when they are written.")
+                        else:
+                            st.info("ℹ️ No changes detected in the feedback.")
+            except Exception as e:
+                st.error(f"❌ Error during submission: {str(e)}")
+            finally:
+                st.session_state.feedback_submitting = False
+                #st.rerun()  # Refresh view to show updated Status and clean grid
+
+# Only the selected view runs; unlike tabs, the other one costs nothing on a rerun.
+VIEWS = ["📝 View Records", "📊 Analytics"]
+active_view = st.radio("View", VIEWS, horizontal=True, key="main_view", label_visibility="collapsed")
+main_area = st.container()
+
+def view_records():
+    df = session_frame(dataset)
+    if df is None or df.empty:
+        st.warning("No data available. Please check Google Sheets connection or refresh.")
+        st.stop()
+
+    view_dates = date_index(dataset)  # edits never touch dates, so this also fits the session frame
+    start_date = view_dates.first if view_dates.first is not None else pd.Timestamp.today()
+    end_date = view_dates.last if view_dates.last is not None else pd.Timestamp.today()
 
     c1, c2 = st.columns(2)
     c1.multiselect("Type of Inspection", VALID_INSPECTIONS, key="view_type_filter")
@@ -527,31 +967,33 @@ with tabs[0]:
 
     selected_status = st.selectbox("🔘 Status", ["All", "Pending", "Resolved"], key="view_status_filter")
 
-    filtered = df[(df["Date of Inspection"] >= start_date) & (df["Date of Inspection"] <= end_date)]
+    # All selections become stages of one mask; only the final rows and view columns are copied
+    plan = FilterPlan(df, dates=view_dates)
+    plan.date_range("Date range", start_date, end_date)
 
     if st.session_state.view_type_filter:
-        filtered = filtered[filtered["Type of Inspection"].isin(st.session_state.view_type_filter)]
+        plan.isin("Type of Inspection", "Type of Inspection", st.session_state.view_type_filter)
 
     if st.session_state.view_location_filter:
-        selected_locations = st.session_state.view_location_filter
-        all_selected_locations = set(selected_locations)
-        for loc in selected_locations:
-            if loc in FOOTPLATE_ROUTE_HIERARCHY:
-                all_selected_locations.update(FOOTPLATE_ROUTE_HIERARCHY[loc])
-        filtered = filtered[filtered["Location"].isin(all_selected_locations)]
+        # a route selects all its subsections, stations and gates
+        view_locations = st.session_state.view_location_filter
+        plan.add("Location", lambda pos: LOCATIONS.mask(df["Location"].iloc[pos], view_locations))
 
     if st.session_state.view_head_filter:
-        filtered = filtered[filtered["Head"].isin(st.session_state.view_head_filter)]
+        plan.isin("Head", "Head", st.session_state.view_head_filter)
 
     if st.session_state.view_sub_filter:
-        filtered = filtered[filtered["Sub Head"].isin(st.session_state.view_sub_filter)]
+        plan.isin("Sub Head", "Sub Head", st.session_state.view_sub_filter)
 
     if selected_status != "All":
-        filtered = filtered[filtered["Status"] == selected_status]
+        plan.isin("Status", "Status", [selected_status])
 
-    filtered = apply_common_filters(filtered, prefix="view_")
-    filtered = filtered.apply(lambda x: x.str.replace("\n", " ") if x.dtype == "object" else x)
-    filtered = filtered.sort_values("Date of Inspection")
+    add_common_filters(plan, prefix="view_")
+    filtered = plan.materialise(plan.run(), VIEW_COLUMNS, sort_by="Date of Inspection")
+    for stage, ms, rows in plan.timings:
+        TRACER.record(f"filter: {stage}", ms, rows=rows)
+    with st.expander("⏱️ Filter timings"):
+        st.dataframe(plan.timing_frame(), hide_index=True, use_container_width=True)
 
     col_a, col_b, col_c, col_d = st.columns(4)
     pending_count = (filtered["Status"] == "Pending").sum()
@@ -580,38 +1022,17 @@ with tabs[0]:
             if not minor.empty:
                 major = pd.concat([major, pd.DataFrame([{"Head": "Others", "Count": minor["Count"].sum()}])],
                                   ignore_index=True)
-            fig, ax = plt.subplots(figsize=(10, 6))
-            wedges, texts, autotexts = ax.pie(
-                major["Count"], startangle=90, autopct='%1.1f%%',
-                textprops=dict(color='black', fontsize=10)
-            )
-            for i, (wedge, (_, row)) in enumerate(zip(wedges, major.iterrows())):
-                ang = (wedge.theta2 + wedge.theta1) / 2.0
-                x = np.cos(np.deg2rad(ang))
-                y = np.sin(np.deg2rad(ang))
-                place_right = (i % 2 == 0)
-                lx = 1.5 if place_right else -1.5
-                ly = 1.2 * y
-                ax.text(lx, ly, f"{row['Head']} ({row['Count']})",
-                        ha="left" if place_right else "right",
-                        va="center", fontsize=10,
-                        bbox=dict(facecolor="white", edgecolor="gray", alpha=0.7, pad=1))
-                ax.annotate("", xy=(0.9*x, 0.9*y), xytext=(lx, ly),
-                            arrowprops=dict(arrowstyle="-", lw=0.8, color="black"))
-            fig.suptitle("Department-wise Breakdown", fontsize=14, fontweight="bold")
             dr = f"{start_date.strftime('%d-%m-%Y')} to {end_date.strftime('%d-%m-%Y')}"
             locations = ", ".join(st.session_state.view_location_filter)
             type_display = ", ".join(st.session_state.view_type_filter) if st.session_state.view_type_filter else "All Types"
-            fig.text(0.5, 0.02, f"Date Range: {dr} | Locations: {locations} | Type: {type_display}",
-                     ha='center', fontsize=9, color='gray')
-            plt.tight_layout(rect=[0, 0.06, 1, 0.94])
-            buf = BytesIO()
-            plt.savefig(buf, format="png", dpi=200, bbox_inches="tight")
-            buf.seek(0)
-            plt.close()
-            st.image(buf, use_column_width=True)
-            st.download_button("📥 Download Department-wise Distribution (PNG)", data=buf,
-                               file_name="head_distribution.png", mime="image/png")
+            caption = f"Date Range: {dr} | Locations: {locations} | Type: {type_display}"
+            slices = tuple(major.itertuples(index=False, name=None))
+            chart_key, draw = ("head", slices, caption), lambda: draw_head_pie(slices, caption)
+            with TRACER.span("chart: department pie"):
+                preview = get_chart_cache().render(chart_key, draw)
+            st.image(preview, use_column_width=True)
+            chart_download(chart_key, draw, "📥 Download Department-wise Distribution (PNG)",
+                           "head_distribution.png", key="head_png")
     # Sub Head Breakdown when Head is selected
     if st.session_state.view_head_filter and not filtered.empty:
         st.markdown("### Sub Head Distribution")
@@ -631,393 +1052,34 @@ with tabs[0]:
             if not minor.empty:
                 major = pd.concat([major, pd.DataFrame([{"Sub Head": "Others", "Count": minor["Count"].sum()}])],
                                   ignore_index=True)
-            fig, axes = plt.subplots(1, 2, figsize=(16, 8))
-            wedges, texts, autotexts = axes[0].pie(
-                major["Count"], startangle=90, autopct='%1.1f%%',
-                textprops=dict(color='black', fontsize=8)
-            )
-            for i, (wedge, (_, row)) in enumerate(zip(wedges, major.iterrows())):
-                ang = (wedge.theta2 + wedge.theta1) / 2.0
-                x = np.cos(np.deg2rad(ang))
-                y = np.sin(np.deg2rad(ang))
-                place_right = (i % 2 == 0)
-                lx = 1.5 if place_right else -1.5
-                ly = 1.2 * y
-                axes[0].text(lx, ly, f"{row['Sub Head']} ({row['Count']})",
-                             ha="left" if place_right else "right",
-                             va="center", fontsize=8,
-                             bbox=dict(facecolor="white", edgecolor="gray", alpha=0.7, pad=1))
-                axes[0].annotate("", xy=(0.9*x, 0.9*y), xytext=(lx, ly),
-                                 arrowprops=dict(arrowstyle="-", lw=0.8, color="black"))
-            table_data = [["Sub Head", "Count"]] + subhead_summary.values.tolist() + [["Total", total_subs]]
-            axes[1].axis('off')
-            tbl = axes[1].table(cellText=table_data, loc='center')
-            tbl.auto_set_font_size(False)
-            tbl.set_fontsize(10)
-            tbl.scale(1, 1.5)
-            fig.suptitle("Sub Head Breakdown", fontsize=14, fontweight="bold")
             dr = f"{start_date.strftime('%d-%m-%Y')} to {end_date.strftime('%d-%m-%Y')}"
             heads = ", ".join(st.session_state.view_head_filter)
             type_display = ", ".join(st.session_state.view_type_filter) if st.session_state.view_type_filter else "All Types"
             location_display = st.session_state.view_location_filter or "All Locations"
-            fig.text(0.5, 0.02 + 0.015,
-                     f"Date Range: {dr} | Department: {heads} | Type: {type_display} | Location: {location_display}",
-                     ha='center', fontsize=9, color='gray')
-            if st.session_state.view_sub_filter:
-                fig.text(0.5, 0.02, f"Sub Head Filter: {st.session_state.view_sub_filter}",
-                         ha='center', fontsize=9, color='black', fontweight='bold')
-            plt.tight_layout(rect=[0, 0.06, 1, 0.94])
-            buf = BytesIO()
-            plt.savefig(buf, format="png", dpi=200, bbox_inches="tight")
-            buf.seek(0)
-            plt.close()
-            st.image(buf, use_column_width=True)
-            st.download_button("📥 Download Sub Head Distribution (PNG)", data=buf,
-                               file_name="subhead_distribution.png", mime="image/png")
-    export_df = filtered[[
-        "Date of Inspection", "Type of Inspection", "Location", "Head", "Sub Head",
-        "Deficiencies Noted", "Inspection By", "Action By", "Feedback", "User Feedback/Remark",
-        "Status", "Timestamp of Compliance"
-    ]].copy()
-    export_df["Date of Inspection"] = pd.to_datetime(export_df["Date of Inspection"]).dt.date
-    towb = BytesIO()
-    with pd.ExcelWriter(towb, engine="openpyxl") as writer:
-        export_df.to_excel(writer, index=False, sheet_name="Filtered Records")
-        ws = writer.sheets["Filtered Records"]
-        date_style = NamedStyle(name="date_style", number_format="DD-MM-YYYY")
-        for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-            for cell in row:
-                cell.alignment = Alignment(wrap_text=True, vertical="top")
-        date_col_idx = export_df.columns.get_loc("Date of Inspection") + 1
-        for row in ws.iter_rows(min_row=2, min_col=date_col_idx, max_col=date_col_idx, max_row=len(export_df) + 1):
-            for cell in row:
-                cell.style = date_style
-        for col in ws.columns:
-            max_length = 0
-            col_letter = col[0].column_letter
-            for cell in col:
-                try:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except:
-                    pass
-            adjusted_width = (max_length + 2) if max_length < 50 else 50
-            ws.column_dimensions[col_letter].width = adjusted_width
-        thin_border = Border(left=Side(style='thin'),
-                             right=Side(style='thin'),
-                             top=Side(style='thin'),
-                             bottom=Side(style='thin'))
-        for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-            for cell in row:
-                cell.border = thin_border
-        status_col_idx = export_df.columns.get_loc("Status") + 1
-        for row in ws.iter_rows(min_row=2, min_col=status_col_idx, max_col=status_col_idx, max_row=len(export_df) + 1):
-            for cell in row:
-                if str(cell.value).strip().lower() == "pending":
-                    cell.font = Font(color="FF0000")  # Red
-                elif str(cell.value).strip().lower() == "resolved":
-                    cell.font = Font(color="008000")  # Green
-    towb.seek(0)
-    st.download_button(
-        "📥 Export Filtered Records to Excel",
-        data=towb,
-        file_name="filtered_records.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+            caption = f"Date Range: {dr} | Department: {heads} | Type: {type_display} | Location: {location_display}"
+            filter_caption = f"Sub Head Filter: {st.session_state.view_sub_filter}" if st.session_state.view_sub_filter else None
+            slices = tuple(major.itertuples(index=False, name=None))
+            table_rows = tuple(subhead_summary.itertuples(index=False, name=None))
+            chart_key = ("subhead", slices, table_rows, caption, filter_caption)
+            draw = lambda: draw_subhead_pie(slices, table_rows, total_subs, caption, filter_caption)
+            with TRACER.span("chart: sub head pie"):
+                preview = get_chart_cache().render(chart_key, draw)
+            st.image(preview, use_column_width=True)
+            chart_download(chart_key, draw, "📥 Download Sub Head Distribution (PNG)",
+                           "subhead_distribution.png", key="subhead_png")
+    # the fragments below rerun on their own and read the current selection from here
+    st.session_state.view_filtered = filtered
+    filtered_export()
     # ---------- EDITOR ----------
     if not filtered.empty:
-        display_cols = [
-            "Date of Inspection", "Type of Inspection", "Head", "Sub Head", "Location",
-            "Deficiencies Noted", "Inspection By", "Action By", "Feedback",
-            "User Feedback/Remark", "Timestamp of Compliance"
-        ]
-        valid_cols = [col for col in display_cols if col in filtered.columns]
-        if not valid_cols:
-            st.error("⚠️ No valid columns found in the DataFrame.")
-            st.stop()
-        if "Deficiencies Noted" not in valid_cols:
-            st.error("⚠️ 'Deficiencies Noted' column is required for search functionality.")
-            st.stop()
-
-        editable_filtered = filtered.copy()
-
-        # Ensure stable ID columns
-        if "_original_sheet_index" not in editable_filtered.columns:
-            editable_filtered["_original_sheet_index"] = editable_filtered.index
-        if "_sheet_row" not in editable_filtered.columns:
-            editable_filtered["_sheet_row"] = editable_filtered.index + 2
-
-        # Create editable DataFrame
-        editable_df = editable_filtered[valid_cols + ["_original_sheet_index", "_sheet_row"]].copy()
-
-        # Format Date of Inspection
-        if "Date of Inspection" in editable_df.columns:
-            editable_df["Date of Inspection"] = pd.to_datetime(
-                editable_df["Date of Inspection"], errors="coerce"
-            ).dt.date
-
-        # Add Status column
-        if "Feedback" in editable_df.columns and "User Feedback/Remark" in editable_df.columns:
-            editable_df.insert(
-                editable_df.columns.get_loc("User Feedback/Remark") + 1,
-                "Status",
-                [get_status(r["Feedback"], r["User Feedback/Remark"]) for _, r in editable_df.iterrows()]
-            )
-            editable_df["Status"] = editable_df["Status"].apply(color_text_status)
-
-        # Global Search
-        st.markdown("#### 🔍 Search and Filter")
-        search_text = st.text_input("Search All Columns (case-insensitive)", "").strip().lower()
-        if search_text:
-            mask = editable_df[valid_cols].astype(str).apply(
-                lambda col: col.str.contains(search_text, case=False, na=False)
-            ).any(axis=1)
-            editable_df = editable_df[mask].copy()
-            st.info(f"Found {len(editable_df)} matching rows after search.")
-
-        # Excel-like Column Filtering (FIXED: No more global variable)
-        max_cols = st.slider(
-            "Max columns to filter on",
-            1, len(valid_cols), min(10, len(valid_cols)),
-            key="max_cols_filter"
-        )
-        candidate_columns = valid_cols[:max_cols]
-        selected_columns = st.multiselect(
-            "Select columns to filter",
-            options=candidate_columns,
-            key="column_select_filter"
-        )
-
-        if selected_columns:
-            # Apply column-specific filters
-            df_filtered = editable_df.copy()
-            for column in selected_columns:
-                if is_categorical_dtype(editable_df[column]) or editable_df[column].dtype == "object":
-                    unique_vals = sorted(editable_df[column].dropna().unique())
-                    selected_vals = st.multiselect(
-                        f"Filter {column}",
-                        unique_vals,
-                        key=f"filter_{column}"
-                    )
-                    if selected_vals:
-                        df_filtered = df_filtered[df_filtered[column].isin(selected_vals)]
-                elif is_numeric_dtype(editable_df[column]):
-                    _min = float(editable_df[column].min())
-                    _max = float(editable_df[column].max())
-                    step = (_max - _min) / 100 if _max != _min else 1
-                    selected_range = st.slider(
-                        f"Filter {column}",
-                        _min, _max, (_min, _max), step=step,
-                        key=f"range_{column}"
-                    )
-                    df_filtered = df_filtered[df_filtered[column].between(selected_range[0], selected_range[1])]
-                elif is_datetime64_any_dtype(editable_df[column]):
-                    _min = editable_df[column].min()
-                    _max = editable_df[column].max()
-                    selected_dates = st.date_input(
-                        f"Filter {column}",
-                        [_min, _max],
-                        min_value=_min,
-                        max_value=_max,
-                        key=f"date_{column}"
-                    )
-                    if len(selected_dates) == 2:
-                        df_filtered = df_filtered[df_filtered[column].between(
-                            pd.to_datetime(selected_dates[0]),
-                            pd.to_datetime(selected_dates[1])
-                        )]
-                else:
-                    case = st.selectbox(
-                        f"Case sensitive for {column}?",
-                        ["both", "upper", "lower"],
-                        key=f"case_{column}"
-                    )
-                    search_term = st.text_input(f"Filter {column}", key=f"search_{column}")
-                    if search_term:
-                        if case == "upper":
-                            df_filtered = df_filtered[df_filtered[column].str.upper().str.contains(search_term.upper(), na=False)]
-                        elif case == "lower":
-                            df_filtered = df_filtered[df_filtered[column].str.lower().str.contains(search_term.lower(), na=False)]
-                        else:
-                            df_filtered = df_filtered[df_filtered[column].str.contains(search_term, case=False, na=False)]
-
-            editable_df = df_filtered
-            st.info(f"Applied column filters → {len(editable_df)} rows remaining.")
-
-        # AgGrid Configuration
-        gb = GridOptionsBuilder.from_dataframe(editable_df)
-        gb.configure_default_column(editable=False, wrapText=True, autoHeight=True, resizable=True)
-        if "User Feedback/Remark" in editable_df.columns:
-            gb.configure_column(
-                "User Feedback/Remark",
-                editable=True,
-                wrapText=True,
-                autoHeight=True,
-                cellEditor="agTextCellEditor",
-                cellEditorPopup=False,
-                cellEditorParams={"maxLength": 4000}
-            )
-        gb.configure_column("_original_sheet_index", hide=True)
-        gb.configure_column("_sheet_row", hide=True)
-        gb.configure_grid_options(singleClickEdit=True)
-
-        auto_size_js = JsCode("""
-        function(params) {
-            let allColumnIds = [];
-            params.columnApi.getAllColumns().forEach(function(column) {
-                allColumnIds.push(column.getColId());
-            });
-            params.columnApi.autoSizeColumns(allColumnIds);
-        }
-        """)
-        gb.configure_grid_options(onFirstDataRendered=auto_size_js)
-        grid_options = gb.build()
-        # Render AgGrid
-        st.markdown("#### 🚈 Inspection Details")
-        st.caption("Type your compliance in 'User Feedback/Remark' column. Use column headers to sort.")
-        grid_response = AgGrid(
-            editable_df,
-            gridOptions=grid_options,
-            update_mode=GridUpdateMode.VALUE_CHANGED,
-            height=600,
-            allow_unsafe_jscode=True
-        )
-        edited_df = pd.DataFrame(grid_response["data"])
-        # Download button for filtered/edited results as Excel
-        export_cols = [col for col in valid_cols if col not in ["_original_sheet_index", "_sheet_row"]] + ["Status"]
-        export_edited_df = edited_df[export_cols].copy()
-        export_edited_df["Date of Inspection"] = pd.to_datetime(export_edited_df["Date of Inspection"]).dt.date
-        towb_edited = BytesIO()
-        with pd.ExcelWriter(towb_edited, engine="openpyxl") as writer:
-            export_edited_df.to_excel(writer, index=False, sheet_name="Edited Records")
-            ws = writer.sheets["Edited Records"]
-            date_style = NamedStyle(name="date_style", number_format="DD-MM-YYYY")
-            for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-                for cell in row:
-                    cell.alignment = Alignment(wrap_text=True, vertical="top")
-            date_col_idx = export_edited_df.columns.get_loc("Date of Inspection") + 1
-            for row in ws.iter_rows(min_row=2, min_col=date_col_idx, max_col=date_col_idx, max_row=len(export_edited_df) + 1):
-                for cell in row:
-                    cell.style = date_style
-            for col in ws.columns:
-                max_length = 0
-                col_letter = col[0].column_letter
-                for cell in col:
-                    try:
-                        if cell.value:
-                            max_length = max(max_length, len(str(cell.value)))
-                    except:
-                        pass
-                adjusted_width = (max_length + 2) if max_length < 50 else 50
-                ws.column_dimensions[col_letter].width = adjusted_width
-            thin_border = Border(left=Side(style='thin'),
-                                 right=Side(style='thin'),
-                                 top=Side(style='thin'),
-                                 bottom=Side(style='thin'))
-            for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-                for cell in row:
-                    cell.border = thin_border
-            status_col_idx = export_edited_df.columns.get_loc("Status") + 1
-            for row in ws.iter_rows(min_row=2, min_col=status_col_idx, max_col=status_col_idx, max_row=len(export_edited_df) + 1):
-                for cell in row:
-                    if str(cell.value).strip().lower() == "pending":
-                        cell.font = Font(color="FF0000")  # Red
-                    elif str(cell.value).strip().lower() == "resolved":
-                        cell.font = Font(color="008000")  # Green
-        towb_edited.seek(0)
-        st.download_button(
-            label="📥 Export Edited Records to Excel",
-            data=towb_edited,
-            file_name=f"edited_records_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        # Buttons
-        c1, c2, c3 = st.columns([1, 1, 2])  # Extra space column for better alignment
-        submitted = c1.button("✅ Submit Feedback", use_container_width=True)
-        refresh_clicked = c2.button("🔄 Refresh Data", use_container_width=True)
-
-        if refresh_clicked:
-            with st.spinner("🔄 Refreshing data from Google Sheets..."):
-                st.session_state.df = load_data()
-            st.success("✅ Data refreshed successfully!")
-            st.rerun()
-
-        # Submit Feedback logic with protection against double submission
-        if submitted:
-            if st.session_state.get("feedback_submitting", False):
-                st.warning("⏳ Submission already in progress. Please wait...")
-            else:
-                st.session_state.feedback_submitting = True
-                try:
-                    with st.spinner("💾 Saving feedback to Google Sheet... Please do not refresh or close the page."):
-                        need_cols = {"_original_sheet_index", "User Feedback/Remark"}
-                        if not need_cols.issubset(edited_df.columns) or "Feedback" not in editable_filtered.columns:
-                            st.error("⚠️ Required columns are missing from the data.")
-                        else:
-                            # Ensure indexes are properly set for comparison
-                            orig = editable_filtered.set_index("_original_sheet_index")
-                            new_df = edited_df.set_index("_original_sheet_index")
-
-                            old_remarks = orig["User Feedback/Remark"].fillna("").astype(str)
-                            new_remarks = new_df["User Feedback/Remark"].fillna("").astype(str)
-
-                            common_ids = new_remarks.index.intersection(old_remarks.index)
-                            diff_mask = new_remarks.loc[common_ids] != old_remarks.loc[common_ids]
-                            changed_ids = diff_mask[diff_mask].index.tolist()
-
-                            if changed_ids:
-                                diffs = new_df.loc[changed_ids].copy()
-                                diffs["_sheet_row"] = orig.loc[changed_ids, "_sheet_row"].values
-
-                                # Updated routing dictionary with fixed typo
-                                routing = {
-                                    "Pertains to 0": ("0", "0"),
-                                }
-
-                                for oid in changed_ids:
-                                    user_remark = new_df.loc[oid, "User Feedback/Remark"].strip()
-                                    if not user_remark:
-                                        continue
-
-                                    # Auto-routing based on keywords
-                                    routed = False
-                                    for key, (head, action_by) in routing.items():
-                                        if key.lower() in user_remark.lower():  # Case-insensitive match
-                                            st.session_state.df.at[oid, "Head"] = head
-                                            st.session_state.df.at[oid, "Action By"] = action_by
-                                            st.session_state.df.at[oid, "Sub Head"] = ""
-                                            diffs.at[oid, "Head"] = head
-                                            diffs.at[oid, "Action By"] = action_by
-                                            diffs.at[oid, "Sub Head"] = ""
-
-                                            date_str = orig.loc[oid, "Date of Inspection"]
-                                            deficiency = orig.loc[oid, "Deficiencies Noted"]
-                                            forwarded_by = orig.loc[oid, "Head"]  # Original head (if any)
-                                            routed = True
-
-                                    # Always copy the remark to Feedback column
-                                    diffs.at[oid, "Feedback"] = user_remark
-                                    diffs.at[oid, "User Feedback/Remark"] = ""
-                                    st.session_state.df.at[oid, "Feedback"] = user_remark
-                                    st.session_state.df.at[oid, "User Feedback/Remark"] = ""
-
-                                # Save to Google Sheet
-                                update_feedback_column(
-                                    diffs.reset_index().rename(columns={"_original_sheet_index": "_original_sheet_index"})
-                                )
-
-                                st.success(f"✅ Successfully updated {len(changed_ids)} record(s)!")
-                            else:
-                                st.info("ℹ️ No changes detected in the feedback.")
-                except Exception as e:
-                    st.error(f"❌ Error during submission: {str(e)}")
-                finally:
-                    st.session_state.feedback_submitting = False
-                    #st.rerun()  # Refresh view to show updated Status and clean grid
-
+        records_editor()
     else:
         st.info("No deficiencies available to update at the moment.")
 
+if active_view == VIEWS[0]:
+    with main_area:
+        view_records()
+
 # -------------------- FOOTER --------------------
 st.markdown("""
 <div style="text-align: center; margin: 35px 0;">
@@ -1138,88 +1200,122 @@ with col2:
         unsafe_allow_html=True
     )
 # ---- STREAMLIT BLOCK ----
-with tabs[1]:
-    st.markdown("### Total Deficiencies Trend (Bar + Trend Line)")
-    df = st.session_state.df.copy()
+@st.fragment
+def location_breakdown():
+    counts = st.session_state.analytics_counts
     # ------------------------------------------------------------------ #
-    # 1. Ensure Status column (Pending / Resolved)
+    # 7. LOCATION FILTER → TOTAL PER DEPARTMENT + DETAILED BREAKDOWN
     # ------------------------------------------------------------------ #
-    if "Status" not in df.columns:
-        df["Status"] = df.apply(
-            lambda r: classify_feedback(r["Feedback"], r.get("User Feedback/Remark", "")), axis=1
+    st.markdown("### Department wise deficiencies logged")
+    all_locations = sorted(locations_in(counts))
+    selected_locations = st.multiselect(
+        "Select Locations (Stations / Gates / Routes)",
+        options=all_locations,
+        default=all_locations[:10] if len(all_locations) > 10 else all_locations
+    )
+    if selected_locations:
+        # Expand selected locations to include subsections
+        expanded_locations = LOCATIONS.expand(selected_locations)
+        filtered = counts[counts["Location_clean"].isin(expanded_locations)]
+        # Total per department
+        dept_breakdown = total_by(filtered, "Head_std").sort_values("TotalCount", ascending=False)
+        # Pending & Resolved per department
+        status_breakdown = status_by(filtered, "Head_std")
+        status_breakdown.columns = [f"{col}Count" for col in status_breakdown.columns]
+        status_breakdown = status_breakdown.reset_index()
+        # Merge
+        summary_df = dept_breakdown.merge(status_breakdown, on="Head_std", how="left")
+        summary_df["PendingCount"] = summary_df.get("PendingCount", 0)
+        summary_df["ResolvedCount"] = summary_df.get("ResolvedCount", 0)
+        # Bar chart (total only)
+        bar_chart = alt.Chart(summary_df).mark_bar(color="#1f77b4").encode(
+            x=alt.X("TotalCount:Q", title="Total Deficiencies Logged"),
+            y=alt.Y("Head_std:N", title="Department", sort="-x"),
+            tooltip=[
+                "Head_std",
+                alt.Tooltip("TotalCount", title="Total", format=","),
+                alt.Tooltip("PendingCount", title="Pending", format=","),
+                alt.Tooltip("ResolvedCount", title="Resolved", format=",")
+            ]
+        ).properties(
+            height=max(300, len(summary_df) * 40)
         )
-    df["Status"] = df["Status"].fillna("Pending").replace({"": "Pending", "NA": "Pending"})
-    df["Status"] = df["Status"].str.strip().str.upper().map({
-        "PENDING": "Pending", "RESOLVED": "Resolved", "CLOSED": "Resolved"
-    }).fillna("Pending")
-    if df.empty:
+        # Add total count as text label
+        text = bar_chart.mark_text(
+            align="left",
+            baseline="middle",
+            dx=3,
+            fontWeight="bold",
+            color="black"
+        ).encode(
+            text=alt.Text("TotalCount:Q", format=",")
+        )
+        final_chart = (bar_chart + text).configure_axis(
+            labelFontSize=12,
+            titleFontSize=14
+        ).configure_title(fontSize=16)
+        with TRACER.span("chart: location breakdown"):
+            st.altair_chart(final_chart, use_container_width=True)
+        # Summary line
+        total = summary_df["TotalCount"].sum()
+        pending = summary_df["PendingCount"].sum()
+        resolved = summary_df["ResolvedCount"].sum()
+        st.markdown(
+            f"**Total Deficiencies Logged:** {total:,} | "
+            f"**Pending:** {pending:,} | "
+            f"**Resolved:** {resolved:,}"
+        )
+        # Department-wise breakdown
+        st.markdown("**Department-wise Breakdown:**")
+        for _, row in summary_df.iterrows():
+            st.markdown(
+                f"- **{row['Head_std']}**: **Total Deficiencies:** {row['TotalCount']:,} | "
+                f"**Pending:** {row['PendingCount']:,} | "
+                f"**Resolved:** {row['ResolvedCount']:,}"
+            )
+    else:
+        st.info("Please select at least one location to view the breakdown.")
+
+def analytics_page():
+    st.markdown("### Total Deficiencies Trend (Bar + Trend Line)")
+    base = session_frame(dataset)
+    if base.empty:
         st.info("No data available for analytics.")
     else:
         # ------------------------------------------------------------------ #
-        # 2. Parse dates
+        # 1. Date bounds from the shared date index (dates parsed at sync)
         # ------------------------------------------------------------------ #
-        df["Date of Inspection"] = pd.to_datetime(df["Date of Inspection"], errors="coerce")
-        df = df.dropna(subset=["Date of Inspection"])
+        dates = date_index(dataset)
         # ------------------------------------------------------------------ #
-        # 3. Date filter
+        # 2. Date filter
         # ------------------------------------------------------------------ #
-        min_date = df["Date of Inspection"].min().date()
-        max_date = df["Date of Inspection"].max().date()
+        min_date = (dates.first or pd.Timestamp.today()).date()
+        max_date = (dates.last or pd.Timestamp.today()).date()
+        # partitions not loaded yet can still be picked; they are loaded below
+        earliest = getattr(get_sync_engine(), "first", None) if sheet is not None else None
+        st.session_state.setdefault("analytics_range", (min_date, max_date))
         start_date, end_date = st.date_input(
             "Select Inspection Date Range",
-            value=(min_date, max_date),
-            min_value=min_date,
-            max_value=max_date
+            min_value=min(min_date, earliest.date()) if earliest is not None else min_date,
+            max_value=max_date,
+            key="analytics_range"
         )
-        df = df[
-            (df["Date of Inspection"] >= pd.to_datetime(start_date)) &
-            (df["Date of Inspection"] <= pd.to_datetime(end_date))
-        ].copy()
-        # ------------------------------------------------------------------ #
-        # 4. Clean department names
-        # ------------------------------------------------------------------ #
-        def clean_name(text):
-            if pd.isna(text):
-                return "UNKNOWN"
-            s = str(text).strip()
-            s = re.sub(r"[\*\-\_\'\"]", "", s)
-            s = re.sub(r"\s+", " ", s).strip()
-            return s.upper()
-        df["Head_clean"] = df["Head"].apply(clean_name)
-        dept_map = {
-            "ENGINEERING": "ENGINEERING",
-            "ELECT/G": "ELECT/G", "ELECTG": "ELECT/G",
-            "ELECT/TRD": "ELECT/TRD",
-            "ELECT/TRO": "ELECT/TRO",
-            "OPTG": "OPTG", "OPERATING": "OPTG",
-            "SIGNAL & TELECOM": "SIGNAL & TELECOM",
-            "MECHANICAL": "MECHANICAL",
-            "COMMERCIAL": "COMMERCIAL",
-            "SECURITY": "SECURITY",
-            "PERSONNEL": "PERSONNEL",
-            "MEDICAL": "MEDICAL",
-            "FINANCE": "FINANCE",
-            "STORE": "STORE",
-        }
-        df["Head_std"] = df["Head_clean"].map(dept_map).fillna("UNKNOWN")
+        if load_partitions(pd.to_datetime(start_date), pd.to_datetime(end_date)):
+            st.rerun()
         # ------------------------------------------------------------------ #
-        # 5. Clean Location & identify stations
+        # 3. Counts by (month, department, location, status) from the cube
         # ------------------------------------------------------------------ #
-        if "Location" not in df.columns:
-            df["Location"] = ""
-        df["Location_clean"] = df["Location"].astype(str).apply(clean_name)
-        STATIONS_NORM = {clean_name(x) for x in STATION_LIST}
-        df["Is_Station"] = df["Location_clean"].isin(STATIONS_NORM)
-        # Expand footplate routes to include subsections
-        all_locations = set(df["Location_clean"].dropna().unique())
-        for main_route, subsections in FOOTPLATE_ROUTE_HIERARCHY.items():
-            if main_route in all_locations:
-                all_locations.update(subsections)
-        df = df[df["Location_clean"].isin(all_locations)]
+        cube = dataset.memo("analytics", lambda df: AnalyticsCube.build(df, dates))
+        # this session's unsynced edits replace their shared rows
+        edited = overlay_rows(dataset, st.session_state.overlay)
+        counts = cube.counts(
+            pd.to_datetime(start_date), pd.to_datetime(end_date),
+            exclude=edited, extra=analytics_keys(base.iloc[edited]) if edited else None
+        )
         # ------------------------------------------------------------------ #
-        # 6. Trend chart (total deficiencies)
+        # 4. Trend chart (total deficiencies)
         # ------------------------------------------------------------------ #
-        trend = df.groupby(pd.Grouper(key="Date of Inspection", freq="MS")).size().reset_index(name="TotalCount")
+        trend = monthly_trend(counts)
         if not trend.empty:
             trend = trend.sort_values("Date of Inspection")
             trend["Month"] = trend["Date of Inspection"].dt.strftime("%b-%Y")
@@ -1231,15 +1327,15 @@ with tabs[1]:
             line = alt.Chart(trend).transform_regression("Date of Inspection", "TotalCount").mark_line(
                 color="red", strokeDash=[6, 4], strokeWidth=2.5
             ).encode(x="Month:O", y="TotalCount:Q")
-            st.altair_chart(bars + line, use_container_width=True)
+            with TRACER.span("chart: monthly trend"):
+                st.altair_chart(bars + line, use_container_width=True)
         else:
             st.info("No data in selected range.")
         # ------------------------------------------------------------------ #
-        # 7. Department summary (overall)
+        # 5. Department summary (overall)
         # ------------------------------------------------------------------ #
         st.markdown("### Department-wise **Total** Deficiencies Logged")
-        dept_counts = df.groupby("Head_std").size().reset_index(name="TotalCount") \
-                        .sort_values("TotalCount", ascending=False)
+        dept_counts = total_by(counts, "Head_std").sort_values("TotalCount", ascending=False)
         total_deficiencies = dept_counts["TotalCount"].sum()
         dept_counts["color"] = "#ff7f0e"
         dept_counts.loc[:2, "color"] = "red"
@@ -1252,20 +1348,19 @@ with tabs[1]:
             color=alt.Color("color:N", scale=None),
             tooltip=["Head_std", alt.Tooltip("TotalCount", format=",")]
         ).properties(height=400)
-        st.altair_chart(dept_chart, use_container_width=True)
+        with TRACER.span("chart: departments"):
+            st.altair_chart(dept_chart, use_container_width=True)
         top3 = dept_counts.head(3)
         critical_text = ", ".join([f"**{r['Head_std']}** ({r['TotalCount']:,})" for _, r in top3.iterrows()])
         st.markdown(f"**Critical Departments:** {critical_text}")
         # ------------------------------------------------------------------ #
-        # 8. TOP 3 STATIONS ONLY
+        # 6. TOP 3 STATIONS ONLY
         # ------------------------------------------------------------------ #
         st.markdown("### Top 3 Stations having most logged deficiencies")
-        station_df = df[df["Is_Station"]].copy()
-        if not station_df.empty:
+        station_counts = counts[counts["Location_clean"].isin(STATIONS_NORM)]
+        if not station_counts.empty:
             top3_stations = (
-                station_df.groupby("Location_clean")
-                .size()
-                .reset_index(name="TotalCount")
+                total_by(station_counts, "Location_clean")
                 .sort_values("TotalCount", ascending=False)
                 .head(3)
                 .copy()
@@ -1278,90 +1373,31 @@ with tabs[1]:
                 color=alt.Color("color:N", scale=None),
                 tooltip=["Label", alt.Tooltip("TotalCount", format=",")]
             ).properties(height=260)
-            st.altair_chart(chart, use_container_width=True)
+            with TRACER.span("chart: top stations"):
+                st.altair_chart(chart, use_container_width=True)
         else:
             st.info("No station data found in the selected period.")
-        # ------------------------------------------------------------------ #
-        # 9. LOCATION FILTER → TOTAL PER DEPARTMENT + DETAILED BREAKDOWN
-        # ------------------------------------------------------------------ #
-        st.markdown("### Department wise deficiencies logged")
-        all_locations = sorted(all_locations)
-        selected_locations = st.multiselect(
-            "Select Locations (Stations / Gates / Routes)",
-            options=all_locations,
-            default=all_locations[:10] if len(all_locations) > 10 else all_locations
-        )
-        if selected_locations:
-            # Expand selected locations to include subsections
-            expanded_locations = set(selected_locations)
-            for loc in selected_locations:
-                if loc in FOOTPLATE_ROUTE_HIERARCHY:
-                    expanded_locations.update(FOOTPLATE_ROUTE_HIERARCHY[loc])
-            filtered = df[df["Location_clean"].isin(expanded_locations)].copy()
-            # Total per department
-            dept_breakdown = (
-                filtered.groupby("Head_std")
-                .size()
-                .reset_index(name="TotalCount")
-                .sort_values("TotalCount", ascending=False)
-            )
-            # Pending & Resolved per department
-            status_breakdown = (
-                filtered.groupby(["Head_std", "Status"])
-                .size()
-                .unstack(fill_value=0)
-            )
-            status_breakdown.columns = [f"{col}Count" for col in status_breakdown.columns]
-            status_breakdown = status_breakdown.reset_index()
-            # Merge
-            summary_df = dept_breakdown.merge(status_breakdown, on="Head_std", how="left")
-            summary_df["PendingCount"] = summary_df.get("PendingCount", 0)
-            summary_df["ResolvedCount"] = summary_df.get("ResolvedCount", 0)
-            # Bar chart (total only)
-            bar_chart = alt.Chart(summary_df).mark_bar(color="#1f77b4").encode(
-                x=alt.X("TotalCount:Q", title="Total Deficiencies Logged"),
-                y=alt.Y("Head_std:N", title="Department", sort="-x"),
-                tooltip=[
-                    "Head_std",
-                    alt.Tooltip("TotalCount", title="Total", format=","),
-                    alt.Tooltip("PendingCount", title="Pending", format=","),
-                    alt.Tooltip("ResolvedCount", title="Resolved", format=",")
-                ]
-            ).properties(
-                height=max(300, len(summary_df) * 40)
-            )
-            # Add total count as text label
-            text = bar_chart.mark_text(
-                align="left",
-                baseline="middle",
-                dx=3,
-                fontWeight="bold",
-                color="black"
-            ).encode(
-                text=alt.Text("TotalCount:Q", format=",")
-            )
-            final_chart = (bar_chart + text).configure_axis(
-                labelFontSize=12,
-                titleFontSize=14
-            ).configure_title(fontSize=16)
-            st.altair_chart(final_chart, use_container_width=True)
-            # Summary line
-            total = summary_df["TotalCount"].sum()
-            pending = summary_df["PendingCount"].sum()
-            resolved = summary_df["ResolvedCount"].sum()
-            st.markdown(
-                f"**Total Deficiencies Logged:** {total:,} | "
-                f"**Pending:** {pending:,} | "
-                f"**Resolved:** {resolved:,}"
-            )
-            # Department-wise breakdown
-            st.markdown("**Department-wise Breakdown:**")
-            for _, row in summary_df.iterrows():
-                st.markdown(
-                    f"- **{row['Head_std']}**: **Total Deficiencies:** {row['TotalCount']:,} | "
-                    f"**Pending:** {row['PendingCount']:,} | "
-                    f"**Resolved:** {row['ResolvedCount']:,}"
-                )
+        # section 7 reruns alone when its location selection changes
+        st.session_state.analytics_counts = counts
+        location_breakdown()
+
+if active_view == VIEWS[1]:
+    with main_area:
+        analytics_page()
+
+# ---------- PERFORMANCE TRACE ----------
+TRACER.record("script run", (time.perf_counter() - run_started) * 1000, view=active_view)
+TRACER.flush()
+
+if is_admin(st.session_state.user):
+    with st.sidebar.expander("⏱️ Performance Trace"):
+        summary = TRACER.summary()
+        if summary.empty:
+            st.caption("No timings recorded yet.")
         else:
-            st.info("Please select at least one location to view the breakdown.")
-
+            st.dataframe(summary.round(1), hide_index=True, use_container_width=True)
+        st.caption(f"Last {TRACER.window} calls per stage in this process; "
+                   f"every span is also appended to {TRACER.path or 'no trace file'}.")
+        if st.button("♻️ Reset timings", key="trace_reset"):
+            TRACER.clear()
+            st.rerun()
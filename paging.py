@@ -0,0 +1,87 @@
+# ---------- SERVER-SIDE PAGING ----------
+import math
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = [50, 100, 200, 500]
+SHEET_ORDER = "(sheet order)"
+# Display columns that sort by a parsed companion column
+SORT_KEYS = {"Timestamp of Compliance": "Compliance At"}
+
+
+def sort_positions(frame, column=None, descending=False):
+    """Row positions of frame ordered by column (stable, blanks last); sheet order without a column."""
+    if column is None or column not in frame.columns:
+        return np.arange(len(frame))
+    values = frame[SORT_KEYS[column]] if SORT_KEYS.get(column) in frame.columns else frame[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+    if values.dtype == object:
+        values = values.where(values.isna(), values.astype(str).str.lower())
+    order = values.reset_index(drop=True).sort_values(ascending=not descending, kind="stable", na_position="last")
+    return order.index.to_numpy()
+
+
+def page_bounds(total, page, size):
+    """(start, stop, pages) for a 1-based page, clamped to the last page."""
+    pages = max(1, math.ceil(total / size))
+    page = min(max(1, int(page)), pages)
+    start = (page - 1) * size
+    return start, min(start + size, total), pages
+
+
+class PageEdits:
+    """Unsaved grid edits kept while the user moves between pages.
+
+    Edits are keyed by ``id_col``, the sheet row key, so they survive
+    re-sorting, re-filtering and reloads that shift row positions;
+    ``by_page`` remembers which page each edit was typed on. Typing a value
+    back to the original drops the edit.
+    """
+
+    def __init__(self, id_col="_sheet_row", col="User Feedback/Remark"):
+        self.id_col = id_col
+        self.col = col
+        self.values = {}
+        self.by_page = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def discard(self, ids):
+        for oid in ids:
+            self.values.pop(oid, None)
+            self.by_page.pop(oid, None)
+
+    def record(self, base, returned, page):
+        """Diff the grid's rows for one page against the unedited page rows."""
+        if returned is None or returned.empty or self.col not in returned.columns or self.id_col not in returned.columns:
+            return
+        original = pd.Series(base[self.col].to_numpy(), index=base[self.id_col].to_numpy()).fillna("").astype(str)
+        typed = pd.Series(returned[self.col].to_numpy(), index=returned[self.id_col].to_numpy()).fillna("").astype(str)
+        typed = typed[typed.index.isin(original.index)]
+        for oid, value in typed.items():
+            if value != original[oid]:
+                self.values[oid] = value
+                self.by_page[oid] = page
+            else:
+                self.values.pop(oid, None)
+                self.by_page.pop(oid, None)
+
+    def pages(self):
+        return sorted(set(self.by_page.values()))
+
+    def apply(self, frame):
+        """Copy of frame with the pending edits written into ``col``; frame itself without edits."""
+        if not self.values or self.col not in frame.columns:
+            return frame
+        ids = frame[self.id_col]
+        hit = ids.isin(list(self.values)).to_numpy()
+        if not hit.any():
+            return frame
+        out = frame.copy(deep=False)
+        column = out[self.col].astype(object).copy()
+        column.iloc[np.flatnonzero(hit)] = ids[hit].map(self.values).to_numpy()
+        out[self.col] = column
+        return out
@@ -0,0 +1,230 @@
+# ---------- DATE-PARTITIONED WORKSHEETS ----------
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset import concat_frames
+from sync import SheetSync, REQUIRED_COLS
+
+# Row keys are number * stride + sheet row; a worksheet never holds this many rows (10M cell limit)
+PARTITION_ROW_STRIDE = 10_000_000
+
+
+def row_key(number, row):
+    return number * PARTITION_ROW_STRIDE + row
+
+
+def split_key(key):
+    """(partition number, sheet row) of a row key."""
+    return divmod(int(key), PARTITION_ROW_STRIDE)
+
+
+class Partition:
+    """One worksheet of the logical dataset, holding inspections dated start <= date < end.
+
+    The base worksheet (number 0) has no bounds: it keeps rows from before
+    partitioning and is always loaded.
+    """
+
+    def __init__(self, number, title, worksheet, start=None, end=None):
+        self.number = number
+        self.title = title
+        self.worksheet = worksheet
+        self.start = start
+        self.end = end
+
+    def overlaps(self, lo, hi):
+        if self.start is None:
+            return True
+        return self.start <= pd.Timestamp(hi) and pd.Timestamp(lo) < self.end
+
+
+def parse_partition(title, base):
+    """(number, start, end) for "<base> 2024" or "<base> 2024-Q3"; None for other titles."""
+    m = re.fullmatch(re.escape(base) + r"\s+(\d{4})(?:-Q([1-4]))?", title.strip())
+    if not m:
+        return None
+    year, quarter = int(m.group(1)), int(m.group(2) or 0)
+    if quarter:
+        start = pd.Timestamp(year, 3 * quarter - 2, 1)
+        return year * 10 + quarter, start, start + pd.DateOffset(months=3)
+    return year * 10, pd.Timestamp(year, 1, 1), pd.Timestamp(year + 1, 1, 1)
+
+
+def discover_partitions(spreadsheet, base):
+    """The base worksheet plus every "<base> <period>" tab, oldest period first."""
+    parts = []
+    for ws in spreadsheet.worksheets():
+        if ws.title == base:
+            parts.append(Partition(0, ws.title, ws))
+            continue
+        period = parse_partition(ws.title, base)
+        if period is not None:
+            parts.append(Partition(period[0], ws.title, ws, period[1], period[2]))
+    return sorted(parts, key=lambda p: p.number)
+
+
+class PartitionedSync:
+    """SheetSync over worksheets partitioned by year or quarter, presented as one frame.
+
+    Only active partitions are read: the base worksheet and the most recent
+    period at first, plus whatever ``require`` activates for a date range.
+    Each partition keeps its own SheetSync, so deltas stay per worksheet.
+    ``_sheet_row`` holds ``row_key(number, sheet row)`` so edits find their
+    worksheet again. ``changed`` is only given when every row kept its
+    position (patches anywhere, appends to the last partition); otherwise
+    it is None, like after a full load. The worksheet list is looked up
+    again at most every ``discover_every`` seconds; a new latest period
+    becomes active, older new periods wait for ``require``.
+    """
+
+    def __init__(self, spreadsheet, base, full_every=120, ingest=None, recent=1, discover_every=300.0):
+        self.spreadsheet = spreadsheet
+        self.base = base
+        self.full_every = full_every
+        self.ingest = ingest
+        self.recent = recent
+        self.discover_every = discover_every
+        self.lock = threading.Lock()
+        self.partitions = discover_partitions(spreadsheet, base)
+        self.discovered_at = time.time()
+        self.by_number = {p.number: p for p in self.partitions}
+        self.by_title = {p.title: p for p in self.partitions}
+        bounded = [p.number for p in self.partitions if p.start is not None]
+        self.active = {p.number for p in self.partitions if p.start is None} | set(bounded[-recent:] if recent else [])
+        self.engines = {}
+        self.df = None
+        self.changed = None
+        self.last_fetched = 0
+        self._layout = []  # (number, rows) per partition in the current frame
+
+    def headers_for(self, title):
+        """Header row of one worksheet; read from the sheet when it is not loaded yet."""
+        part = self.by_title[title]
+        engine = self.engines.get(part.number)
+        if engine is not None and engine.headers:
+            return engine.headers
+        return part.worksheet.row_values(1)
+
+    @property
+    def first(self):
+        """Earliest date any partition can hold (None with only the unbounded base)."""
+        starts = [p.start for p in self.partitions if p.start is not None]
+        return min(starts) if starts else None
+
+    def locate(self, key):
+        """(worksheet title, sheet row) of a row key, for write-back."""
+        number, row = split_key(key)
+        return self.by_number[number].title, row
+
+    def loaded(self):
+        return [self.by_number[n].title for n, _ in self._layout]
+
+    def require(self, lo, hi):
+        """Activate the partitions overlapping lo..hi; True when that adds any."""
+        with self.lock:
+            wanted = {p.number for p in self.partitions if p.overlaps(lo, hi)}
+            new = wanted - self.active
+            self.active |= new
+            return bool(new)
+
+    def _discover(self):
+        """Add worksheets created since the last look (caller holds the lock)."""
+        self.discovered_at = time.time()
+        latest = max((p.number for p in self.partitions if p.start is not None), default=None)
+        new = [p for p in discover_partitions(self.spreadsheet, self.base) if p.number not in self.by_number]
+        for part in new:
+            self.by_number[part.number] = part
+            self.by_title[part.title] = part
+            if self.recent and part.start is not None and (latest is None or part.number > latest):
+                self.active.add(part.number)
+        if new:
+            # a new list, not an in-place sort: readers such as ``first`` do not take the lock
+            self.partitions = sorted(self.partitions + new, key=lambda p: p.number)
+
+    def _engine(self, number):
+        engine = self.engines.get(number)
+        if engine is None:
+            engine = self.engines[number] = SheetSync(self.by_number[number].worksheet, self.full_every, self.ingest)
+        return engine
+
+    def sync(self, force_full=False):
+        with self.lock:
+            if time.time() - self.discovered_at >= self.discover_every:
+                self._discover()
+            numbers = [p.number for p in self.partitions if p.number in self.active]
+            frames, changed, fetched = [], [], 0
+            positional = self.df is not None and [n for n, _ in self._layout] == numbers
+            offset = 0
+            for i, number in enumerate(numbers):
+                engine = self._engine(number)
+                df = engine.sync(force_full)
+                fetched += engine.last_fetched
+                if positional:
+                    old_rows = self._layout[i][1]
+                    grew_inside = len(df) != old_rows and i < len(numbers) - 1
+                    if engine.changed is None or grew_inside:
+                        positional = False
+                    else:
+                        changed.append(engine.changed + offset)
+                frames.append((number, df))
+                offset += len(df)
+            self.last_fetched = fetched
+            if positional and not sum(len(c) for c in changed):
+                self.changed = np.empty(0, dtype=np.int64)
+                return self.df  # unchanged: same frame, so publishing keeps the version
+            self._combine(frames)
+            self.changed = np.concatenate(changed).astype(np.int64) if positional else None
+            return self.df
+
+    def _combine(self, frames):
+        """One frame from (number, partition frame) pairs, with sheet rows turned into row keys."""
+        out = None
+        for number, df in frames:
+            if df.empty:
+                continue
+            df = df.copy(deep=False)
+            df["_sheet_row"] = row_key(number, df["_sheet_row"].to_numpy(np.int64))
+            out = df.reset_index(drop=True) if out is None else concat_frames(out, df)
+        self.df = out if out is not None else pd.DataFrame(columns=REQUIRED_COLS)
+        self._layout = [(number, len(df)) for number, df in frames]
+
+    # ----- snapshot -----
+    def snapshot_state(self):
+        """Combined frame with every partition's raw key/stamp columns, and per-partition meta."""
+        with self.lock:
+            frames, meta = [], {}
+            for number, rows in self._layout:
+                df, part_meta = self.engines[number].snapshot_state()
+                meta[str(number)] = part_meta
+                if rows:
+                    df["_sheet_row"] = row_key(number, df["_sheet_row"].to_numpy(np.int64))
+                    frames.append(df)
+            out = frames[0] if frames else pd.DataFrame(columns=REQUIRED_COLS + ["_sheet_row", "_raw_key", "_raw_stamp"])
+            for df in frames[1:]:
+                out = concat_frames(out, df)
+            return out, {"partitions": meta}
+
+    def restore(self, df, meta):
+        """Seed the partitions saved in a snapshot; snapshots of a single worksheet are ignored."""
+        saved = meta.get("partitions")
+        if not saved:
+            return
+        with self.lock:
+            numbers = df["_sheet_row"].to_numpy(np.int64) // PARTITION_ROW_STRIDE
+            layout = []
+            for key, part_meta in saved.items():
+                number = int(key)
+                if number not in self.by_number:
+                    continue  # worksheet gone since the snapshot
+                part = df[numbers == number].copy()
+                part["_sheet_row"] = part["_sheet_row"].to_numpy(np.int64) - row_key(number, 0)
+                self._engine(number).restore(part.reset_index(drop=True), part_meta)
+                self.active.add(number)
+                layout.append(number)
+            if layout:
+                self._combine([(n, self.engines[n].df) for n in sorted(layout)])
+                self.changed = None
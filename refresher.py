@@ -0,0 +1,73 @@
+# ---------- BACKGROUND REFRESH ----------
+import threading
+import time
+
+REFRESH_SECONDS = 30.0
+
+
+class Refresher:
+    """One daemon thread that runs ``refresh(full)`` every ``interval`` seconds or on request.
+
+    ``request`` never fetches itself: it returns the generation that will
+    hold fresh data, and wakes the thread. Requests made while a fetch is in
+    flight join that fetch, and requests made while idle share the next one,
+    so concurrent callers cause a single fetch at a time. ``generation``
+    counts finished attempts (failed ones too, see ``last_error``), so
+    waiters never hang on an error. ``full`` is True when a request since
+    the last fetch asked for a full reload.
+    """
+
+    def __init__(self, refresh, interval=REFRESH_SECONDS, name="dataset-refresher"):
+        self.refresh = refresh
+        self.interval = interval
+        self.cond = threading.Condition()
+        self.generation = 0
+        self.in_flight = False
+        self.requested = False
+        self.full = False
+        self.last_error = None
+        self.last_finished = None
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def request(self, fresh=False, full=False):
+        """Ask for fresh data; returns the generation to wait for.
+
+        With ``fresh`` an in-flight fetch is not joined: the fetch must start
+        after this call (e.g. because the sync settings just changed). With
+        ``full`` that fetch reloads everything instead of a delta.
+        """
+        with self.cond:
+            if self.in_flight and not fresh:
+                return self.generation + 1
+            self.requested = True
+            self.full = self.full or full
+            self.cond.notify_all()
+            return self.generation + (2 if self.in_flight else 1)
+
+    def wait(self, generation, timeout=None):
+        """Block until ``generation`` has finished; False on timeout."""
+        with self.cond:
+            return self.cond.wait_for(lambda: self.generation >= generation, timeout)
+
+    def done(self, generation):
+        return self.generation >= generation
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.requested, self.interval)
+                self.requested = False
+                full, self.full = self.full, False
+                self.in_flight = True
+            error = None
+            try:
+                self.refresh(full)
+            except Exception as e:
+                error = e  # the last published version stays current
+            with self.cond:
+                self.in_flight = False
+                self.last_error = error
+                self.last_finished = time.time()
+                self.generation += 1
+                self.cond.notify_all()
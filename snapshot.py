@@ -0,0 +1,32 @@
+# ---------- DISK SNAPSHOT ----------
+import json
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SNAPSHOT_PATH = "dataset_snapshot.parquet"
+META_KEY = b"inspection_app"
+
+
+def save_snapshot(path, df, meta):
+    """Write df plus a JSON-able meta dict as one Parquet file, replacing the old one atomically."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    meta = dict(meta, saved_at=time.time())
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), META_KEY: json.dumps(meta).encode()})
+    tmp = f"{path}.tmp"
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
+
+
+def load_snapshot(path):
+    """(df, meta) from the last snapshot, or None when there is none or it cannot be read."""
+    if not os.path.exists(path):
+        return None
+    try:
+        table = pq.read_table(path)
+        meta = json.loads((table.schema.metadata or {}).get(META_KEY, b"{}"))
+        return table.to_pandas(), meta
+    except Exception:
+        return None
@@ -0,0 +1,200 @@
+# ---------- INCREMENTAL SHEET SYNC ----------
+import re
+import threading
+
+import gspread
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from dataset import patch_series, concat_frames, differs
+from ingest import INSPECTION_DATE_FORMATS, parse_dates
+
+REQUIRED_COLS = [
+    "Date of Inspection", "Type of Inspection", "Location",
+    "Head", "Sub Head", "Deficiencies Noted",
+    "Inspection By", "Action By", "Feedback",
+    "User Feedback/Remark", "Timestamp of Compliance"
+]
+
+TIMESTAMP_COL_NAME = "Timestamp of Compliance"
+KEY_COL_NAME = "Date of Inspection"
+
+
+def col_letter(c):
+    return re.sub(r"\d+$", "", gspread.utils.rowcol_to_a1(1, c))
+
+
+def merge_runs(rows):
+    """Collapse sorted row numbers into (first, last) runs of consecutive rows."""
+    runs = []
+    for r in rows:
+        if runs and r == runs[-1][1] + 1:
+            runs[-1][1] = r
+        else:
+            runs.append([r, r])
+    return [tuple(run) for run in runs]
+
+
+def _column(values, n):
+    col = [v[0] if v else "" for v in values]
+    return col + [""] * (n - len(col))
+
+
+class SheetSync:
+    """Keeps the last worksheet snapshot and pulls only appended or changed rows.
+
+    Each sync reads the header, the key column and the compliance timestamp
+    column in a single request. Rows whose key or timestamp changed, plus any
+    rows appended since the last sync, are fetched as contiguous ranges and
+    merged into the existing frame. A header change, a shrinking sheet or
+    every ``full_every``-th sync falls back to a full ``get_all_values``.
+    ``ingest`` is applied to every parsed batch (e.g. categorical encoding).
+
+    Only the key and timestamp columns are probed, so a cell edited in place
+    in any other column (without touching those two) is not seen until the
+    next full load; ``sync(force_full=True)`` asks for one now.
+    """
+
+    def __init__(self, sheet, full_every=120, ingest=None):
+        self.sheet = sheet
+        self.full_every = full_every
+        self.ingest = ingest
+        self.lock = threading.Lock()
+        self.headers = None
+        self.df = None
+        self.keys = []
+        self.stamps = []
+        self.date_format = None
+        self.syncs = 0
+        self.last_fetched = 0
+        # positions touched by the last sync (patched or appended); None after a full load
+        self.changed = None
+
+    def sync(self, force_full=False):
+        with self.lock:
+            self.syncs += 1
+            if force_full or self.df is None or self.syncs % self.full_every == 0:
+                self._full_load()
+            else:
+                self._delta_load()
+            return self.df
+
+    # ----- full load -----
+    def _full_load(self):
+        self.changed = None
+        data = self.sheet.get_all_values()
+        self.last_fetched = max(len(data) - 1, 0)
+        if not data or len(data) < 2:
+            self.headers = [c.strip() for c in data[0]] if data else None
+            self.df = pd.DataFrame(columns=REQUIRED_COLS)
+            self.keys, self.stamps = [], []
+            return
+        self.headers = [c.strip() for c in data[0]]
+        raw = pd.DataFrame(data[1:], columns=self.headers)
+        self.keys = self._raw_column(raw, KEY_COL_NAME)
+        self.stamps = self._raw_column(raw, TIMESTAMP_COL_NAME)
+        self.date_format = None
+        if KEY_COL_NAME in raw.columns:
+            # same first-value guess pd.to_datetime makes, pinned so deltas parse alike
+            first = next((v for v in raw[KEY_COL_NAME] if v), None)
+            if first is not None:
+                self.date_format = guess_datetime_format(first)
+        self.df = self._parse(raw, first_row=2)
+
+    @staticmethod
+    def _raw_column(raw, name):
+        return raw[name].tolist() if name in raw.columns else [""] * len(raw)
+
+    # ----- delta load -----
+    def _delta_load(self):
+        if self.headers is None or KEY_COL_NAME not in self.headers:
+            return self._full_load()
+        key_c = col_letter(self.headers.index(KEY_COL_NAME) + 1)
+        ranges = ["1:1", f"{key_c}2:{key_c}"]
+        has_stamp = TIMESTAMP_COL_NAME in self.headers
+        if has_stamp:
+            ts_c = col_letter(self.headers.index(TIMESTAMP_COL_NAME) + 1)
+            ranges.append(f"{ts_c}2:{ts_c}")
+        probe = self.sheet.batch_get(ranges)
+        header = [c.strip() for c in (probe[0][0] if probe[0] else [])]
+        if header != self.headers:
+            return self._full_load()
+
+        n_rows = max(len(probe[1]), len(probe[2]) if has_stamp else 0)
+        old_n = len(self.keys)
+        if n_rows < old_n:
+            return self._full_load()
+        keys = _column(probe[1], n_rows)
+        stamps = _column(probe[2], n_rows) if has_stamp else [""] * n_rows
+
+        changed = [i for i in range(old_n) if keys[i] != self.keys[i] or stamps[i] != self.stamps[i]]
+        runs = merge_runs([i + 2 for i in changed])
+        if n_rows > old_n:
+            runs.append((old_n + 2, n_rows + 1))
+        self.last_fetched = sum(last - first + 1 for first, last in runs)
+        if not runs:
+            self.changed = np.empty(0, dtype=np.int64)
+            return
+
+        last_c = col_letter(len(self.headers))
+        fetched = self.sheet.batch_get([f"A{first}:{last_c}{last}" for first, last in runs])
+        width = len(self.headers)
+        rows, row_numbers = [], []
+        for (first, last), values in zip(runs, fetched):
+            values = list(values) + [[]] * (last - first + 1 - len(values))
+            for offset, row in enumerate(values):
+                rows.append((list(row) + [""] * width)[:width])
+                row_numbers.append(first + offset)
+        delta = self._parse(pd.DataFrame(rows, columns=self.headers), row_numbers=row_numbers)
+
+        # the previous frame may be shared by readers: patch copies of the columns
+        # that actually changed, never in place; the others stay shared
+        is_new = delta["_sheet_row"] > old_n + 1
+        updated = delta[~is_new]
+        df = self.df
+        if not updated.empty:
+            df = df.copy(deep=False)
+            pos = (updated["_sheet_row"] - 2).to_numpy()
+            for col in df.columns:
+                if col in updated.columns and differs(df[col], pos, updated[col].to_numpy()):
+                    df[col] = patch_series(df[col], pos, updated[col].to_numpy())
+        if is_new.any():
+            df = concat_frames(df, delta[is_new])
+        self.df = df
+        self.keys, self.stamps = keys, stamps
+        self.changed = (delta["_sheet_row"] - 2).to_numpy(np.int64)
+
+    # ----- parsing -----
+    def _parse(self, raw, first_row=None, row_numbers=None):
+        df = raw
+        for col in REQUIRED_COLS:
+            if col not in df.columns:
+                df[col] = ""
+        formats = ([self.date_format] if self.date_format else []) + INSPECTION_DATE_FORMATS
+        df["Date of Inspection"] = parse_dates(df["Date of Inspection"], formats)
+        df["Location"] = df["Location"].astype(str).str.strip().str.upper()
+        if row_numbers is None:
+            row_numbers = range(first_row, first_row + len(df))
+        df["_sheet_row"] = list(row_numbers)
+        return self.ingest(df) if self.ingest is not None else df
+
+    # ----- snapshot -----
+    def snapshot_state(self):
+        """(frame, meta) to persist; the raw key and timestamp columns ride along for delta syncs."""
+        with self.lock:
+            df = self.df.copy(deep=False)
+            df["_raw_key"] = self.keys
+            df["_raw_stamp"] = self.stamps
+            return df, {"headers": self.headers, "date_format": self.date_format}
+
+    def restore(self, df, meta):
+        """Seed from a snapshot so the next sync only pulls what changed since it was taken."""
+        with self.lock:
+            self.keys = df["_raw_key"].tolist()
+            self.stamps = df["_raw_stamp"].tolist()
+            self.df = df.drop(columns=["_raw_key", "_raw_stamp"])
+            self.headers = meta.get("headers")
+            self.date_format = meta.get("date_format")
+            self.syncs = 1
+            self.changed = None
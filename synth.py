@@ -0,0 +1,91 @@
+# ---------- SYNTHETIC DATA ----------
+import random
+import sys
+
+import numpy as np
+import pandas as pd
+
+from backend import LocalSheet
+from classifier import RESOLVED_KW, PENDING_KW
+from constants import (STATION_LIST, GATE_LIST, FOOTPLATE_ROUTE_HIERARCHY, HEAD_LIST, SUBHEAD_LIST,
+                       INSPECTION_BY_LIST, ACTION_BY_LIST, VALID_INSPECTIONS)
+from sync import REQUIRED_COLS
+
+FILLER = ["light", "platform", "staff", "broken", "station", "is", "the", "of", "LC gate", "Board",
+          "TDC", "Tdc:", "by", "on", "date", "12/05/2024", "1-2-24", "31/12/2025", "3/4/5", "sr.dso"]
+DEFECTS = ["light not working", "broken fencing", "record not updated"]
+ODD_VALUES = [None, np.nan, 5, 3.5, "", " ", "`", " ` ", "``", "\t`\n", "#", "!", "done!", "pending#"]
+
+
+def feedback_corpus(n, seed=0):
+    """Random feedback / remark pairs mixing keywords, dates, !/# marks, case and whitespace noise."""
+    rnd = random.Random(seed)
+    vocab = RESOLVED_KW + PENDING_KW + FILLER
+
+    def text():
+        r = rnd.random()
+        if r < 0.08:
+            return rnd.choice(ODD_VALUES)
+        words = [rnd.choice(vocab) for _ in range(rnd.randint(1, 8))]
+        if rnd.random() < 0.1:
+            words.insert(rnd.randrange(len(words) + 1), rnd.choice(["#", "!", "#!", "!#"]))
+        t = rnd.choice([" ", "  ", "\n", " \t"]).join(words)
+        if rnd.random() < 0.3:
+            t = t.upper() if rnd.random() < 0.5 else t.title()
+        if rnd.random() < 0.1:
+            t = f"  {t}\n"
+        return t
+
+    return pd.Series([text() for _ in range(n)], dtype=object), pd.Series([text() for _ in range(n)], dtype=object)
+
+
+def synthetic_frame(rows, seed=0):
+    """Parsed-sheet-shaped frame drawn from the real station, gate, head and sub-head lists."""
+    rnd = np.random.default_rng(seed)
+    locations = np.array(STATION_LIST + GATE_LIST + list(FOOTPLATE_ROUTE_HIERARCHY), dtype=object)
+    heads = np.array(HEAD_LIST[1:], dtype=object)
+    head = heads[rnd.integers(0, len(heads), rows)]
+    sub_head = np.empty(rows, dtype=object)
+    for h in heads:
+        at = np.flatnonzero(head == h)
+        choices = np.array(SUBHEAD_LIST.get(h, ["MISC"]), dtype=object)
+        sub_head[at] = choices[rnd.integers(0, len(choices), len(at))]
+    inspectors = np.array(INSPECTION_BY_LIST[1:], dtype=object)
+    actions = np.array(ACTION_BY_LIST[1:], dtype=object)
+    fb, rm = feedback_corpus(min(rows, 5000), seed=seed)
+    pick = rnd.integers(0, len(fb), rows)
+    return pd.DataFrame({
+        "Date of Inspection": pd.Timestamp("2022-01-01") + pd.to_timedelta(rnd.integers(0, 1400, rows), unit="D"),
+        "Type of Inspection": np.array(VALID_INSPECTIONS, dtype=object)[rnd.integers(0, len(VALID_INSPECTIONS), rows)],
+        "Location": locations[rnd.integers(0, len(locations), rows)],
+        "Head": head,
+        "Sub Head": sub_head,
+        "Deficiencies Noted": ("Deficiency " + pd.Series(np.arange(rows)).astype(str) + ": "
+                               + np.array(DEFECTS, dtype=object)[rnd.integers(0, len(DEFECTS), rows)]).to_numpy(object),
+        "Inspection By": inspectors[rnd.integers(0, len(inspectors), rows)],
+        "Action By": actions[rnd.integers(0, len(actions), rows)],
+        "Feedback": fb.to_numpy(object)[pick],
+        "User Feedback/Remark": "",
+        "Timestamp of Compliance": "",
+        "_sheet_row": np.arange(2, rows + 2),
+    })
+
+
+def sheet_rows(df):
+    """Header plus cell strings in sheet column order, as get_all_values returns them."""
+    cells = df[REQUIRED_COLS].copy()
+    cells["Date of Inspection"] = cells["Date of Inspection"].dt.strftime("%Y-%m-%d")
+    cells = cells.fillna("").astype(str)
+    return [list(REQUIRED_COLS)] + cells.values.tolist()
+
+
+def local_sheet(path, rows, seed=0):
+    """A LocalSheet CSV holding ``rows`` synthetic inspections."""
+    return LocalSheet.create(path, sheet_rows(synthetic_frame(rows, seed)))
+
+
+if __name__ == "__main__":
+    # python synth.py sheet.csv [rows] -> run the app on it with INSPECTION_SHEET_FILE=sheet.csv
+    if len(sys.argv) < 2:
+        sys.exit("usage: python synth.py <file.csv> [rows]")
+    local_sheet(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 10000)
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acks import AckStore, ACK_COLUMNS
+
+
+def _legacy(path):
+    pd.DataFrame({"UserID": ["u1", "u2", None, "u1"], "Name": ["Asha", None, "ghost", "Asha"]}).to_excel(path, index=False)
+
+
+def test_migrates_legacy_xlsx_once(tmp_path):
+    db, xlsx = str(tmp_path / "acks.db"), str(tmp_path / "responses.xlsx")
+    _legacy(xlsx)
+    store = AckStore(db, legacy_xlsx=xlsx)
+    assert store.has("u1") and store.has("u2") and not store.has("u3")
+    assert store.frame().values.tolist() == [["u1", "Asha"], ["u2", ""], ["u1", "Asha"]]
+    store.append("u3", "Ravi")
+
+    # reopening must not import the spreadsheet a second time
+    again = AckStore(db, legacy_xlsx=xlsx)
+    assert again.frame().values.tolist() == [["u1", "Asha"], ["u2", ""], ["u1", "Asha"], ["u3", "Ravi"]]
+
+
+def test_missing_or_foreign_legacy_file(tmp_path):
+    store = AckStore(str(tmp_path / "a.db"), legacy_xlsx=str(tmp_path / "missing.xlsx"))
+    assert list(store.frame().columns) == ACK_COLUMNS and store.frame().empty
+
+    xlsx = str(tmp_path / "other.xlsx")
+    pd.DataFrame({"Something": [1, 2]}).to_excel(xlsx, index=False)
+    store = AckStore(str(tmp_path / "b.db"), legacy_xlsx=xlsx)
+    assert store.frame().empty
+    store.append("u1", "Asha")
+    assert AckStore(str(tmp_path / "b.db"), legacy_xlsx=xlsx).frame().values.tolist() == [["u1", "Asha"]]
+
+
+def test_sees_writes_from_another_connection(tmp_path):
+    db = str(tmp_path / "acks.db")
+    first, second = AckStore(db, legacy_xlsx=None), AckStore(db, legacy_xlsx=None)
+    assert not first.has("u9")
+    second.append("u9", "Meera")
+    assert first.has("u9")
+    second.clear()
+    assert not first.has("u9")
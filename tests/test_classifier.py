@@ -0,0 +1,15 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classifier import classify_feedback, classify_feedback_series
+from synth import feedback_corpus
+
+
+def test_batched_classifier_matches_scalar():
+    fb, rm = feedback_corpus(20000, seed=1)
+    expected = [classify_feedback(a, b) for a, b in zip(fb, rm)]
+    got = classify_feedback_series(fb, rm).tolist()
+    bad = [i for i, (e, g) in enumerate(zip(expected, got)) if e != g]
+    assert not bad, f"{len(bad)} mismatches, first: {fb[bad[0]]!r} / {rm[bad[0]]!r}"
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indexes import SearchIndex, TokenIndex
+from synth import synthetic_frame
+
+SEARCH_COLS = ["Deficiencies Noted", "Inspection By", "Feedback", "User Feedback/Remark"]
+
+
+def edited_version(df, seed):
+    """Next version of df with random rows rewritten and a few rows appended; (frame, changed positions)."""
+    rnd = np.random.default_rng(seed)
+    pos = rnd.choice(len(df), 200, replace=False)
+    new = df.copy()
+    for col in SEARCH_COLS:
+        values = new[col].astype(object)
+        values.iloc[pos] = df[col].iloc[rnd.integers(0, len(df), len(pos))].to_numpy()
+        values.iloc[pos[:3]] = "brandnewword,Sr.NEW"
+        new[col] = values
+    extra = df.iloc[:20].copy()
+    extra["Feedback"] = "appended row"
+    new = pd.concat([new, extra], ignore_index=True)
+    return new, np.concatenate([pos, np.arange(len(df), len(new))])
+
+
+def test_search_index_update_matches_rebuild():
+    df = synthetic_frame(5000)
+    new, changed = edited_version(df, seed=1)
+    updated = SearchIndex(df, SEARCH_COLS).updated(df, new, changed)
+    rebuilt = SearchIndex(new, SEARCH_COLS)
+    assert updated.terms == rebuilt.terms
+    assert all(np.array_equal(a, b) for a, b in zip(updated.postings, rebuilt.postings))
+
+
+def test_token_index_update_matches_rebuild():
+    df = synthetic_frame(5000)
+    new, changed = edited_version(df, seed=2)
+    updated = TokenIndex(df["Inspection By"]).updated(new["Inspection By"], changed)
+    rebuilt = TokenIndex(new["Inspection By"])
+    selections = [[tok] for tok in rebuilt.postings] + [["Sr.NEW", "Sr.DSO"]]
+    for selected in selections:
+        assert np.array_equal(updated.mask(selected), rebuilt.mask(selected))
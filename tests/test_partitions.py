@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import LocalSheet, LocalWorkbook
+from ingest import ingest_frame
+from partitions import PartitionedSync, parse_partition, row_key, split_key
+from sync import KEY_COL_NAME, REQUIRED_COLS
+from synth import sheet_rows, synthetic_frame
+from writeback import a1_ranges, column_map
+
+
+def test_row_key_round_trip():
+    for number, row in [(0, 2), (20240, 2), (20243, 9_999_999), (20250, 17)]:
+        assert split_key(row_key(number, row)) == (number, row)
+    assert split_key(str(row_key(20243, 5))) == (20243, 5)
+
+
+def test_parse_partition():
+    assert parse_partition("Sheet1 2024", "Sheet1") == (20240, pd.Timestamp(2024, 1, 1), pd.Timestamp(2025, 1, 1))
+    assert parse_partition(" Sheet1 2024-Q3 ", "Sheet1") == (20243, pd.Timestamp(2024, 7, 1), pd.Timestamp(2024, 10, 1))
+    assert parse_partition("Sheet1", "Sheet1") is None
+    assert parse_partition("Sheet1 2024-Q5", "Sheet1") is None
+    assert parse_partition("Other 2024", "Sheet1") is None
+
+
+def _workbook(path):
+    key = REQUIRED_COLS.index(KEY_COL_NAME)
+    for title, year, rows in [("Sheet1", 2020, 4), ("Sheet1 2024", 2024, 6), ("Sheet1 2025-Q1", 2025, 5)]:
+        data = sheet_rows(synthetic_frame(rows, seed=year))
+        for i, r in enumerate(data[1:]):
+            r[key] = f"{year}-02-{1 + i:02d}"
+            r[REQUIRED_COLS.index("Deficiencies Noted")] = f"{title} row {i + 2}"
+        LocalSheet.create(os.path.join(path, f"{title}.csv"), data, title=title)
+    return LocalWorkbook(path)
+
+
+def test_locate_maps_row_keys_to_worksheets(tmp_path):
+    engine = PartitionedSync(_workbook(str(tmp_path)), "Sheet1", ingest=ingest_frame, recent=2)
+    df = engine.sync()
+    assert engine.loaded() == ["Sheet1", "Sheet1 2024", "Sheet1 2025-Q1"]
+    assert len(df) == 15
+    for key, text in zip(df["_sheet_row"], df["Deficiencies Noted"]):
+        title, row = engine.locate(key)
+        assert text == f"{title} row {row}"
+
+
+def test_writes_land_in_their_worksheet(tmp_path):
+    book = _workbook(str(tmp_path))
+    engine = PartitionedSync(book, "Sheet1", ingest=ingest_frame, recent=2)
+    df = engine.sync()
+    by_sheet = {}
+    for key in df["_sheet_row"].iloc[[1, 5, 12]]:
+        title, row = engine.locate(key)
+        by_sheet.setdefault(title, {})[row] = {"Feedback": f"done {title} {row}"}
+    data = [item for title, rows in by_sheet.items()
+            for item in a1_ranges(rows, column_map(engine.headers_for(title)), sheet=title)]
+    book.values_batch_update({"valueInputOption": "USER_ENTERED", "data": data})
+
+    feedback = REQUIRED_COLS.index("Feedback")
+    for title, rows in by_sheet.items():
+        saved = LocalSheet(os.path.join(str(tmp_path), f"{title}.csv")).rows
+        for row, values in rows.items():
+            assert saved[row - 1][feedback] == values["Feedback"]
+    df = engine.sync(force_full=True)
+    assert df["Feedback"].iloc[[1, 5, 12]].tolist() == [
+        values["Feedback"] for rows in by_sheet.values() for values in rows.values()]
@@ -0,0 +1,56 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import ingest_frame
+from sync import SheetSync, REQUIRED_COLS, KEY_COL_NAME, TIMESTAMP_COL_NAME
+from synth import local_sheet
+
+KEY = REQUIRED_COLS.index(KEY_COL_NAME)
+STAMP = REQUIRED_COLS.index(TIMESTAMP_COL_NAME)
+FEEDBACK = REQUIRED_COLS.index("Feedback")
+HEAD = REQUIRED_COLS.index("Head")
+
+
+def test_delta_sync_matches_full_load(tmp_path):
+    sheet = local_sheet(str(tmp_path / "sheet.csv"), 300)
+    sheet.autosave = False
+    engine = SheetSync(sheet, ingest=ingest_frame)
+    engine.sync()
+    rnd = np.random.default_rng(0)
+    for step in range(30):
+        edited = rnd.choice(np.arange(1, len(sheet.rows)), 5, replace=False)
+        for i, r in enumerate(edited):
+            row = sheet.rows[r]
+            # deltas only see rows whose key or compliance timestamp changed
+            row[STAMP] = f"{1 + step % 28:02d}-02-2025 10:{i:02d}:00 IST"
+            row[FEEDBACK] = f"done step {step}"
+            row[HEAD] = f"HEAD {step}"  # a category the frame has not seen yet
+            if i == 0:
+                row[KEY] = f"2025-03-{1 + step % 28:02d}"
+        appended = [list(sheet.rows[r]) for r in rnd.integers(1, len(sheet.rows), step % 3)]
+        sheet.rows.extend(appended)
+
+        delta = engine.sync()
+        assert engine.changed is not None
+        assert set(edited - 1) <= set(engine.changed)
+        full = SheetSync(sheet, ingest=ingest_frame).sync()
+        pd.testing.assert_frame_equal(delta.astype(object), full.astype(object))
+
+
+def test_delta_sync_returns_new_frame(tmp_path):
+    sheet = local_sheet(str(tmp_path / "sheet.csv"), 50)
+    sheet.autosave = False
+    engine = SheetSync(sheet, ingest=ingest_frame)
+    before = engine.sync()
+    sheet.rows[5][STAMP] = "01-02-2025 10:00:00 IST"
+    sheet.rows[5][FEEDBACK] = "work completed"
+    after = engine.sync()
+    assert after is not before
+    assert list(engine.changed) == [4]
+    assert after["Feedback"].iloc[4] == "work completed"
+    assert before["Feedback"].iloc[4] != "work completed"
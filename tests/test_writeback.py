@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from writeback import WriteQueue
+
+COLUMNS = {"Feedback": 9, "User Feedback/Remark": 10}
+
+
+class FakeSpreadsheet:
+    def __init__(self):
+        self.calls = []
+        self.values = {}
+
+    def values_batch_update(self, body):
+        self.calls.append([d["range"] for d in body["data"]])
+        self.values.update((d["range"], d["values"]) for d in body["data"])
+
+
+class FakeSheet:
+    def __init__(self):
+        self.spreadsheet = FakeSpreadsheet()
+
+
+def journal(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def wait_for(q, sids, timeout=5.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if all(q.status(s)["state"] in ("written", "failed") for s in sids):
+            return
+        time.sleep(0.02)
+    raise AssertionError([q.status(s) for s in sids])
+
+
+def submit_record(sid, row):
+    return {"op": "submit", "id": sid, "session": None, "at": 0.0, "rows": {str(row): {"Feedback": sid}}}
+
+
+def test_replay_keeps_only_unclosed_submissions(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for record in (submit_record("a", 2), submit_record("b", 3), submit_record("c", 4),
+                       {"op": "done", "ids": ["a"], "at": 0.0},
+                       {"op": "failed", "ids": ["b"], "error": "bad row"}):
+            f.write(json.dumps(record) + "\n")
+        f.write('{"op": "submit", "id": "tor')  # crash mid-append
+    sheet = FakeSheet()
+    q = WriteQueue(sheet, columns=lambda: COLUMNS, journal_path=path, batch_window=0.2, min_interval=0.0)
+    assert list(q.pending) == ["c"]
+    assert q.status("c")["replayed"]
+    assert [r["id"] for r in journal(path)] == ["c"]
+    wait_for(q, ["c"])
+    assert sheet.spreadsheet.calls == [["I4:I4"]]
+    assert journal(path) == []
+
+
+def test_drained_queue_compacts_journal(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    sheet = FakeSheet()
+    q = WriteQueue(sheet, columns=lambda: COLUMNS, journal_path=path, batch_window=0.2, min_interval=0.0)
+    sids = [q.submit({5: {"Feedback": "x"}}), q.submit({6: {"Feedback": "y", "User Feedback/Remark": ""}}),
+            q.submit({5: {"Feedback": "z"}})]
+    wait_for(q, sids)
+    assert sheet.spreadsheet.calls == [["I5:I5", "I6:J6"]]
+    assert sheet.spreadsheet.values["I5:I5"] == [["z"]]  # the later submit wins
+    assert q.backlog() == 0
+    assert journal(path) == []
+
+
+def test_bad_submission_fails_alone(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    sheet = FakeSheet()
+
+    def locate(key):
+        if key == 999:
+            raise KeyError(key)
+        return "Sheet1", key
+
+    q = WriteQueue(sheet, columns=lambda title=None: COLUMNS, journal_path=path, batch_window=0.3,
+                   min_interval=0.0, locate=locate)
+    good, bad, other = q.submit({5: {"Feedback": "x"}}), q.submit({999: {"Feedback": "y"}}), q.submit({7: {"Feedback": "z"}})
+    wait_for(q, [good, bad, other])
+    assert [q.status(s)["state"] for s in (good, bad, other)] == ["written", "failed", "written"]
+    assert sheet.spreadsheet.calls == [["'Sheet1'!I5:I5"], ["'Sheet1'!I7:I7"]]
+    assert journal(path) == []
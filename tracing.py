@@ -0,0 +1,98 @@
+# ---------- PERFORMANCE TRACING ----------
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+TRACE_PATH = "traces.jsonl"
+TRACE_ENV = "INSPECTION_TRACE_FILE"
+TRACE_MAX_BYTES = 10 * 2**20
+SUMMARY_COLUMNS = ["Stage", "Calls", "p50 ms", "p90 ms", "p99 ms", "Max ms", "Last ms"]
+
+
+class Tracer:
+    """Timing spans per stage, kept in memory for percentiles and appended to a JSONL file.
+
+    Each stage keeps its last ``window`` durations for ``summary``. Every span
+    is also one JSON line (ts, stage, ms, thread plus any attributes); lines
+    are buffered and appended by ``flush``, which runs once per script run or
+    when ``flush_every`` lines are pending. Once the file passes ``max_bytes``
+    it is rotated to ``<path>.1`` (replacing the previous one), so at most
+    two files are kept. A trace file that cannot be written never breaks
+    the page.
+    """
+
+    def __init__(self, path=TRACE_PATH, window=500, flush_every=50, max_bytes=TRACE_MAX_BYTES):
+        self.path = path
+        self.window = window
+        self.flush_every = flush_every
+        self.max_bytes = max_bytes
+        self.samples = {}
+        self.pending = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time the block; the yielded dict takes attributes known only inside it (e.g. rows)."""
+        t0 = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = type(e).__name__  # st.stop / st.rerun show up here too
+            raise
+        finally:
+            self.record(name, (time.perf_counter() - t0) * 1000, **attrs)
+
+    def traced(self, name):
+        """Decorator form of ``span`` for whole functions."""
+        def wrap(fn):
+            @functools.wraps(fn)
+            def inner(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return inner
+        return wrap
+
+    def record(self, name, ms, **attrs):
+        line = {"ts": round(time.time(), 3), "stage": name, "ms": round(ms, 3),
+                "thread": threading.current_thread().name, **attrs}
+        with self.lock:
+            self.samples.setdefault(name, deque(maxlen=self.window)).append(ms)
+            self.pending.append(line)
+            full = len(self.pending) >= self.flush_every
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, []
+        if not pending or not self.path:
+            return
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(line, default=str) + "\n" for line in pending))
+        except OSError:
+            pass
+
+    def clear(self):
+        with self.lock:
+            self.samples = {}
+
+    def summary(self):
+        """Calls and p50/p90/p99/max/last milliseconds per stage, slowest p90 first."""
+        with self.lock:
+            samples = [(name, np.array(ms)) for name, ms in self.samples.items() if ms]
+        rows = [(name, len(ms), *np.percentile(ms, [50, 90, 99]), ms.max(), ms[-1]) for name, ms in samples]
+        frame = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+        return frame.sort_values("p90 ms", ascending=False, ignore_index=True)
+
+
+TRACER = Tracer(os.environ.get(TRACE_ENV, TRACE_PATH))
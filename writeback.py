@@ -0,0 +1,336 @@
+# ---------- BATCHED WRITE-BACK ----------
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import gspread
+import numpy as np
+import pandas as pd
+
+from sync import TIMESTAMP_COL_NAME
+
+EDIT_COLS = ["Feedback", "User Feedback/Remark", "Head", "Action By", "Sub Head"]
+REMARK_COL = "User Feedback/Remark"
+REMARK_HASH_COL = "_remark_hash"
+# Remarks containing a key (any case) are forwarded to (Head, Action By); the last matching rule wins
+ROUTING_RULES = {
+    "Pertains to 0": ("0", "0"),
+}
+
+
+def column_map(headers):
+    """Header name -> 1-based sheet column."""
+    return {name.strip(): i + 1 for i, name in enumerate(headers or [])}
+
+
+def edited_values(edited_df, timestamp, with_timestamp=True):
+    """{sheet row: {column: value}} for a submit, read column-wise instead of row by row.
+
+    The compliance timestamp is stamped only on rows whose Feedback is non-blank.
+    """
+    rows = edited_df["_sheet_row"].astype(int).tolist()
+    cols = {c: [v or "" for v in edited_df[c].tolist()] if c in edited_df.columns else [""] * len(rows)
+            for c in EDIT_COLS}
+    local = {}
+    for i, r in enumerate(rows):
+        values = {c: cols[c][i] for c in EDIT_COLS}
+        if with_timestamp:
+            fv = values["Feedback"]
+            values[TIMESTAMP_COL_NAME] = timestamp if isinstance(fv, str) and fv.strip() else ""
+        local[r] = values
+    return local
+
+
+# ---------- SUBMIT DIFF ----------
+def remark_hash(values):
+    """Content hash per remark, cut to 53 bits so it survives the grid's JSON round trip."""
+    text = pd.Series(values, dtype=object).fillna("").astype(str)
+    return (pd.util.hash_pandas_object(text, index=False).to_numpy() >> np.uint64(11)).astype(np.int64)
+
+
+class RemarkRouter:
+    """Keyword routing rules compiled once and matched a whole column at a time."""
+
+    def __init__(self, rules):
+        self.rules = [(re.compile(re.escape(key), re.IGNORECASE), head, action_by)
+                      for key, (head, action_by) in rules.items()]
+
+    def route(self, remarks):
+        """(Head, Action By) arrays per remark; None where no rule matches."""
+        remarks = pd.Series(remarks, dtype=object).fillna("")
+        heads = np.full(len(remarks), None, dtype=object)
+        action_by = np.full(len(remarks), None, dtype=object)
+        for pattern, head, action in self.rules:
+            hit = remarks.str.contains(pattern).to_numpy(dtype=bool)
+            heads[hit] = head
+            action_by[hit] = action
+        return heads, action_by
+
+
+ROUTER = RemarkRouter(ROUTING_RULES)
+
+
+def feedback_changes(edited, router=ROUTER):
+    """Grid rows whose remark was edited, rewritten for ``edited_values``.
+
+    A row changed when its remark no longer matches the hash stamped in
+    ``REMARK_HASH_COL`` when the grid was built. A non-blank remark moves to
+    Feedback and the remark is cleared; a routed one also takes the rule's
+    Head / Action By and a blank Sub Head. Each column is assigned once.
+    """
+    remarks = edited[REMARK_COL].fillna("").astype(str)
+    changed = np.flatnonzero(remark_hash(remarks) != edited[REMARK_HASH_COL].to_numpy(dtype=np.int64))
+    diffs = edited.iloc[changed].copy()
+    text = remarks.iloc[changed].str.strip().to_numpy(dtype=object)
+    has_text = text != ""
+    heads, action_by = router.route(text)
+    routed = has_text & pd.notna(heads)
+    for col, value in (("Head", heads), ("Action By", action_by), ("Sub Head", "")):
+        current = diffs[col].to_numpy(dtype=object) if col in diffs.columns else np.full(len(diffs), "", dtype=object)
+        diffs[col] = np.where(routed, value, current)
+    diffs["Feedback"] = np.where(has_text, text, diffs["Feedback"].to_numpy(dtype=object))
+    diffs[REMARK_COL] = np.where(has_text, "", diffs[REMARK_COL].to_numpy(dtype=object))
+    return diffs
+
+
+def a1_ranges(local, columns, sheet=None):
+    """Merge edited cells into as few rectangular A1 ranges as possible.
+
+    Adjacent sheet columns of a row form one segment; segments spanning the
+    same columns on consecutive rows are stacked into one block. With
+    ``sheet`` the ranges are qualified by that worksheet title.
+    """
+    segments = []
+    for r in sorted(local):
+        cells = sorted((columns[c], v) for c, v in local[r].items() if c in columns)
+        for c, v in cells:
+            seg = segments[-1] if segments else None
+            if seg and seg[0] == r and seg[2] == c - 1:
+                seg[2] = c
+                seg[3].append(v)
+            else:
+                segments.append([r, c, c, [v]])
+    blocks = []
+    for r, c0, c1, values in sorted(segments, key=lambda s: (s[1], s[2], s[0])):
+        block = blocks[-1] if blocks else None
+        if block and block[1:3] == [c0, c1] and block[3] == r - 1:
+            block[3] = r
+            block[4].append(values)
+        else:
+            blocks.append([r, c0, c1, r, [values]])
+    prefix = "'{}'!".format(sheet.replace("'", "''")) if sheet else ""
+    return [
+        {"range": f"{prefix}{gspread.utils.rowcol_to_a1(r0, c0)}:{gspread.utils.rowcol_to_a1(r1, c1)}", "values": values}
+        for r0, c0, c1, r1, values in sorted(blocks)
+    ]
+
+
+# ---------- WRITE QUEUE ----------
+RETRYABLE_CODES = {-1, 429, 500, 502, 503, 504}
+
+
+def is_retryable(exc):
+    """Quota, server and transport errors are retried; other API errors are final."""
+    if isinstance(exc, gspread.exceptions.APIError):
+        return exc.code in RETRYABLE_CODES
+    return isinstance(exc, (ConnectionError, TimeoutError, OSError))
+
+
+class WriteQueue:
+    """Background writer for submitted feedback, shared by every session.
+
+    ``submit`` journals the edit to a local JSONL file and returns at once.
+    A worker thread drains all pending submissions as one batch: later
+    submits for the same row win, and cells are merged with ``a1_ranges``.
+    Retryable failures back off exponentially (``base_delay`` doubling up to
+    ``max_delay``). Writes are at least ``min_interval`` seconds apart to stay
+    under the Sheets quota. When a merged batch fails for good, each of its
+    submissions is retried alone, so only the bad one is marked failed.
+    Submissions not yet marked done in the journal are replayed on start-up,
+    and the journal is compacted to them then and whenever the queue drains.
+    ``locate`` maps a row key to (worksheet title,
+    sheet row) when rows live in several worksheets; ``columns(title)`` then
+    gives that worksheet's header map (``columns()`` otherwise).
+    """
+
+    def __init__(self, sheet, columns, journal_path="writeback_journal.jsonl", batch_window=1.0,
+                 min_interval=1.0, base_delay=2.0, max_delay=60.0, keep_status=1000, locate=None):
+        self.sheet = sheet
+        self.columns = columns
+        self.locate = locate
+        self.journal_path = journal_path
+        self.batch_window = batch_window
+        self.min_interval = min_interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.keep_status = keep_status
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.pending = OrderedDict()
+        self.statuses = OrderedDict()
+        self.last_write = 0.0
+        self._replay()
+        if self.pending:
+            self.wake.set()
+        self.worker = threading.Thread(target=self._run, name="writeback", daemon=True)
+        self.worker.start()
+
+    # ----- journal -----
+    def _append(self, *records):
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replay(self):
+        if not os.path.exists(self.journal_path):
+            return
+        submitted, closed = OrderedDict(), set()
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash mid-append
+                if record.get("op") == "submit":
+                    submitted[record["id"]] = record
+                elif record.get("op") in ("done", "failed"):
+                    closed.update(record["ids"])
+        for sid, record in submitted.items():
+            if sid not in closed:
+                self.pending[sid] = record
+                self._set_status(sid, "queued", rows=len(record["rows"]), replayed=True)
+        self._compact()
+
+    def _compact(self):
+        """Rewrite the journal with only what is still owed."""
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in self.pending.values():
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp, self.journal_path)
+
+    # ----- public -----
+    def submit(self, local, session_id=None):
+        """Queue {sheet row: {column: value}}; returns a submission id for ``status``."""
+        sid = uuid.uuid4().hex
+        record = {"op": "submit", "id": sid, "session": session_id, "at": time.time(),
+                  "rows": {str(r): values for r, values in local.items()}}
+        with self.lock:
+            self._append(record)
+            self.pending[sid] = record
+            self._set_status(sid, "queued", rows=len(local))
+        self.wake.set()
+        return sid
+
+    def status(self, sid):
+        with self.lock:
+            return dict(self.statuses.get(sid, {"state": "unknown"}))
+
+    def backlog(self):
+        with self.lock:
+            return len(self.pending)
+
+    def _set_status(self, sid, state, **info):
+        entry = self.statuses.setdefault(sid, {})
+        entry.update(info, state=state, updated=time.time())
+        self.statuses.move_to_end(sid)
+        while len(self.statuses) > self.keep_status:
+            self.statuses.popitem(last=False)
+
+    # ----- worker -----
+    def _ranges(self, merged):
+        if self.locate is None:
+            return a1_ranges(merged, self.columns())
+        by_sheet = {}
+        for key, values in merged.items():
+            title, row = self.locate(key)
+            by_sheet.setdefault(title, {})[row] = values
+        return [item for title, rows in by_sheet.items() for item in a1_ranges(rows, self.columns(title), sheet=title)]
+
+    def _write(self, batch):
+        """One values_batch_update for the batch; later submits win per cell."""
+        merged = {}
+        for record in batch:
+            for r, values in record["rows"].items():
+                merged.setdefault(int(r), {}).update(values)
+        data = self._ranges(merged)
+        time.sleep(max(0.0, self.last_write + self.min_interval - time.time()))
+        self.last_write = time.time()
+        self.sheet.spreadsheet.values_batch_update({"valueInputOption": "USER_ENTERED", "data": data})
+
+    def _isolate(self, batch):
+        """Write each submission alone; (written ids, [(id, error)], retryable error or None).
+
+        Stops at the first retryable error: that submission and the rest stay pending.
+        """
+        written, failed = [], []
+        for record in batch:
+            try:
+                self._write([record])
+            except Exception as e:
+                if is_retryable(e):
+                    return written, failed, e
+                failed.append((record["id"], str(e)))
+                continue
+            written.append(record["id"])
+        return written, failed, None
+
+    def _settle(self, written, failed):
+        at = time.time()
+        with self.lock:
+            if written:
+                self._append({"op": "done", "ids": written, "at": at})
+            for sid, error in failed:
+                self._append({"op": "failed", "ids": [sid], "error": error})
+            for sid in written:
+                self.pending.pop(sid, None)
+                self._set_status(sid, "written", written_at=at, error=None)
+            for sid, error in failed:
+                self.pending.pop(sid, None)
+                self._set_status(sid, "failed", error=error)
+            if not self.pending:
+                self._compact()
+
+    def _run(self):
+        attempt = 0
+        while True:
+            self.wake.wait()
+            time.sleep(self.batch_window)  # let concurrent submits join the batch
+            with self.lock:
+                self.wake.clear()
+                batch = list(self.pending.values())
+            if not batch:
+                continue
+            ids = [record["id"] for record in batch]
+            try:
+                self._write(batch)
+                written, failed, error = ids, [], None
+            except Exception as e:
+                if is_retryable(e):
+                    written, failed, error = [], [], e
+                elif len(batch) == 1:
+                    written, failed, error = [], [(ids[0], str(e))], None
+                else:
+                    # one bad submission (a 400, an unknown row) must not fail the rest
+                    written, failed, error = self._isolate(batch)
+            self._settle(written, failed)
+            if error is not None:
+                attempt += 1
+                with self.lock:
+                    for sid in ids:
+                        if sid in self.pending:
+                            self._set_status(sid, "retrying", attempts=attempt, error=str(error))
+                time.sleep(min(self.max_delay, self.base_delay * 2 ** (attempt - 1)) * random.uniform(0.8, 1.2))
+                self.wake.set()
+                continue
+            attempt = 0
+            with self.lock:
+                if self.pending:
+                    self.wake.set()